@@ -376,6 +376,10 @@ class Prompter:
 
                 print("\n--------------Enter Filters--------------")
 
+                self.eod.field_mapper.prefetch(
+                    [self.eod.get_full_collid(c)
+                     for c in self.params['collections']])
+
                 # Ask for the filters for the given collection(s)
                 for coll in self.params['collections']:
                     coll_id = self.eod.get_full_collid(coll)
@@ -710,7 +714,8 @@ class Prompter:
                       "-------")
 
                 msg = "\nEnter the path of the output geospatial file " \
-                      "(can also be GeoJSON, KML, GML or Shapefile) " \
+                      "(can also be GeoJSON, KML, GML, Shapefile, " \
+                      "GeoParquet or FlatGeobuf) " \
                       "(default is no output file)\n"
                 output = self.get_input(msg, required=False)
 
@@ -988,9 +993,14 @@ class Prompter:
         # csv_fields = self.params.get('csv_fields')
         aws = self.params.get('aws')
         overlap = self.params.get('overlap')
+        coverage = self.params.get('coverage')
+        coverage_bin = self.params.get('coverage_bin')
+        coverage_weight = self.params.get('coverage_weight')
         orderitems = self.params.get('orderitems')
         no_order = self.params.get('no_order')
         downloads = self.params.get('downloads')
+        no_cache = self.params.get('no_cache')
+        refresh_cache = self.params.get('refresh_cache')
         silent = self.params.get('silent')
         version = self.params.get('version')
 
@@ -1172,6 +1182,15 @@ class Prompter:
                 priority = self.ask_priority(priority)
                 self.params['priority'] = priority
 
+            # Set the AOI coverage options
+            self.params['coverage'] = coverage
+            self.params['coverage_bin'] = coverage_bin
+            self.params['coverage_weight'] = coverage_weight
+
+            # Set the search results cache options
+            self.params['no_cache'] = no_cache
+            self.params['refresh_cache'] = refresh_cache
+
             # Print command-line syntax for future processes
             self.print_syntax()
 
@@ -94,7 +94,11 @@ output_help = '''The output file path containing the results in a
  - GML: The output will be in GML format (use extension .gml) (requires GDAL 
         Python package)
  - Shapefile: The output will be ESRI Shapefile (requires GDAL Python package)
-     (use extension .shp)'''
+     (use extension .shp)
+ - GeoParquet: The output will be in GeoParquet format (use extension
+     .parquet) (requires pyarrow Python package)
+ - FlatGeobuf: The output will be in FlatGeobuf format with a spatial index
+     (use extension .fgb) (requires GDAL Python package)'''
 
 abs_path = os.path.abspath(__file__)
 
@@ -152,6 +156,10 @@ def get_configuration_values(config_util, download_path):
     config_params['keep_results'] = config_util.get('Script', 'keep_results')
     config_params['keep_downloads'] = config_util.get('Script',
                                                       'keep_downloads')
+    config_params['results_compression'] = config_util.get(
+        'Script', 'results_compression')
+    config_params['results_parquet'] = config_util.get('Script',
+                                                       'results_parquet')
 
     # Get the total number of results per query
     config_params['max_results'] = config_util.get('RAPI', 'max_results')
@@ -163,6 +171,19 @@ def get_configuration_values(config_util, download_path):
     config_params['download_attempts'] = config_util.get('RAPI',
                                                         'download_attempts')
 
+    # Get the number of concurrent searches
+    config_params['search_workers'] = config_util.get('RAPI',
+                                                      'search_workers')
+
+    # Get the number of date sub-windows for a search
+    config_params['date_shards'] = config_util.get('RAPI', 'date_shards')
+
+    # Get the search results cache settings
+    config_params['query_ttl'] = config_util.get('Cache', 'query_ttl')
+    config_params['query_max_size'] = config_util.get('Cache',
+                                                      'query_max_size')
+    config_params['catalog_ttl'] = config_util.get('Cache', 'catalog_ttl')
+
     # Get URL for debug purposes
     config_params['rapi_url'] = config_util.get('Debug', 'root_url')
 
@@ -227,6 +248,18 @@ def print_support(err_str=None):
 @click.option('--overlap', '-ov', default=None,
               help='The minimum percentage of overlap between AOI and images '
                    '(if no AOI specified, this parameter is ignored).')
+@click.option('--coverage', '-cov', default=None,
+              help='Orders only the fewest images which cover this '
+                   'percentage of the AOI (if no AOI specified, this '
+                   'parameter is ignored).')
+@click.option('--coverage_bin', '-cvb', default=None,
+              type=click.Choice(['day', 'week', 'month', 'year']),
+              help='Used with --coverage, covers the AOI separately for the '
+                   'images of each day, week, month or year.')
+@click.option('--coverage_weight', '-cvw', default=None,
+              help='Used with --coverage, a numeric metadata field used as '
+                   'the cost of each image (by default each image has the '
+                   'same cost).')
 @click.option('--orderitems', '-oid', default=None,
               help="For Process 4, a set of Order IDs and/or Order Item IDs. "
                    "This example specifies Order IDs and Order Item IDs: "
@@ -236,13 +269,19 @@ def print_support(err_str=None):
 @click.option('--downloads', '-dn', default=None,
               help='The path where the images will be downloaded. Overrides '
                    'the downloads parameter in the configuration file.')
+@click.option('--no_cache', '-nc', is_flag=True, default=None,
+              help='If set, the search results cache is not used.')
+@click.option('--refresh_cache', '-rc', is_flag=True, default=None,
+              help='If set, searches are sent to the RAPI and the search '
+                   'results cache is updated with the new results.')
 @click.option('--silent', '-s', is_flag=True, default=None,
               help='Sets process to silent which suppresses all questions.')
 @click.option('--version', '-v', is_flag=True, default=None,
               help='Prints the version of the script.')
 def cli(username, password, input_val, collections, process, filters, dates,
-        maximum, priority, output, aws, overlap, orderitems, no_order,
-        downloads, silent, version, configure):
+        maximum, priority, output, aws, overlap, coverage, coverage_bin,
+        coverage_weight, orderitems, no_order, downloads, no_cache,
+        refresh_cache, silent, version, configure):
     """
     Search & Order EODMS products.
     """
@@ -306,9 +345,14 @@ def cli(username, password, input_val, collections, process, filters, dates,
                   # 'csv_fields': csv_fields,
                   'aws': aws,
                   'overlap': overlap,
+                  'coverage': coverage,
+                  'coverage_bin': coverage_bin,
+                  'coverage_weight': coverage_weight,
                   'orderitems': orderitems,
                   'no_order': no_order,
                   'downloads': downloads,
+                  'no_cache': no_cache,
+                  'refresh_cache': refresh_cache,
                   'silent': silent,
                   'version': version}
 
@@ -324,9 +368,16 @@ def cli(username, password, input_val, collections, process, filters, dates,
         timeout_order = config_params['timeout_order']
         keep_results = config_params['keep_results']
         keep_downloads = config_params['keep_downloads']
+        results_compression = config_params['results_compression']
+        results_parquet = config_params['results_parquet']
         max_results = config_params['max_results']
         order_check_date = config_params['order_check_date']
         download_attempts = config_params['download_attempts']
+        search_workers = config_params['search_workers']
+        date_shards = config_params['date_shards']
+        query_ttl = config_params['query_ttl']
+        query_max_size = config_params['query_max_size']
+        catalog_ttl = config_params['catalog_ttl']
         rapi_url = config_params['rapi_url']
 
         print(f"\nImages will be downloaded to '{download_path}'.")
@@ -358,8 +409,15 @@ def cli(username, password, input_val, collections, process, filters, dates,
                                     max_res=max_results,
                                     keep_results=keep_results,
                                     keep_downloads=keep_downloads,
+                                    results_compression=results_compression,
+                                    results_parquet=results_parquet,
                                     order_check_date=order_check_date,
                                     download_attempts=download_attempts,
+                                    search_workers=search_workers,
+                                    date_shards=date_shards,
+                                    query_ttl=query_ttl,
+                                    query_max_size=query_max_size,
+                                    catalog_ttl=catalog_ttl,
                                     rapi_url=rapi_url)
 
         print(f"\nCSV Results will be placed in '{eod.results_path}'.")
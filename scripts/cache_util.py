@@ -0,0 +1,432 @@
+##############################################################################
+# MIT License
+# 
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a 
+# copy of this software and associated documentation files (the "Software"), 
+# to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, 
+# and/or sell copies of the Software, and to permit persons to whom the 
+# Software is furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+# 
+##############################################################################
+
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import logging
+import threading
+
+
+def hash_aoi(aoi):
+    """
+    Creates a hash of an AOI so the same geometry always gives the same
+        cache key, whether it is a file or a WKT.
+
+    :param aoi: The AOI filename or WKT.
+    :type  aoi: str
+
+    :return: The SHA-256 hex digest of the AOI contents.
+    :rtype: str
+    """
+
+    if aoi is None or aoi == '':
+        return None
+
+    sha = hashlib.sha256()
+
+    if os.path.isfile(aoi):
+        aoi_files = [aoi]
+        base, ext = os.path.splitext(aoi)
+        if ext.lower() == '.shp':
+            # A shapefile's attributes and projection are in sidecar files
+            aoi_files += [f"{base}{e}" for e in ['.shx', '.dbf', '.prj']]
+
+        for fn in aoi_files:
+            if not os.path.isfile(fn):
+                continue
+            with open(fn, 'rb') as in_f:
+                for chunk in iter(lambda: in_f.read(65536), b''):
+                    sha.update(chunk)
+    else:
+        sha.update(' '.join(str(aoi).split()).upper().encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+class QueryCache:
+    """
+    Stores the raw records of RAPI searches on disk so identical searches
+        can be returned without querying the RAPI.
+    """
+
+    version = 1
+
+    def __init__(self, cache_path=None, ttl=24.0, max_size=100.0):
+        """
+        Initializer for the QueryCache.
+
+        :param cache_path: The folder of the cache files; if None, the
+                cache is stored in the '.eodms' folder of the home folder.
+        :type  cache_path: str
+        :param ttl: The number of hours a cached search is valid
+                (0 disables the cache).
+        :type  ttl: float
+        :param max_size: The maximum size of the cache folder in MB.
+        :type  max_size: float
+        """
+
+        self.cache_path = cache_path
+        if self.cache_path is None:
+            self.cache_path = os.path.join(os.path.expanduser('~'), '.eodms',
+                                           'cache', 'queries')
+
+        self.ttl = float(ttl)
+        self.max_size = float(max_size)
+
+        self.logger = logging.getLogger('eodms')
+
+    def _get_fn(self, key):
+        """
+        Gets the cache filename of a key.
+
+        :param key: The cache key.
+        :type  key: str
+
+        :return: The path of the cache file.
+        :rtype: str
+        """
+
+        return os.path.join(self.cache_path, f"{key}.json.gz")
+
+    def enabled(self):
+        """
+        Checks if the cache is enabled.
+
+        :return: True if the TTL and maximum size are above 0.
+        :rtype: boolean
+        """
+
+        return self.ttl > 0 and self.max_size > 0
+
+    def make_key(self, **kwargs):
+        """
+        Creates a cache key from the parameters of a search.
+
+        :param kwargs: The search parameters:<br>
+                collection (str): The Collection ID.<br>
+                filters (dict): The parsed filters.<br>
+                aoi (str): The AOI filename or WKT.<br>
+                dates (list): The date ranges.<br>
+                result_fields (list): The result fields.<br>
+                max_results (int): The maximum number of results.<br>
+        :type  kwargs: dict
+
+        :return: The cache key.
+        :rtype: str
+        """
+
+        filters = kwargs.get('filters')
+        if filters is not None:
+            filters = {k: [v[0], v[1]] for k, v in filters.items()}
+
+        result_fields = kwargs.get('result_fields')
+        if result_fields is not None:
+            result_fields = sorted(result_fields)
+
+        key_vals = {'version': self.version,
+                    'collection': kwargs.get('collection'),
+                    'filters': filters,
+                    'aoi': hash_aoi(kwargs.get('aoi')),
+                    'dates': kwargs.get('dates'),
+                    'result_fields': result_fields,
+                    'max_results': kwargs.get('max_results')}
+
+        key_str = json.dumps(key_vals, sort_keys=True, default=str)
+
+        return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Gets the records of a cached search.
+
+        :param key: The cache key.
+        :type  key: str
+
+        :return: The list of records or None if the search is not in the
+                cache or has expired.
+        :rtype: list
+        """
+
+        if not self.enabled():
+            return None
+
+        cache_fn = self._get_fn(key)
+
+        if not os.path.exists(cache_fn):
+            return None
+
+        try:
+            with gzip.open(cache_fn, 'rt', encoding='utf-8') as in_f:
+                entry = json.load(in_f)
+        except (OSError, ValueError):
+            self.logger.warning(f"Could not read cache file '{cache_fn}'.")
+            return None
+
+        if entry.get('version') != self.version or \
+                time.time() - entry.get('created', 0) > self.ttl * 3600:
+            return None
+
+        # Update the modified time so eviction removes the least recently
+        #   used searches first
+        try:
+            os.utime(cache_fn, None)
+        except OSError:
+            pass
+
+        return entry.get('results')
+
+    def put(self, key, results):
+        """
+        Adds the records of a search to the cache.
+
+        :param key: The cache key.
+        :type  key: str
+        :param results: The list of records returned by the RAPI.
+        :type  results: list
+        """
+
+        if not self.enabled():
+            return None
+
+        os.makedirs(self.cache_path, exist_ok=True)
+
+        cache_fn = self._get_fn(key)
+        tmp_fn = f"{cache_fn}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        entry = {'version': self.version,
+                 'created': time.time(),
+                 'results': results}
+
+        try:
+            with gzip.open(tmp_fn, 'wt', encoding='utf-8') as out_f:
+                json.dump(entry, out_f)
+            os.replace(tmp_fn, cache_fn)
+        except (OSError, TypeError, ValueError):
+            self.logger.warning(f"Could not write cache file '{cache_fn}'.")
+            if os.path.exists(tmp_fn):
+                os.remove(tmp_fn)
+            return None
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes expired searches and, if the cache is larger than its
+            maximum size, the least recently used searches.
+        """
+
+        if not os.path.exists(self.cache_path):
+            return None
+
+        now = time.time()
+        entries = []
+        total = 0
+        for fn in os.listdir(self.cache_path):
+            if not fn.endswith('.json.gz'):
+                continue
+            cache_fn = os.path.join(self.cache_path, fn)
+            try:
+                stat = os.stat(cache_fn)
+            except OSError:
+                continue
+
+            if now - stat.st_mtime > self.ttl * 3600:
+                self._remove(cache_fn)
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, cache_fn))
+            total += stat.st_size
+
+        max_bytes = self.max_size * 1024 * 1024
+        for mtime, size, cache_fn in sorted(entries):
+            if total <= max_bytes:
+                break
+            self._remove(cache_fn)
+            total -= size
+
+    def _remove(self, cache_fn):
+        """
+        Deletes a cache file.
+
+        :param cache_fn: The path of the cache file.
+        :type  cache_fn: str
+        """
+
+        try:
+            os.remove(cache_fn)
+        except OSError:
+            pass
+
+
+class CatalogCache:
+    """
+    Stores the collection information and the field mapping of each
+        collection on disk so a session does not have to request them from
+        the RAPI every time it starts.
+    """
+
+    version = 1
+
+    def __init__(self, cache_fn=None, ttl=24.0):
+        """
+        Initializer for the CatalogCache.
+
+        :param cache_fn: The path of the cache file; if None, the file is
+                stored in the '.eodms' folder of the home folder.
+        :type  cache_fn: str
+        :param ttl: The number of hours before the catalog is refreshed
+                (0 disables the cache).
+        :type  ttl: float
+        """
+
+        self.cache_fn = cache_fn
+        if self.cache_fn is None:
+            self.cache_fn = os.path.join(os.path.expanduser('~'), '.eodms',
+                                         'cache', 'catalog.json.gz')
+
+        self.ttl = float(ttl)
+
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger('eodms')
+
+    def enabled(self):
+        """
+        Checks if the cache is enabled.
+
+        :return: True if the TTL is above 0.
+        :rtype: boolean
+        """
+
+        return self.ttl > 0
+
+    def make_owner(self, username, root_url, rapi_version):
+        """
+        Creates the value identifying who the catalog belongs to, since the
+            collections available depend on the account and the RAPI.
+
+        :param username: The EODMS username.
+        :type  username: str
+        :param root_url: The root URL of the RAPI.
+        :type  root_url: str
+        :param rapi_version: The version of the py-eodms-rapi package.
+        :type  rapi_version: str
+
+        :return: The SHA-256 hex digest of the values.
+        :rtype: str
+        """
+
+        owner_str = f"{username}|{root_url}|{rapi_version}"
+
+        return hashlib.sha256(owner_str.encode('utf-8')).hexdigest()
+
+    def load(self, owner):
+        """
+        Loads the catalog from the cache file.
+
+        :param owner: The owner value (see make_owner).
+        :type  owner: str
+
+        :return: The catalog dictionary with keys 'created', 'collections'
+                and 'fields' or None if there is no valid cache.
+        :rtype: dict
+        """
+
+        if not self.enabled() or not os.path.exists(self.cache_fn):
+            return None
+
+        try:
+            with gzip.open(self.cache_fn, 'rt', encoding='utf-8') as in_f:
+                catalog = json.load(in_f)
+        except (OSError, ValueError):
+            self.logger.warning(f"Could not read cache file "
+                                f"'{self.cache_fn}'.")
+            return None
+
+        if catalog.get('version') != self.version or \
+                catalog.get('owner') != owner:
+            return None
+
+        return catalog
+
+    def is_stale(self, catalog):
+        """
+        Checks if a catalog is older than the TTL.
+
+        :param catalog: The catalog dictionary.
+        :type  catalog: dict
+
+        :return: True if the catalog should be refreshed.
+        :rtype: boolean
+        """
+
+        return time.time() - catalog.get('created', 0) > self.ttl * 3600
+
+    def save(self, owner, collections, fields, created=None):
+        """
+        Saves the catalog to the cache file.
+
+        :param owner: The owner value (see make_owner).
+        :type  owner: str
+        :param collections: The collection information of the EODMSRAPI.
+        :type  collections: dict
+        :param fields: The search fields of each collection.
+        :type  fields: dict
+        :param created: The time the catalog was retrieved from the RAPI;
+                if None, the current time is used.
+        :type  created: float
+        """
+
+        if not self.enabled():
+            return None
+
+        if created is None:
+            created = time.time()
+
+        catalog = {'version': self.version,
+                   'owner': owner,
+                   'created': created,
+                   'collections': collections,
+                   'fields': fields}
+
+        tmp_fn = f"{self.cache_fn}.{os.getpid()}." \
+                 f"{threading.get_ident()}.tmp"
+
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.cache_fn), exist_ok=True)
+                with gzip.open(tmp_fn, 'wt', encoding='utf-8') as out_f:
+                    json.dump(catalog, out_f)
+                os.replace(tmp_fn, self.cache_fn)
+            except (OSError, TypeError, ValueError):
+                self.logger.warning(f"Could not write cache file "
+                                    f"'{self.cache_fn}'.")
+                if os.path.exists(tmp_fn):
+                    os.remove(tmp_fn)
@@ -0,0 +1,184 @@
+##############################################################################
+# MIT License
+# 
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a 
+# copy of this software and associated documentation files (the "Software"), 
+# to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, 
+# and/or sell copies of the Software, and to permit persons to whom the 
+# Software is furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+# 
+##############################################################################
+
+
+class CollectionResolver:
+    """
+    Resolves collection names entered by the user or found in CSV files
+        (Collection IDs, titles, aliases and satellite names) to Collection
+        IDs. The lookup tables are built once per session from the list of
+        collections of the RAPI.
+    """
+
+    # Satellite names which are matched when they contain the given text
+    sat_substrings = [('terrasar', ['TerraSarX']),
+                      ('spot', ['SPOT']),
+                      ('alos-2', ['ALOS-2'])]
+
+    def __init__(self, collections, sat_mapping):
+        """
+        Initializer for the CollectionResolver.
+
+        :param collections: The collections of the RAPI
+                ({<coll_id>: {'title': <title>, 'aliases': [<alias>]}}).
+        :type  collections: dict
+        :param sat_mapping: A dictionary of satellite names and their
+                Collection IDs.
+        :type  sat_mapping: dict
+        """
+
+        self.titles = {}
+        self.aliases = {}
+
+        # A list of the IDs and titles in the order given by the RAPI, used
+        #   for partial matches
+        self.coll_lst = []
+
+        for coll_id, coll in collections.items():
+            title = coll.get('title', '')
+            self.coll_lst.append((coll_id, title))
+            self.titles.setdefault(title, coll_id)
+            for alias in coll.get('aliases', []):
+                self.aliases.setdefault(alias.lower(), coll_id)
+
+        self.coll_ids = set(collections.keys())
+
+        self.sat_colls = {}
+        for sat, coll_ids in sat_mapping.items():
+            self.sat_colls[sat.lower()] = coll_ids
+            avail_ids = [c for c in coll_ids if c in self.coll_ids]
+            if len(avail_ids) > 0:
+                self.aliases.setdefault(sat.lower(), avail_ids[0])
+
+        # Stores the results of the partial matches
+        self._id_matches = {}
+        self._title_matches = {}
+
+    def _match_partial(self, in_str):
+        """
+        Gets the first collection whose ID or title contains a string.
+
+        :param in_str: The partial Collection ID or title.
+        :type  in_str: str
+
+        :return: The Collection ID or None if there are no matches.
+        :rtype: str
+        """
+
+        if in_str in self._id_matches:
+            return self._id_matches[in_str]
+
+        match = None
+        for coll_id, title in self.coll_lst:
+            if coll_id.find(in_str) > -1 or title.find(in_str) > -1:
+                match = coll_id
+                break
+
+        self._id_matches[in_str] = match
+
+        return match
+
+    def get_collid(self, coll):
+        """
+        Gets the full Collection ID of a Collection ID, alias, title or
+            part of a Collection ID or title.
+
+        :param coll: The collection to resolve.
+        :type  coll: str
+
+        :return: The full Collection ID or None if the collection could not
+                be determined.
+        :rtype: str
+        """
+
+        if coll is None:
+            return None
+
+        if coll in self.coll_ids:
+            return coll
+
+        if coll.lower() in self.aliases:
+            return self.aliases[coll.lower()]
+
+        if coll in self.titles:
+            return self.titles[coll]
+
+        return self._match_partial(coll)
+
+    def get_collid_by_title(self, in_title):
+        """
+        Gets the Collection ID of the first collection whose title contains
+            a string; if there are none, the string is resolved with
+            get_collid.
+
+        :param in_title: The title/name of the collection.
+        :type  in_title: str
+
+        :return: The full Collection ID or None if the collection could not
+                be determined.
+        :rtype: str
+        """
+
+        if in_title is None:
+            return None
+
+        if in_title in self.titles:
+            return self.titles[in_title]
+
+        if in_title not in self._title_matches:
+            match = None
+            for coll_id, title in self.coll_lst:
+                if title.find(in_title) > -1:
+                    match = coll_id
+                    break
+            self._title_matches[in_title] = match
+
+        match = self._title_matches[in_title]
+        if match is None:
+            return self.get_collid(in_title)
+
+        return match
+
+    def get_sat_collections(self, sat):
+        """
+        Gets the Collection IDs of a satellite name from a CSV file.
+
+        :param sat: The satellite name.
+        :type  sat: str
+
+        :return: A list of Collection IDs or None if the satellite is not
+                supported.
+        :rtype: list
+        """
+
+        sat = sat.lower()
+
+        if sat in self.sat_colls:
+            return self.sat_colls[sat]
+
+        for sub_str, coll_ids in self.sat_substrings:
+            if sat.find(sub_str) > -1:
+                return coll_ids
@@ -50,7 +50,16 @@ class ConfigUtils:
                                  "# The minimum date the download files will "
                                  "be kept; all files prior to this date will "
                                  "be deleted (format = yyyy-mm-dd)": None,
-                                 "keep_downloads": ''},
+                                 "keep_downloads": '',
+                                 "# Compression of the results csv files, "
+                                 "either gzip or zstd (zstd requires the "
+                                 "zstandard package); if blank, the files "
+                                 "are not compressed": None,
+                                 "results_compression": '',
+                                 "# If True, the results are also saved in "
+                                 "a Parquet file beside the results csv file "
+                                 "(requires the pyarrow package)": None,
+                                 "results_parquet": 'False'},
                             "Credentials":
                                 {"# Username of the eodms account used to "
                                  "access the rapi": None,
@@ -79,7 +88,33 @@ class ConfigUtils:
                                  "# Maximum number of attempts to download "
                                  "images while waiting for orders to become "
                                  "AVAILABLE_FOR_DOWNLOAD": None,
-                                 "download_attempts": ""
+                                 "download_attempts": "",
+                                 "# Number of searches sent to the rapi at "
+                                 "the same time when querying more than one "
+                                 "collection (1 to search one collection at "
+                                 "a time)": None,
+                                 "search_workers": "4",
+                                 "# Number of sub-windows the date range of "
+                                 "a search is split into; a sub-window which "
+                                 "returns max_results images is split again "
+                                 "(1 to send the date range as one "
+                                 "search)": None,
+                                 "date_shards": "1"
+                                 },
+                            "Cache":
+                                {"# Number of hours the results of a search "
+                                 "are kept in the cache under the .eodms "
+                                 "folder (0 to disable the cache)": None,
+                                 "query_ttl": "24",
+                                 "# Maximum size of the search results cache "
+                                 "in MB; the least recently used searches "
+                                 "are removed first": None,
+                                 "query_max_size": "100",
+                                 "# Number of hours the list of collections "
+                                 "and their fields are kept in the cache "
+                                 "before being refreshed in the background "
+                                 "(0 to disable the cache)": None,
+                                 "catalog_ttl": "24"
                                  }
                             }
 
@@ -434,6 +469,8 @@ Options:
 
         self._set_dict('Script', 'Script', 'keep_results')
         self._set_dict('Script', 'Script', 'keep_downloads')
+        self._set_dict('Script', 'Script', 'results_compression')
+        self._set_dict('Script', 'Script', 'results_parquet')
 
         cr = ['Credentials', 'RAPI']  # For backwards compatibility
         self._set_dict('Credentials', cr, 'username')
@@ -446,6 +483,12 @@ Options:
         self._set_dict('RAPI', sr, 'timeout_order')
         self._set_dict('RAPI', 'RAPI', 'order_check_date')
         self._set_dict('RAPI', 'RAPI', 'download_attempts')
+        self._set_dict('RAPI', 'RAPI', 'search_workers')
+        self._set_dict('RAPI', 'RAPI', 'date_shards')
+
+        self._set_dict('Cache', 'Cache', 'query_ttl')
+        self._set_dict('Cache', 'Cache', 'query_max_size')
+        self._set_dict('Cache', 'Cache', 'catalog_ttl')
 
         # If any hidden parameters exist in the current config file, keep it
         if self.config_info.has_section('Debug'):
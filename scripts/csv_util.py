@@ -27,10 +27,67 @@
 import os
 import sys
 import csv
+import io
+import gzip
+import json
 import logging
 
+import numpy as np
+
+try:
+    import zstandard
+
+    ZSTD_INCLUDED = True
+except ImportError:
+    ZSTD_INCLUDED = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    PYARROW_INCLUDED = True
+except ImportError:
+    PYARROW_INCLUDED = False
+
 from scripts import image
 
+# The size of the write buffer of the results files
+BUFFER_SIZE = 1024 * 1024
+
+
+def open_text(fn, mode='r', encoding=None):
+    """
+    Opens a text file which can be compressed with gzip (.gz extension) or
+        zstd (.zst extension, requires the zstandard Python package).
+
+    :param fn: The filename.
+    :type  fn: str
+    :param mode: The mode of the file object ('r', 'a' or 'w').
+    :type  mode: str
+    :param encoding: The encoding of the file (the default encoding if
+            None).
+    :type  encoding: str
+
+    :return: The text file object.
+    :rtype: io.TextIOWrapper
+    """
+
+    if fn.endswith('.gz'):
+        stream = gzip.open(fn, f'{mode}b', compresslevel=6)
+    elif fn.endswith('.zst'):
+        stream = zstandard.open(fn, f'{mode}b')
+    else:
+        return open(fn, mode, encoding=encoding, newline='',
+                    buffering=BUFFER_SIZE)
+
+    if mode == 'r':
+        stream = io.BufferedReader(stream, BUFFER_SIZE)
+    else:
+        stream = io.BufferedWriter(stream, BUFFER_SIZE)
+
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
 
 class EODMS_CSV:
 
@@ -48,6 +105,8 @@ class EODMS_CSV:
         self.eod = eod
         self.csv_fn = csv_fn
         self.open_csv = None
+        self.writer = None
+        self.plan = None
         self.header = None
         self.rapi = self.eod.eodms_rapi
         self.coll_id = None
@@ -63,8 +122,8 @@ class EODMS_CSV:
         :type  header: list
         """
         self.header = header
-        header_str = ','.join(header)
-        self.open_csv.write(f"{header_str}\n")
+        self.plan = image.FieldPlan(header)
+        self.writer.writerow(header)
 
     def determine_collection(self, rec):
         """
@@ -124,19 +183,7 @@ class EODMS_CSV:
         :type  img: eodms.Image
         """
 
-        out_vals = []
-        for h in self.header:
-            if h in img.get_fields():
-                val = str(img.get_metadata(h))
-                if val.find(',') > -1:
-                    val_str = val.replace('"', '""')
-                    val = f'"{val_str}"'
-                out_vals.append(val)
-            else:
-                out_vals.append('')
-
-        out_str = ','.join([str(i) for i in out_vals])
-        self.open_csv.write(f'{out_str}\n')
+        self.writer.writerow(self.plan.get_strings(img))
 
     def export_results(self, results):
         """
@@ -158,34 +205,105 @@ class EODMS_CSV:
 
         # Export the results to the file
         if isinstance(results, image.ImageList):
-            for img in results.get_images():
-                self.export_record(img)
+            records = results.get_images()
         elif isinstance(results, image.OrderList):
-            for oi in results.get_order_items():
-                self.export_record(oi)
+            records = results.get_order_items()
+        else:
+            records = []
+
+        self.writer.writerows(self.plan.get_strings(r) for r in records)
 
         # Close the CSV
         self.close()
 
-    def get_lines(self, in_f):
+    def get_parquet_fn(self):
         """
-        Reads a line from a file and checks for any errors.
-        
-        :param in_f: The input file to read from.
-        :type  in_f: file object
+        Gets the filename of the Parquet results file kept beside the
+            results CSV file.
+
+        :return: The Parquet filename.
+        :rtype: str
         """
 
-        # Check if the input file is bytes
-        try:
-            in_lines = in_f.readlines()
+        fn = self.csv_fn
+        for ext in ['.gz', '.zst', '.csv']:
+            if fn.endswith(ext):
+                fn = fn[:-len(ext)]
 
-            return in_lines
-        except Exception:
-            err_msg = "The input file cannot be read."
-            self.eod.print_support(True, err_msg)
-            logger = logging.getLogger('eodms')
-            logger.error(err_msg)
-            sys.exit(1)
+        return f"{fn}.parquet"
+
+    def export_parquet(self, results, row_group_size=50000):
+        """
+        Exports the images to a Parquet file with the same fields as the
+            results CSV file. Numbers and dates are stored with their type
+            when it does not change their values and the geometry is
+            stored as GeoJSON (which Image.get_coords reads when needed).
+
+        :param results: The images to export.
+        :type  results: ImageList
+        :param row_group_size: The number of images per row group.
+        :type  row_group_size: int
+        """
+
+        if not PYARROW_INCLUDED:
+            return None
+
+        geo_util = self.eod.eodms_geo
+        columns = results.get_columns()
+
+        header = self.eod.sort_fields(results.get_fields())
+        fields = [f for f in header if not f == 'geometry']
+        arrow_fields = geo_util.get_arrow_fields(columns, fields,
+                                                 lossless=True)
+
+        if 'geometry' in header:
+            # The geometry is a dictionary from the RAPI or a string from
+            #   a results file, write it back as GeoJSON in both cases
+            geoms = np.array([None if c is None else json.dumps(
+                {'type': 'Polygon', 'coordinates': c})
+                for c in (img.get_coords() for img in columns.images)],
+                dtype=object)
+            arrow_fields.insert(header.index('geometry'),
+                                ('geometry', pa.string(), geoms))
+
+        schema = pa.schema([(f, f_type) for f, f_type, col in arrow_fields])
+
+        with pq.ParquetWriter(self.get_parquet_fn(), schema) as writer:
+            for start in range(0, len(columns), row_group_size):
+                end = min(start + row_group_size, len(columns))
+                arrays = geo_util.get_arrow_arrays(arrow_fields, start, end)
+                writer.write_table(pa.Table.from_arrays(arrays,
+                                                        schema=schema),
+                                   row_group_size=row_group_size)
+
+    def import_parquet(self):
+        """
+        Imports the columns from the Parquet results file.
+
+        :return: A dictionary with the values of each field (see
+                image.ImageList.ingest_columns). The values are strings, with
+                empty strings for the empty values, as in the results CSV
+                file.
+        :rtype: dict
+        """
+
+        table = pq.read_table(self.get_parquet_fn())
+        self.header = table.column_names
+
+        columns = {}
+        for f in self.header:
+            col = table.column(f)
+            if pa.types.is_timestamp(col.type):
+                col = pc.strftime(col.cast(pa.timestamp('s')),
+                                  format='%Y-%m-%d %H:%M:%S')
+            vals = col.to_pylist()
+
+            # The numbers are only stored as numbers when they convert back
+            #   to the same strings
+            columns[f] = ['' if v is None else v if isinstance(v, str)
+                          else str(v) for v in vals]
+
+        return columns
 
     def import_eodms_csv(self):
 
@@ -196,57 +314,51 @@ class EODMS_CSV:
         :rtype: list
         """
 
+        try:
+            return list(self.iter_eodms_csv())
+        except ValueError as err:
+            err_msg = str(err)
+            self.eod.print_support(True, err_msg)
+            self.logger.error(err_msg)
+            sys.exit(1)
+
+    def iter_eodms_csv(self):
+        """
+        Reads the rows from the EODMS CSV file one at a time. Quoted values
+            (such as the footprints) may contain commas.
+
+        :return: A generator of records extracted from the CSV file, with
+                lower-case column names.
+        :rtype: generator
+
+        :raises ValueError: If the input file cannot be read.
+        """
+
         # Open the input file
-        in_f = open(self.csv_fn, 'r')
-        in_lines = self.get_lines(in_f)
-
-        # Get the header from the first row
-        in_header = in_lines[0].lower().replace('\n', '').split(',')
-
-        # Check for columns in input file
-  #       if 'sequence id' not in in_header and \
-  #               'order key' not in in_header and \
-  #               'downlink segment id' not in in_header and \
-  #               'image id' not in in_header and \
-  #               'record id' not in in_header and \
-  #               'recordid' not in in_header and \
-  #               'image info' not in in_header and \
-  #               'photo number' not in in_header and \
-  #               'roll number' not in in_header:
-  #           err_msg = '''The input file does not contain the proper columns.
-  # The input file must contain one of the following columns:
-  #   Record ID
-  #   recordId
-  #   Sequence ID
-  #   Image ID
-  #   Order Key
-  #   Image Info
-  #   A combination of Downlink Segment ID and Order Key
-  #   A combination of Photo Number and Roll Number'''
-  #           self.eod.print_support(True, err_msg)
-  #           sys.exit(1)
-
-        # Populate the list of records from the input file
-        records = []
-        for lne in in_lines[1:]:
-            rec = {}
-            l_split = lne.replace('\n', '').split(',')
-
-            if len(l_split) < len(in_header):
-                continue
+        with open(self.csv_fn, 'r', newline='') as in_f:
+            reader = csv.reader(in_f)
 
-            for idx, h in enumerate(in_header):
-                prev_val = rec.get(h.lower())
-                if prev_val is None or prev_val == '':
-                    rec[h.lower()] = l_split[idx]
+            try:
+                # Get the header from the first row
+                in_header = [h.lower() for h in next(reader, [])]
 
-            # Add the record to the list of records
-            records.append(rec)
+                # Populate the records from the input file
+                for row in reader:
+                    if len(row) < len(in_header):
+                        continue
 
-        # Close the input file
-        in_f.close()
+                    rec = {}
+                    for idx, h in enumerate(in_header):
+                        prev_val = rec.get(h)
+                        if prev_val is None or prev_val == '':
+                            rec[h] = row[idx]
 
-        return records
+                    yield rec
+
+            except (csv.Error, UnicodeDecodeError) as err:
+                # The caller reports the error, so that the file is closed
+                #   before the process exits
+                raise ValueError("The input file cannot be read.") from err
 
     def import_res_csv(self, in_fn):
         """
@@ -297,18 +409,19 @@ class EODMS_CSV:
         :rtype: list
         """
 
-        reader = csv.reader(open(self.csv_fn, 'r', encoding="ISO-8859-1"))
-        records = []
-        for idx, row in enumerate(reader):
-            if idx == 0:
-                self.header = row
-                if header_only:
-                    return self.header
-            else:
-                rec = {}
-                for i, c in enumerate(row):
-                    rec[self.header[i]] = c
-                records.append(rec)
+        with open_text(self.csv_fn, 'r', encoding="ISO-8859-1") as in_f:
+            reader = csv.reader(in_f)
+            records = []
+            for idx, row in enumerate(reader):
+                if idx == 0:
+                    self.header = row
+                    if header_only:
+                        return self.header
+                else:
+                    rec = {}
+                    for i, c in enumerate(row):
+                        rec[self.header[i]] = c
+                    records.append(rec)
 
         return records
 
@@ -319,14 +432,17 @@ class EODMS_CSV:
         if self.open_csv is not None:
             self.open_csv.close()
             self.open_csv = None
+            self.writer = None
 
     def open(self, mode='w'):
         """
-        Opens a CSV file.
+        Opens a CSV file, compressed if the filename ends with '.gz' or
+            '.zst'.
         
         :param mode: The mode of the file object ('r' for read, 'a' to append
                 and 'w' to write).
         :type  mode: str
         """
 
-        self.open_csv = open(self.csv_fn, mode)
+        self.open_csv = open_text(self.csv_fn, mode)
+        self.writer = csv.writer(self.open_csv, lineterminator='\n')
@@ -1,4 +1,8 @@
 import re
+import time
+import threading
+
+import eodms_rapi
 
 class Field:
     """
@@ -159,91 +163,345 @@ class EodFieldMapper:
         self.mapping = {}
         self.rapi = rapi
         self.eod = eod
+
+        # The Collection ID of each name accepted by get_fields
+        self.coll_keys = {}
+        # The search fields of each collection as returned by the RAPI
+        self.search_fields = {}
+
+        self._owner = None
+        self._created = None
+
+        # The background refresh of the catalog cache and the catalog it
+        #   saved (the lock keeps the saves of both threads in order)
+        self._refresh_thread = None
+        self._refreshed = None
+        self._catalog_lock = threading.Lock()
+
         self.map_fields()
 
+    def _get_cache_owner(self):
+        """
+        Gets the value identifying the account and RAPI the catalog cache
+            belongs to.
+
+        :return: The owner value of the catalog cache.
+        :rtype: str
+        """
+
+        rapi_version = getattr(eodms_rapi, '__version__', '')
+
+        return self.eod.catalog_cache.make_owner(self.eod.username,
+                                                 self.rapi.rapi_root,
+                                                 rapi_version)
+
+    def _refresh_catalog(self, coll_ids):
+        """
+        Gets the collections and the fields of a set of collections from the
+            RAPI with a separate session and saves them to the catalog cache.
+
+        :param coll_ids: The Collection IDs of the fields to refresh.
+        :type  coll_ids: list
+        """
+
+        try:
+            rapi = self.eod.create_rapi_session()
+            rapi.rapi_collections = {}
+
+            collections = rapi.get_collections(True)
+
+            if rapi.err_occurred or not isinstance(collections, list):
+                self.eod.logger.warning("Could not refresh the collection "
+                                        "information in the cache.")
+                return None
+
+            # The collection information already contains the fields
+            search_fields = {}
+            for coll_id in coll_ids:
+                fields = self._get_ui_fields(rapi, coll_id)
+                if fields is None:
+                    continue
+                search_fields[coll_id] = fields
+
+            with self._catalog_lock:
+                # Keep the fields this session requested for other
+                #   collections since the refresh started
+                for coll_id, fields in dict(self.search_fields).items():
+                    if coll_id in rapi.rapi_collections:
+                        search_fields.setdefault(coll_id, fields)
+
+                self._refreshed = (rapi.rapi_collections, search_fields,
+                                   time.time())
+                self.eod.catalog_cache.save(self._owner, *self._refreshed)
+        except Exception as err:
+            self.eod.logger.warning(f"Could not refresh the collection "
+                                    f"information in the cache: {err}")
+
+    def _save_catalog(self):
+        """
+        Saves the collections and the search fields loaded so far to the
+            catalog cache. If the cache has been refreshed in the
+            background, the new fields are added to the refreshed catalog
+            instead of replacing it.
+        """
+
+        if self.rapi.err_occurred:
+            return None
+
+        with self._catalog_lock:
+            if self._refreshed is None:
+                self.eod.catalog_cache.save(self._owner,
+                                            self.rapi.rapi_collections,
+                                            self.search_fields,
+                                            self._created)
+                return None
+
+            collections, search_fields, created = self._refreshed
+            for coll_id, fields in self.search_fields.items():
+                if coll_id in collections:
+                    search_fields.setdefault(coll_id, fields)
+
+            self.eod.catalog_cache.save(self._owner, collections,
+                                        search_fields, created)
+
     def map_fields(self):
         """
-        Creates the field mapping for the script.
-        """
-
-        collections = self.rapi.get_collections(True)
-
-        self.eod.check_error(collections)
-
-        for coll_id in collections:
-            fields = self.rapi.get_available_fields(coll_id, ui_fields=True)
-            fields = fields['search']
-
-            coll_fields = CollFields(coll_id)
-            for key, vals in fields.items():
-                rapi_id = vals['id']
-                rapi_title = key
-                ui_label = rapi_title
-
-                if rapi_id.find('ORBIT_ABS') > -1:
-                    if coll_id == 'COSMO-SkyMed1':
-                        ui_label = 'Orbit Direction'
-                    else:
-                        ui_label = 'Orbit'
-                elif rapi_id.find('Look Direction') > -1:
-                    if coll_id == 'ALOS-2':
-                        ui_label = 'Orbit Direction'
-                elif rapi_id.find('ARCHIVE_FACILITY') > -1:
-                    ui_label = 'Archive Facility'
-                elif rapi_id.find('BEAM_MNEMONIC') > -1:
-                    ui_label = 'Beam Mnemonic'
-                elif rapi_id.find('SBEAM') > -1:
-                    if coll_id == 'NAPL':
-                        ui_label = 'Colour'
-                    elif coll_id == 'Radarsat1' \
-                            or coll_id == 'Radarsat1RawProducts' \
-                            or coll_id == 'Radarsat2' \
-                            or coll_id == 'Radarsat2RawProducts' \
-                            or coll_id == 'RCMScienceData':
-                        ui_label = 'Beam Mode'
-                    elif coll_id == 'RCMImageProducts':
-                        ui_label = 'Beam Mode Type'
-                    else:
-                        ui_label = 'Sensor Mode'
-                elif rapi_id.find('CLOUD_PERCENT') > -1:
-                    ui_label = 'Maximum Cloud Cover'
-                elif rapi_id.find('IMAGE_ID') > -1:
-                    ui_label = 'Image Identification'
-                elif rapi_id.find('INCIDENCE_ANGLE') > -1:
-                    ui_label = 'Incidence Angle (Decimal Degrees)'
-                elif rapi_id.find('SENS_INC') > -1:
-                    ui_label = 'Incidence Angle (Decimal Degrees)'
-                elif rapi_id.find('SPATIAL_RESOLUTION') > -1:
-                    ui_label = 'Pixel Spacing (Metres)'
-                elif rapi_id.find('RECEPTION_FACILITY') > -1:
-                    ui_label = 'Reception Facility'
-                elif rapi_id.find('CEOID') > -1:
-                    ui_label = 'Value-added Satellite Product Options'
-
-                if ui_label.find('(High)') > -1 or ui_label.find('(Low)') > -1:
-                    eod_name = ui_label.replace('(', '').replace(')', '')
+        Creates the list of collections for the script. The fields of a
+            collection are only mapped when they are first needed (see
+            get_fields).
+
+        The collections are taken from the catalog cache when possible. If
+            the cache is older than its TTL, it is still used and refreshed
+            in the background for the next session.
+        """
+
+        cache = self.eod.catalog_cache
+        self._owner = self._get_cache_owner()
+
+        catalog = cache.load(self._owner)
+
+        if catalog is not None:
+            self.rapi.rapi_collections = catalog['collections']
+            self.search_fields = catalog['fields']
+            self._created = catalog['created']
+
+            if cache.is_stale(catalog):
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_catalog,
+                    args=(list(self.search_fields),), daemon=True)
+                self._refresh_thread.start()
+        else:
+            self._created = time.time()
+
+            collections = self.rapi.get_collections(True)
+
+            self.eod.check_error(collections)
+
+            self._save_catalog()
+
+        for coll_id in self.rapi.rapi_collections.keys():
+            if coll_id == 'Radarsat1':
+                keys = ['Radarsat1', 'R1', 'RS1']
+            elif coll_id == 'Radarsat2':
+                keys = ['Radarsat2', 'R2', 'RS2']
+            elif coll_id == 'RCMImageProducts':
+                keys = ['RCMImageProducts', 'RCM']
+            else:
+                keys = [coll_id]
+
+            for key in keys:
+                self.coll_keys[key] = coll_id
+
+    def _get_ui_fields(self, rapi, coll_id):
+        """
+        Gets the search fields of a collection used by the EODMS UI from the
+            collection information retrieved by get_collections, without
+            sending a request to the RAPI.
+
+        :param rapi: The EODMSRAPI instance.
+        :type  rapi: eodms_rapi.EODMSRAPI
+        :param coll_id: The Collection ID.
+        :type  coll_id: str
+
+        :return: The search fields of the collection or None if the
+                collection information does not contain its fields.
+        :rtype: dict
+        """
+
+        coll_info = rapi.rapi_collections.get(coll_id)
+        if not isinstance(coll_info, dict):
+            return None
+
+        fields = coll_info.get('fields')
+        if not isinstance(fields, dict) or \
+                not isinstance(fields.get('search'), dict):
+            return None
+
+        ui_fields = rapi.ui_field_map.get(coll_id)
+
+        return {title: vals for title, vals in fields['search'].items()
+                if ui_fields is None or vals.get('id') in ui_fields}
+
+    def _fetch_fields(self, coll_id):
+        """
+        Gets the search fields of a collection, from the collection
+            information if it contains them, otherwise from the RAPI.
+
+        :param coll_id: The Collection ID.
+        :type  coll_id: str
+
+        :return: The search fields of the collection or None if they could
+                not be retrieved.
+        :rtype: dict
+        """
+
+        rapi = self.eod.get_thread_rapi()
+
+        fields = self._get_ui_fields(rapi, coll_id)
+        if fields is not None:
+            return fields
+
+        fields = rapi.get_available_fields(coll_id, ui_fields=True)
+
+        if fields is None:
+            return None
+
+        return fields['search']
+
+    def _add_fields(self, coll_id, fields):
+        """
+        Maps the search fields of a collection and adds them under each name
+            of the collection.
+
+        :param coll_id: The Collection ID.
+        :type  coll_id: str
+        :param fields: The search fields of the collection.
+        :type  fields: dict
+
+        :return: The mapping of fields for the collection.
+        :rtype: CollFields
+        """
+
+        cur_fields = self._build_fields(coll_id, fields)
+
+        for key, key_coll in self.coll_keys.items():
+            if key_coll == coll_id:
+                self.mapping[key] = cur_fields
+
+        return cur_fields
+
+    def prefetch(self, coll_ids):
+        """
+        Maps the fields of several collections, sending the requests for
+            the collections whose fields are neither in the cache nor in the
+            collection information at the same time.
+
+        :param coll_ids: A list of Collection IDs (or their aliases).
+        :type  coll_ids: list
+        """
+
+        coll_ids = [self.coll_keys.get(c) for c in coll_ids]
+        coll_ids = [c for c in dict.fromkeys(coll_ids)
+                    if c is not None and c not in self.mapping]
+
+        fetch_ids = [c for c in coll_ids if c not in self.search_fields]
+
+        if fetch_ids:
+            for coll_id in fetch_ids:
+                fields = self._get_ui_fields(self.rapi, coll_id)
+                if fields is not None:
+                    self.search_fields[coll_id] = fields
+
+            # Only the fields missing from the collection information are
+            #   requested from the RAPI
+            req_ids = [c for c in fetch_ids if c not in self.search_fields]
+            if req_ids:
+                res = self.eod.run_concurrent(self._fetch_fields, req_ids)
+                for coll_id, fields in zip(req_ids, res):
+                    if fields is not None:
+                        self.search_fields[coll_id] = fields
+
+            self._save_catalog()
+
+        for coll_id in coll_ids:
+            if coll_id in self.search_fields:
+                self._add_fields(coll_id, self.search_fields[coll_id])
+
+    def _build_fields(self, coll_id, fields):
+        """
+        Creates the field mapping of a collection from its search fields.
+
+        :param coll_id: The Collection ID.
+        :type  coll_id: str
+        :param fields: The search fields of the collection as returned by
+                the RAPI.
+        :type  fields: dict
+
+        :return: The mapping of fields for the collection.
+        :rtype: CollFields
+        """
+
+        cur_fields = CollFields(coll_id)
+        for key, vals in fields.items():
+            rapi_id = vals['id']
+            rapi_title = key
+            ui_label = rapi_title
+
+            if rapi_id.find('ORBIT_ABS') > -1:
+                if coll_id == 'COSMO-SkyMed1':
+                    ui_label = 'Orbit Direction'
                 else:
-                    eod_name = re.sub("[(\[].*?[)\]]", "", ui_label)
-                eod_name = eod_name.strip().upper().replace(' ', '_')
-
-                coll_fields.add_field(eod_name=eod_name, rapi_id=rapi_id,
-                                      rapi_title=rapi_title, ui_label=ui_label)
-
-                if coll_id == 'Radarsat1':
-                    for key in ['Radarsat1', 'R1', 'RS1']:
-                        self.mapping[key] = coll_fields
-                elif coll_id == 'Radarsat2':
-                    for key in ['Radarsat2', 'R2', 'RS2']:
-                        self.mapping[key] = coll_fields
+                    ui_label = 'Orbit'
+            elif rapi_id.find('Look Direction') > -1:
+                if coll_id == 'ALOS-2':
+                    ui_label = 'Orbit Direction'
+            elif rapi_id.find('ARCHIVE_FACILITY') > -1:
+                ui_label = 'Archive Facility'
+            elif rapi_id.find('BEAM_MNEMONIC') > -1:
+                ui_label = 'Beam Mnemonic'
+            elif rapi_id.find('SBEAM') > -1:
+                if coll_id == 'NAPL':
+                    ui_label = 'Colour'
+                elif coll_id == 'Radarsat1' \
+                        or coll_id == 'Radarsat1RawProducts' \
+                        or coll_id == 'Radarsat2' \
+                        or coll_id == 'Radarsat2RawProducts' \
+                        or coll_id == 'RCMScienceData':
+                    ui_label = 'Beam Mode'
                 elif coll_id == 'RCMImageProducts':
-                    for key in ['RCMImageProducts', 'RCM']:
-                        self.mapping[key] = coll_fields
+                    ui_label = 'Beam Mode Type'
                 else:
-                    self.mapping[coll_id] = coll_fields
+                    ui_label = 'Sensor Mode'
+            elif rapi_id.find('CLOUD_PERCENT') > -1:
+                ui_label = 'Maximum Cloud Cover'
+            elif rapi_id.find('IMAGE_ID') > -1:
+                ui_label = 'Image Identification'
+            elif rapi_id.find('INCIDENCE_ANGLE') > -1:
+                ui_label = 'Incidence Angle (Decimal Degrees)'
+            elif rapi_id.find('SENS_INC') > -1:
+                ui_label = 'Incidence Angle (Decimal Degrees)'
+            elif rapi_id.find('SPATIAL_RESOLUTION') > -1:
+                ui_label = 'Pixel Spacing (Metres)'
+            elif rapi_id.find('RECEPTION_FACILITY') > -1:
+                ui_label = 'Reception Facility'
+            elif rapi_id.find('CEOID') > -1:
+                ui_label = 'Value-added Satellite Product Options'
+
+            if ui_label.find('(High)') > -1 or ui_label.find('(Low)') > -1:
+                eod_name = ui_label.replace('(', '').replace(')', '')
+            else:
+                eod_name = re.sub("[(\[].*?[)\]]", "", ui_label)
+            eod_name = eod_name.strip().upper().replace(' ', '_')
+
+            cur_fields.add_field(eod_name=eod_name, rapi_id=rapi_id,
+                                 rapi_title=rapi_title, ui_label=ui_label)
+
+        return cur_fields
 
     def get_fields(self, coll_id):
         """
-        Gets a set of fields based on a Collection ID.
+        Gets a set of fields based on a Collection ID. The fields of the
+            collection are mapped the first time they are requested.
 
         :param coll_id: The Collection ID.
         :type  coll_id: str
@@ -252,7 +510,22 @@ class EodFieldMapper:
         :rtype: list
         """
 
-        return self.mapping[coll_id]
+        if coll_id in self.mapping:
+            return self.mapping[coll_id]
+
+        full_id = self.coll_keys[coll_id]
+
+        if full_id not in self.search_fields:
+            fields = self._fetch_fields(full_id)
+            if fields is None:
+                # Do not keep the empty mapping so the fields are
+                #   requested again next time
+                return CollFields(full_id)
+
+            self.search_fields[full_id] = fields
+            self._save_catalog()
+
+        return self._add_fields(full_id, self.search_fields[full_id])
 
     def get_colls(self):
         """
@@ -262,4 +535,4 @@ class EodFieldMapper:
         :rtype:  list
         """
 
-        return self.mapping.keys()
+        return self.coll_keys.keys()
@@ -27,12 +27,18 @@
 import json
 # import traceback
 import os
+import sys
+import functools
+import threading
 # import re
 
+import numpy as np
+
 # from . import csv_util
 from . import spatial
 
 
+@functools.lru_cache(maxsize=None)
 def to_camel_case(in_str):
     """
     Converts a string to camelCase.
@@ -57,19 +63,508 @@ def to_camel_case(in_str):
     return f'{first_word}{other_words}'
 
 
-class Image:
+# The Geo object used to convert the footprints of the images
+_geo_util = spatial.Geo()
+
+# Marks a metadata entry which is not set for a record
+_MISSING = object()
+# Marks a metadata entry which is computed when it is first accessed
+_PENDING = object()
+
+# The number of footprints from which filter_overlap builds a spatial index
+#   to skip the footprints outside the AOI
+INDEX_MIN_IMAGES = 1000
+
+
+class MetadataSchema:
+    """
+    The list of metadata keys shared by the records of a collection. Each
+        record only stores a row of values in the order of the keys.
+    """
+
+    __slots__ = ('keys', 'index', '_lock')
+
+    def __init__(self):
+        """
+        Initializer of the MetadataSchema class.
+        """
+        self.keys = []
+        self.index = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, key):
+        """
+        Gets the position of a key in the rows, adding the key to the schema
+            if it does not exist.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: The position of the key.
+        :rtype: int
+        """
+
+        idx = self.index.get(key)
+        if idx is not None:
+            return idx
+
+        with self._lock:
+            idx = self.index.get(key)
+            if idx is None:
+                idx = len(self.keys)
+                self.keys.append(sys.intern(key)
+                                 if isinstance(key, str) else key)
+                self.index[key] = idx
+
+        return idx
+
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def get_schema(name):
+    """
+    Gets the shared MetadataSchema with a given name (usually the Collection
+        Id), creating it if it does not exist.
+
+    :param name: The name of the schema.
+    :type  name: str
+
+    :return: The MetadataSchema.
+    :rtype: MetadataSchema
+    """
+
+    schema = _schemas.get(name)
+    if schema is None:
+        with _schemas_lock:
+            schema = _schemas.setdefault(name, MetadataSchema())
+
+    return schema
+
+
+class MetadataDict(dict):
+    """
+    The dictionary of the metadata of an Image or OrderItem. Changes made to
+        the dictionary are also made to the metadata of the record.
+    """
+
+    __slots__ = ('_item',)
+
+    def __init__(self, item, *args):
+        """
+        Initializer of the MetadataDict class.
+
+        :param item: The Image or OrderItem of the metadata.
+        :type  item: CompactMetadata
+        """
+
+        super().__init__(*args)
+        self._item = item
+
+    def __setitem__(self, key, val):
+        super().__setitem__(key, val)
+        self._item._set_value(key, val)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._item._del_value(key)
+
+    def clear(self):
+        for key in list(self.keys()):
+            del self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            val = self[key]
+            del self[key]
+            return val
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, val = super().popitem()
+        self._item._del_value(key)
+        return key, val
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, val in dict(*args, **kwargs).items():
+            self[key] = val
+
+
+class CompactMetadata:
+    """
+    Base class which stores the metadata of a record as a row of values with
+        a MetadataSchema instead of a dictionary for each record.
+    """
+
+    __slots__ = ('_schema', '_row')
+
+    def _init_metadata(self, name=None):
+        """
+        Clears the metadata.
+
+        :param name: The name of the schema to use; if None, the schema of
+                records with no collection is used.
+        :type  name: str
+        """
+
+        self._schema = get_schema(name)
+        self._row = []
+
+    def _load(self):
+        """
+        Called before the metadata is accessed so subclasses can parse
+            their metadata when it is first needed.
+        """
+
+        pass
+
+    def _compute(self, key):
+        """
+        Computes the value of a metadata entry marked as pending.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: The value of the entry.
+        :rtype: any
+        """
+
+        raise KeyError(key)
+
+    def _get_value(self, key):
+        """
+        Gets the value of a metadata entry.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: The value or _MISSING if the entry is not set.
+        :rtype: any
+        """
+
+        self._load()
+
+        idx = self._schema.index.get(key)
+        if idx is None or idx >= len(self._row):
+            return _MISSING
+
+        val = self._row[idx]
+        if val is _PENDING:
+            val = self._compute(key)
+            self._row[idx] = val
+
+        return val
+
+    def _set_value(self, key, val):
+        """
+        Sets the value of a metadata entry.
+
+        :param key: The metadata key.
+        :type  key: str
+        :param val: The value.
+        :type  val: any
+        """
+
+        self._load()
+
+        idx = self._schema.get_index(key)
+        row = self._row
+        if idx >= len(row):
+            row.extend([_MISSING] * (idx + 1 - len(row)))
+        row[idx] = val
+
+    def _del_value(self, key):
+        """
+        Removes a metadata entry.
+
+        :param key: The metadata key.
+        :type  key: str
+        """
+
+        self._load()
+
+        idx = self._schema.index.get(key)
+        if idx is not None and idx < len(self._row):
+            self._row[idx] = _MISSING
+
+    def _has_key(self, key):
+        """
+        Checks if a metadata entry is set.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: True if the entry is set.
+        :rtype: boolean
+        """
+
+        return self._get_value(key) is not _MISSING
+
+    def _lookup(self, key):
+        """
+        Gets the value of a metadata entry which must be set.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: The value of the entry.
+        :rtype: any
+        """
+
+        val = self._get_value(key)
+        if val is _MISSING:
+            raise KeyError(key)
+
+        return val
+
+    def _get_keys(self):
+        """
+        Gets the metadata keys which are set.
+
+        :return: A list of the metadata keys.
+        :rtype: list
+        """
+
+        self._load()
+
+        keys = self._schema.keys
+        return [keys[idx] for idx, val in enumerate(self._row)
+                if val is not _MISSING]
+
+    @property
+    def metadata(self):
+        """
+        The metadata as a dictionary. Changes made to the dictionary are
+            made to the metadata as well, as they were when the metadata was
+            stored in a dictionary.
+        """
+
+        self._load()
+
+        keys = self._schema.keys
+        return MetadataDict(self, ((keys[idx], self._get_value(keys[idx])
+                                    if val is _PENDING else val)
+                                   for idx, val in enumerate(self._row)
+                                   if val is not _MISSING))
+
+    @metadata.setter
+    def metadata(self, in_dict):
+        self._init_metadata(in_dict.get('collectionId'))
+        for k, v in in_dict.items():
+            self._set_value(k, v)
+
+
+def get_all_fields(items):
+    """
+    Gets the metadata keys which are set in at least one of a list of
+        Images or OrderItems, in the order of their schemas.
+
+    :param items: A list of Image or OrderItem objects.
+    :type  items: list
+
+    :return: A list of the metadata keys.
+    :rtype: list
+    """
+
+    # The positions of the keys found and not yet found for each schema,
+    #   and the number of keys in the schema when it was last checked
+    found = {}
+    missing = {}
+    sizes = {}
+    for item in items:
+        item._load()
+        schema = item._schema
+        if schema not in found:
+            found[schema] = set()
+            missing[schema] = set()
+            sizes[schema] = 0
+
+        # Parsing a record can add keys to its schema
+        not_found = missing[schema]
+        size = len(schema.keys)
+        if size > sizes[schema]:
+            not_found.update(range(sizes[schema], size))
+            sizes[schema] = size
+
+        if not not_found:
+            continue
+
+        row = item._row
+        for idx in [i for i in not_found
+                    if i < len(row) and row[i] is not _MISSING]:
+            not_found.discard(idx)
+            found[schema].add(idx)
+
+    fields = {}
+    for schema, idxs in found.items():
+        for idx in sorted(idxs):
+            fields.setdefault(schema.keys[idx], None)
+
+    return list(fields.keys())
+
+
+class FieldPlan:
+    """
+    Gets the values of a list of fields from Images or OrderItems. The
+        position of each field is only looked up once for each
+        MetadataSchema.
+    """
+
+    def __init__(self, fields):
+        """
+        Initializer of the FieldPlan class.
+
+        :param fields: The metadata fields.
+        :type  fields: list
+        """
+
+        self.fields = list(fields)
+        self.plans = {}
+
+    def _get_plan(self, schema):
+        """
+        Gets the positions of the fields in the rows of a schema.
+
+        :param schema: The MetadataSchema.
+        :type  schema: MetadataSchema
+
+        :return: The positions of the fields (None for the fields not in
+                the schema).
+        :rtype: list
+        """
+
+        plan = self.plans.get(schema)
+
+        # Keys may have been added to the schema since the plan was made
+        if plan is None or plan[0] != len(schema.keys):
+            plan = (len(schema.keys),
+                    [schema.index.get(f) for f in self.fields])
+            self.plans[schema] = plan
+
+        return plan[1]
+
+    def get_strings(self, item):
+        """
+        Gets the values of the fields of an Image or OrderItem as strings
+            (an empty string for the fields which are not set).
+
+        :param item: The Image or OrderItem.
+        :type  item: Image or OrderItem
+
+        :return: The values of the fields.
+        :rtype: list
+        """
+
+        item._load()
+        row = item._row
+        row_len = len(row)
+
+        out_vals = ['' if idx is None or idx >= row_len
+                    or row[idx] is _MISSING else row[idx]
+                    for idx in self._get_plan(item._schema)]
+
+        for pos, val in enumerate(out_vals):
+            if val.__class__ is not str:
+                if val is _PENDING:
+                    val = item._get_value(self.fields[pos])
+                out_vals[pos] = str(val)
+
+        return out_vals
+
+
+class Image(CompactMetadata):
     """
     The class to store information for an EODMS image.
     """
 
+    __slots__ = ('geometry', '_raw')
+
     def __init__(self):
         """
         Initializer of the Image class.
         """
-        self.metadata = {}
-        self.geometry = {'array': None,
-                         'geom': None,
-                         'wkt': None}
+        self._raw = None
+        self._init_metadata()
+        self.geometry = None
+
+    def _init_metadata(self, name=None):
+        """
+        Clears the metadata, including a record which has not been parsed.
+
+        :param name: The name of the schema to use.
+        :type  name: str
+        """
+
+        self._raw = None
+        super()._init_metadata(name)
+
+    def _load(self):
+        """
+        Parses the record from the RAPI kept by parse_record, if it has not
+            been parsed yet.
+        """
+
+        in_rec = self._raw
+        if in_rec is None:
+            return None
+
+        self._raw = None
+
+        for k, v in in_rec.items():
+            if k == 'metadata2':
+                continue
+            elif k == 'geometry':
+                self._set_value('geometry', v)
+                self._set_value('wkt', _PENDING)
+            elif k == 'metadata':
+                if isinstance(v, list):
+                    for m in v:
+                        key = to_camel_case(m[0])
+                        self._set_value(key, m[1])
+            else:
+                self._set_value(k, v)
+
+    def _compute(self, key):
+        """
+        Computes the WKT of the image's footprint.
+
+        :param key: The metadata key.
+        :type  key: str
+
+        :return: The value of the entry.
+        :rtype: any
+        """
+
+        if key == 'wkt':
+            coords = self.get_coords()
+            if coords is None:
+                return None
+            return _geo_util.convert_image_geom(coords, 'wkt')
+
+        raise KeyError(key)
+
+    def _get_raw(self, key):
+        """
+        Gets a top-level entry of a record which has not been parsed yet.
+
+        :param key: The key of the entry.
+        :type  key: str
+
+        :return: The value or _MISSING if the record has been parsed or
+                does not contain the key.
+        :rtype: any
+        """
+
+        if self._raw is None:
+            return _MISSING
+
+        return self._raw.get(key, _MISSING)
 
     def get_record_id(self):
         """
@@ -78,7 +573,11 @@ class Image:
         Returns:
             str or int: The Record Id of the image.
         """
-        return self.metadata['recordId']
+        rec_id = self._get_raw('recordId')
+        if rec_id is not _MISSING:
+            return rec_id
+
+        return self._lookup('recordId')
 
     def get_coll_id(self):
         """
@@ -87,8 +586,11 @@ class Image:
         :return: The Collection Id of the image.
         :rtype: str
         """
-        # print("self.metadata: %s" % self.metadata)
-        return self.metadata['collectionId']
+        coll_id = self._get_raw('collectionId')
+        if coll_id is not _MISSING:
+            return coll_id
+
+        return self._lookup('collectionId')
 
     def get_title(self):
         """
@@ -97,7 +599,7 @@ class Image:
         :return: The Title of the image.
         :rtype: str
         """
-        return self.metadata['title']
+        return self._lookup('title')
 
     def get_coll_title(self):
         """
@@ -106,7 +608,7 @@ class Image:
         :return: The Collection Title of the image.
         :rtype: str
         """
-        return self.metadata['collectionTitle']
+        return self._lookup('collectionTitle')
 
     def get_date(self):
         """
@@ -120,8 +622,8 @@ class Image:
                        'acquisitionStartDate', 'Date', 'date']
 
         for f in date_fields:
-            found = self.metadata.get(f)
-            if found is not None:
+            found = self._get_value(f)
+            if found is not _MISSING and found is not None:
                 return found
 
     def get_url(self):
@@ -131,7 +633,7 @@ class Image:
         :return: The URL of the image.
         :rtype: str
         """
-        return self.metadata['thisRecordUrl']
+        return self._lookup('thisRecordUrl')
 
     def get_metadata(self, entry=None):
         """
@@ -147,10 +649,11 @@ class Image:
         if entry is None:
             return self.metadata
 
-        if entry not in self.metadata.keys():
+        val = self._get_value(entry)
+        if val is _MISSING:
             return None
 
-        return self.metadata[entry]
+        return val
 
     def set_metadata(self, val, entry=None):
         """
@@ -167,87 +670,519 @@ class Image:
         if entry is None:
             self.metadata = val
         else:
-            self.metadata[entry] = val
+            self._set_value(entry, val)
+
+    def get_fields(self):
+        """
+        Gets a list of all metadata keys.
+        
+        :return: A list of the metadata keys.
+        :rtype: list
+        """
+
+        return self._get_keys()
+
+    def get_geometry(self, output='array'):
+        """
+        Gets (and sets) the geometry of the image.
+        
+        :param output: Specifies the type of geometry to return, can be
+                    'array', 'wkt' or 'geom'.
+        :type  output: str
+        
+        :return: The geometry of the image in the specified format.
+        :rtype: str or ogr.Geometry
+        """
+
+        if self.geometry is None:
+            self.geometry = {}
+
+        if self.geometry.get(output) is None:
+            coords = self.get_coords()
+            self.geometry[output] = _geo_util.convert_image_geom(coords,
+                                                                 output)
+
+        return self.geometry[output]
+
+    def get_coords(self):
+        """
+        Gets the coordinates of the image's footprint as returned by the
+            RAPI.
+
+        :return: The coordinates of the footprint or None if the image has
+                no geometry.
+        :rtype: list
+        """
+
+        geometry = self._get_raw('geometry')
+        if geometry is _MISSING:
+            geometry = self.get_metadata('geometry')
+
+        # Images without a footprint have an empty value (or 'None') in
+        #   the results files
+        if geometry is None or geometry in ('', 'None'):
+            return None
+
+        if isinstance(geometry, str):
+            geometry = json.loads(geometry.replace("'", '"'))
+
+        return geometry['coordinates']
+
+    def parse_record(self, in_rec):
+        """
+        Parses a JSON image record from the RAPI and sets the image. The
+            record is kept as is and only parsed when the metadata is first
+            accessed; the WKT of the footprint is created when it is first
+            requested.
+        
+        :param in_rec: A dictionary from a JSON record from the RAPI.
+        :type  in_rec: dict
+        """
+
+        # print("in_rec: %s" % in_rec)
+
+        self._init_metadata(in_rec.get('collectionId'))
+        self._raw = in_rec
+
+    def parse_row(self, row):
+        """
+        Parses a row entry from a CSV file.
+        
+        :param row: A dictionary from an entry in a CSV file.
+        :type  row: dict
+        """
+
+        self.metadata = row
+
+
+def _to_datetime64(in_date):
+    """
+    Converts a date from the RAPI (ex: '2021-05-04 13:12:45 GMT') to a
+        NumPy datetime64.
+
+    :param in_date: The date string.
+    :type  in_date: str
+
+    :return: The date or NaT if the date could not be converted.
+    :rtype: numpy.datetime64
+    """
+
+    if in_date is None:
+        return np.datetime64('NaT')
+
+    try:
+        return np.datetime64(str(in_date)[:19].replace(' ', 'T'), 's')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def _to_float(val):
+    """
+    Converts a metadata value to a float.
+
+    :param val: The metadata value.
+    :type  val: any
+
+    :return: The value as a float or NaN if it is not a number.
+    :rtype: float
+    """
+
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _get_entry(getter):
+    """
+    Calls a getter of an Image for an entry which may not be set.
+
+    :param getter: The method of the Image (such as get_record_id).
+    :type  getter: function
+
+    :return: The value of the entry or None if it is not set.
+    :rtype: any
+    """
+
+    try:
+        return getter()
+    except KeyError:
+        return None
+
+
+class ImageColumns:
+    """
+    A columnar view of a list of Images. The Record Ids and Collection Ids
+        are stored in NumPy arrays; the dates, footprints and other
+        metadata fields are converted to arrays when first requested.
+
+    The Images remain the storage of the ImageList (see CompactMetadata),
+        the view only keeps references to them and the arrays which have
+        been requested.
+    """
+
+    def __init__(self, images):
+        """
+        Initializer of the ImageColumns class.
+
+        :param images: A list of Image objects.
+        :type  images: list
+        """
+
+        self.images = np.empty(len(images), dtype=object)
+        self.images[:] = images
+
+        self.columns = {}
+
+        # The Ids are read from the records which have not been parsed
+        #   yet without parsing them
+        self.record_id = np.array([str(_get_entry(img.get_record_id))
+                                   for img in images], dtype=object)
+        self.coll_id = np.array([_get_entry(img.get_coll_id)
+                                 for img in images], dtype=object)
+
+        # The dates and footprints are converted when first needed
+        self._date = None
+        self._coords = None
+        self._bounds = None
+
+        self.footprints = None
+        self.index = None
+
+    @property
+    def date(self):
+        """
+        The dates of the Images as a datetime64 array.
+        """
+
+        if self._date is None:
+            dates = [img.get_date() for img in self.images]
+            try:
+                self._date = np.array(['NaT' if d is None
+                                       else str(d)[:19].replace(' ', 'T')
+                                       for d in dates],
+                                      dtype='datetime64[s]')
+            except ValueError:
+                self._date = np.array([_to_datetime64(d) for d in dates],
+                                      dtype='datetime64[s]')
+
+        return self._date
+
+    @property
+    def coords(self):
+        """
+        The footprints of the Images as closed rings (see
+            spatial.Geo.get_coord_array).
+        """
+
+        if self._coords is None:
+            self._coords = _geo_util.get_coord_array(
+                [img.get_coords() for img in self.images])
+
+        return self._coords
+
+    @property
+    def bounds(self):
+        """
+        The bounds (min x, min y, max x, max y) of the footprints.
+        """
+
+        if self._bounds is None:
+            coords = self.coords
+            self._bounds = np.stack([coords[:, :, 0].min(axis=1),
+                                     coords[:, :, 1].min(axis=1),
+                                     coords[:, :, 0].max(axis=1),
+                                     coords[:, :, 1].max(axis=1)], axis=1)
+
+        return self._bounds
+
+    def __len__(self):
+        return len(self.images)
+
+    def get_footprints(self, output='shapely'):
+        """
+        Gets the footprints of the Images. The shapely geometries are
+            created once and kept.
+
+        :param output: The type of footprints, can be 'shapely', 'wkt',
+                'wkb', 'array' or 'geom' (see
+                spatial.Geo.convert_image_geoms).
+        :type  output: str
+
+        :return: An array with the footprint of each Image.
+        :rtype: numpy.ndarray
+        """
+
+        if output == 'shapely':
+            if self.footprints is None:
+                self.footprints = _geo_util.convert_image_geoms(self.coords)
+            return self.footprints
+
+        return _geo_util.convert_image_geoms(self.coords, output)
+
+    def get_index(self):
+        """
+        Gets the spatial index (STRtree) of the footprints, creating it
+            when first requested.
+
+        :return: The STRtree or None if it is not supported by the
+                installed shapely.
+        :rtype: shapely.STRtree
+        """
+
+        if self.index is None:
+            self.index = _geo_util.create_index(self.get_footprints())
+
+        return self.index
+
+    def query(self, geom, predicate='intersects'):
+        """
+        Gets the positions of the footprints which satisfy a spatial
+            predicate with a geometry.
+
+        :param geom: The shapely geometry.
+        :type  geom: shapely.Geometry
+        :param predicate: The predicate, 'intersects' for the footprints
+                which intersect the geometry or 'contains' for the
+                footprints which contain the geometry.
+        :type  predicate: str
+
+        :return: The sorted positions of the footprints.
+        :rtype: numpy.ndarray
+        """
+
+        if predicate not in ['intersects', 'contains']:
+            raise ValueError(f"Predicate '{predicate}' is not supported.")
+
+        index = self.get_index()
+
+        if index is not None:
+            # The STRtree tests the predicate with the query geometry
+            #   first, so a footprint containing the geometry is 'within'
+            tree_pred = 'within' if predicate == 'contains' else predicate
+            return np.sort(index.query(geom, predicate=tree_pred))
+
+        footprints = self.get_footprints()
+        return np.array([idx for idx, fp in enumerate(footprints)
+                         if fp is not None
+                         and getattr(fp, predicate)(geom)], dtype=int)
+
+    def query_nearest(self, geom, max_distance=None):
+        """
+        Gets the positions of the footprints nearest to a geometry.
+
+        :param geom: The shapely geometry.
+        :type  geom: shapely.Geometry
+        :param max_distance: The maximum distance to search, in the units
+                of the footprints (degrees).
+        :type  max_distance: float
+
+        :return: The positions of the nearest footprints (more than one if
+                they are at the same distance).
+        :rtype: numpy.ndarray
+        """
+
+        index = self.get_index()
+
+        if index is not None:
+            return np.sort(index.query_nearest(geom,
+                                               max_distance=max_distance))
+
+        footprints = self.get_footprints()
+        dists = np.array([np.nan if fp is None else fp.distance(geom)
+                          for fp in footprints])
+        if max_distance is not None:
+            dists[dists > max_distance] = np.nan
+        if np.isnan(dists).all():
+            return np.array([], dtype=int)
+        return np.flatnonzero(dists == np.nanmin(dists))
+
+    def get_column(self, field):
+        """
+        Gets the values of a metadata field as an array. If every value of
+            the field is a number (or empty), a float array is returned,
+            otherwise an array of objects.
+
+        :param field: The metadata field.
+        :type  field: str
+
+        :return: The values of the field.
+        :rtype: numpy.ndarray
+        """
+
+        if field == 'recordId':
+            return self.record_id
+        elif field == 'collectionId':
+            return self.coll_id
+        elif field == 'date':
+            return self.date
+
+        if field not in self.columns:
+            vals = [img.get_metadata(field) for img in self.images]
+            nums = np.array([_to_float(v) for v in vals])
+            empty = np.array([v is None or v == '' for v in vals])
+            if len(vals) > 0 and (~np.isnan(nums) | empty).all():
+                self.columns[field] = nums
+            else:
+                col = np.empty(len(vals), dtype=object)
+                col[:] = vals
+                self.columns[field] = col
+
+        return self.columns[field]
+
+    def get_values(self, field):
+        """
+        Gets the values of a metadata field as they are stored in the
+            Images (before any conversion to numbers).
+
+        :param field: The metadata field.
+        :type  field: str
+
+        :return: The values of the field.
+        :rtype: list
+        """
+
+        col = self.get_column(field)
+
+        # The original values of the numbers are not kept in the view
+        if col.dtype.kind == 'f':
+            return [img.get_metadata(field) for img in self.images]
+
+        return list(col)
+
+    def compare(self, field, op, val):
+        """
+        Compares the values of a metadata field to a value.
+
+        :param field: The metadata field.
+        :type  field: str
+        :param op: The operator, one of '=', '<>', '<', '>', '<=' or '>='.
+        :type  op: str
+        :param val: The value to compare to (a list of values for '=' and
+                '<>').
+        :type  val: any
+
+        :return: A boolean array with True for the Images that match.
+        :rtype: numpy.ndarray
+        """
+
+        col = self.get_column(field)
+
+        if col.dtype.kind == 'f':
+            if isinstance(val, (list, tuple)):
+                val = [_to_float(v) for v in val]
+            else:
+                val = _to_float(val)
+        elif col.dtype.kind == 'M':
+            if isinstance(val, (list, tuple)):
+                val = [_to_datetime64(v) for v in val]
+            else:
+                val = _to_datetime64(val)
+
+        if op in ['=', '<>']:
+            if not isinstance(val, (list, tuple)):
+                val = [val]
+            if col.dtype == object:
+                val = set(val)
+                mask = np.array([v in val for v in col], dtype=bool)
+            else:
+                mask = np.isin(col, np.array(val, dtype=col.dtype))
+            return mask if op == '=' else ~mask
+
+        with np.errstate(invalid='ignore'):
+            if op == '<':
+                return col < val
+            elif op == '>':
+                return col > val
+            elif op == '<=':
+                return col <= val
+            elif op == '>=':
+                return col >= val
+
+        raise ValueError(f"Operator '{op}' is not supported.")
+
+
+class ImageSeq(list):
+    """
+    The list of Images of an ImageList. Any change to the list clears the
+        Record Id index and the columns of the ImageList.
+    """
 
-    def get_fields(self):
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner, images=()):
         """
-        Gets a list of all metadata keys.
-        
-        :return: A list of the metadata keys.
-        :rtype: list
+        Initializer of the ImageSeq class.
+
+        :param owner: The ImageList of the Images.
+        :type  owner: ImageList
+        :param images: The Images.
+        :type  images: list
         """
 
-        return self.metadata.keys()
+        super().__init__(images)
+        self._owner = owner
 
-    def get_geometry(self, output='array'):
-        """
-        Gets (and sets) the geometry of the image.
-        
-        :param output: Specifies the type of geometry to return, can be
-                    'array', 'wkt' or 'geom'.
-        :type  output: str
-        
-        :return: The geometry of the image in the specified format.
-        :rtype: str or ogr.Geometry
-        """
+    def __setitem__(self, key, val):
+        super().__setitem__(key, val)
+        self._owner._changed()
 
-        geo_util = spatial.Geo()
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._owner._changed()
 
-        if self.geometry[output] is None:
-            geometry = self.metadata['geometry']
+    def __iadd__(self, images):
+        res = super().__iadd__(images)
+        self._owner._changed()
+        return res
 
-            if isinstance(geometry, str):
-                geometry = json.loads(geometry.replace("'", '"'))
+    def __imul__(self, val):
+        res = super().__imul__(val)
+        self._owner._changed()
+        return res
 
-            coords = geometry['coordinates']
-            self.geometry[output] = geo_util.convert_image_geom(coords, output)
+    def append(self, image):
+        super().append(image)
+        self._owner._changed()
 
-        return self.geometry[output]
+    def extend(self, images):
+        super().extend(images)
+        self._owner._changed()
 
-    def parse_record(self, in_rec):
-        """
-        Parses a JSON image record from the RAPI and sets the image.
-        
-        :param in_rec: A dictionary from a JSON record from the RAPI.
-        :type  in_rec: dict
-        """
+    def insert(self, idx, image):
+        super().insert(idx, image)
+        self._owner._changed()
 
-        geo_util = spatial.Geo()
+    def remove(self, image):
+        super().remove(image)
+        self._owner._changed()
 
-        # print("in_rec: %s" % in_rec)
+    def pop(self, *idx):
+        image = super().pop(*idx)
+        self._owner._changed()
+        return image
 
-        self.metadata = {}
-        for k, v in in_rec.items():
-            if k == 'metadata2':
-                continue
-            elif k == 'geometry':
-                self.metadata['geometry'] = v
-                coords = v['coordinates']
-                self.metadata['wkt'] = geo_util.convert_image_geom(
-                    coords, 'wkt')
-            elif k == 'metadata':
-                if isinstance(v, list):
-                    for m in v:
-                        key = to_camel_case(m[0])
-                        self.metadata[key] = m[1]
-            else:
-                self.metadata[k] = v
+    def clear(self):
+        super().clear()
+        self._owner._changed()
 
-    def parse_row(self, row):
-        """
-        Parses a row entry from a CSV file.
-        
-        :param row: A dictionary from an entry in a CSV file.
-        :type  row: dict
-        """
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._owner._changed()
 
-        self.metadata = row
+    def reverse(self):
+        super().reverse()
+        self._owner._changed()
 
 
 class ImageList:
     """
     Class used to hold multiple Image objects and contain methods for
         accessing the list of objects.
+
+    The Images are kept in order in the img_lst. An index of the Images by
+        Record Id (as a string) is created when first needed and cleared
+        whenever the img_lst changes.
     """
 
     def __init__(self, eod):
@@ -258,8 +1193,76 @@ class ImageList:
         :type  eod: Eodms_OrderDownload
         """
         self.eod = eod
+
+        # The index of the Images and their ImageColumns, created when
+        #   first needed
+        self._index = None
+        self._columns = None
+
         self.img_lst = []
 
+    @property
+    def img_lst(self):
+        """
+        The list of Images in the ImageList.
+        """
+
+        return self._images
+
+    @img_lst.setter
+    def img_lst(self, in_imgs):
+        self._images = ImageSeq(self, in_imgs)
+        self._changed()
+
+    def _changed(self):
+        """
+        Clears the index and the columns of the Images after the img_lst
+            has changed.
+        """
+
+        self._index = None
+        self._columns = None
+
+    def _get_index(self):
+        """
+        Gets the index of the Images by Record Id, creating it if the
+            img_lst has changed. If several Images have the same Record Id,
+            the first one is indexed.
+
+        :return: A dictionary of the Images by Record Id.
+        :rtype: dict
+        """
+
+        if self._index is None:
+            index = {}
+            for image in self._images:
+                index.setdefault(self._get_key(image), image)
+            self._index = index
+
+        return self._index
+
+    def _get_key(self, image):
+        """
+        Gets the key of an Image in the images dictionary.
+
+        :param image: The Image object.
+        :type  image: Image
+
+        :return: The Record Id as a string or the Image itself if it has
+                no Record Id.
+        :rtype: str or Image
+        """
+
+        try:
+            rec_id = image.get_record_id()
+        except KeyError:
+            return image
+
+        if rec_id is None:
+            return image
+
+        return str(rec_id)
+
     def add_image(self, in_image):
         """
         Adds an Image object to the ImageList.
@@ -300,34 +1303,309 @@ class ImageList:
         """
         Returns the number of images in the ImageList.
         
-        :return: The number of images in the ImageList (img_lst).
+        :return: The number of images in the ImageList.
         :rtype: int
         """
 
         return len(self.img_lst)
 
-    def filter_overlap(self, overlap, aoi):
+    def get_columns(self):
+        """
+        Gets the columnar view of the Images, creating it if the ImageList
+            has changed since it was last created.
+
+        :return: The ImageColumns of the Images.
+        :rtype: ImageColumns
+        """
+
+        if self._columns is None:
+            self._columns = ImageColumns(self.img_lst)
+
+        return self._columns
+
+    def get_geometries(self, output='shapely'):
+        """
+        Gets the footprints of all the Images in one call.
+
+        :param output: The type of footprints, can be 'shapely', 'wkt',
+                'wkb', 'array' or 'geom' (see
+                spatial.Geo.convert_image_geoms).
+        :type  output: str
+
+        :return: An array with the footprint of each Image.
+        :rtype: numpy.ndarray
+        """
+
+        return self.get_columns().get_footprints(output)
+
+    def _keep(self, indices):
+        """
+        Keeps the Images at the given positions, in the given order.
+
+        :param indices: The positions of the Images to keep.
+        :type  indices: numpy.ndarray
+        """
+
+        columns = self.get_columns()
+        self.img_lst = list(columns.images[indices])
+
+    def query(self, geom, predicate='intersects'):
+        """
+        Gets the Images whose footprints satisfy a spatial predicate with a
+            geometry, using the spatial index of the ImageList.
+
+        :param geom: A shapely geometry, a WKT or the filename of an AOI.
+        :type  geom: shapely.Geometry or str
+        :param predicate: The predicate, 'intersects' or 'contains' (the
+                footprint contains the geometry).
+        :type  predicate: str
+
+        :return: A list of Image objects.
+        :rtype: list
+        """
+
+        columns = self.get_columns()
+        geom = self.eod.eodms_geo.get_geometry(geom)
+        return list(columns.images[columns.query(geom, predicate)])
+
+    def query_intersects(self, geom):
+        """
+        Gets the Images whose footprints intersect a geometry.
+
+        :param geom: A shapely geometry, a WKT or the filename of an AOI.
+        :type  geom: shapely.Geometry or str
+
+        :return: A list of Image objects.
+        :rtype: list
+        """
+
+        return self.query(geom, 'intersects')
+
+    def query_contains(self, geom):
+        """
+        Gets the Images whose footprints contain a geometry.
+
+        :param geom: A shapely geometry, a WKT or the filename of an AOI.
+        :type  geom: shapely.Geometry or str
+
+        :return: A list of Image objects.
+        :rtype: list
+        """
+
+        return self.query(geom, 'contains')
+
+    def query_nearest(self, geom, max_distance=None):
+        """
+        Gets the Images whose footprints are nearest to a geometry.
+
+        :param geom: A shapely geometry, a WKT or the filename of an AOI.
+        :type  geom: shapely.Geometry or str
+        :param max_distance: The maximum distance to search, in degrees.
+        :type  max_distance: float
+
+        :return: A list of Image objects.
+        :rtype: list
+        """
+
+        columns = self.get_columns()
+        geom = self.eod.eodms_geo.get_geometry(geom)
+        return list(columns.images[columns.query_nearest(geom,
+                                                         max_distance)])
+
+    def filter_by(self, field, op, val):
+        """
+        Permanently filters the Images with a metadata field.
+
+        :param field: The metadata field ('date' for the acquisition date).
+        :type  field: str
+        :param op: The operator, one of '=', '<>', '<', '>', '<=' or '>='.
+        :type  op: str
+        :param val: The value to compare to (a list of values for '=' and
+                '<>').
+        :type  val: any
+        """
+
+        mask = self.get_columns().compare(field, op, val)
+        self._keep(np.flatnonzero(mask))
+
+    def sort_by(self, field, reverse=False):
+        """
+        Sorts the Images by a metadata field. Images without a value for the
+            field are placed last.
+
+        :param field: The metadata field ('date' for the acquisition date).
+        :type  field: str
+        :param reverse: True to sort in descending order.
+        :type  reverse: boolean
+        """
+
+        col = self.get_columns().get_column(field)
+
+        if col.dtype == object:
+            keys = np.array(['' if v is None else str(v) for v in col])
+            missing = np.array([v is None for v in col], dtype=bool)
+        elif col.dtype.kind == 'M':
+            keys = col
+            missing = np.isnat(col)
+        else:
+            keys = col
+            missing = np.isnan(col)
+
+        order = np.argsort(keys, kind='stable')
+        if reverse:
+            order = order[::-1]
 
-        geo_util = spatial.Geo(self.eod, aoi)
+        # Move the Images without a value to the end
+        order = np.concatenate([order[~missing[order]],
+                                order[missing[order]]])
 
-        filter_lst = []
-        for img in self.img_lst:
-            overlap_aoi, overlap_img = geo_util.get_overlap(img, aoi)
-            if overlap_aoi >= float(overlap) or overlap_img >= float(overlap):
-                # print("overlap_aoi: %s" % overlap_aoi)
-                # print("overlap_img: %s" % overlap_img)
-                filter_lst.append(img)
+        self._keep(order)
+
+    def group_by(self, field):
+        """
+        Groups the Images by the values of a metadata field.
+
+        :param field: The metadata field.
+        :type  field: str
+
+        :return: A dictionary with an ImageList for each value of the field.
+        :rtype: dict
+        """
+
+        col = self.get_columns().get_column(field)
+        images = self.get_columns().images
+
+        keys = np.array([str(v) for v in col])
+        uniq, first_idx, inverse = np.unique(keys, return_index=True,
+                                             return_inverse=True)
+
+        groups = {}
+        for grp in np.argsort(first_idx):
+            img_lst = ImageList(self.eod)
+            img_lst.add_images(images[inverse == grp])
+            groups[col[first_idx[grp]]] = img_lst
+
+        return groups
+
+    def filter_overlap(self, overlap, aoi, use_index=None):
+        """
+        Permanently filters the Images whose footprints overlap the AOI.
+
+        :param overlap: The minimum percentage of the AOI covered by a
+                footprint or of a footprint covered by the AOI.
+        :type  overlap: float or str
+        :param aoi: The AOI filename.
+        :type  aoi: str
+        :param use_index: Determines whether to query the spatial index to
+                skip the footprints outside the AOI. If None, the index is
+                used if it already exists or if there are at least
+                INDEX_MIN_IMAGES Images; otherwise every footprint is
+                checked against the AOI.
+        :type  use_index: boolean
+        """
+
+        geo_util = self.eod.eodms_geo
+
+        columns = self.get_columns()
+
+        if use_index is None:
+            use_index = columns.index is not None \
+                or len(columns) >= INDEX_MIN_IMAGES
+
+        # Use the spatial index to skip the footprints outside the AOI
+        candidates = None
+        if use_index and columns.get_index() is not None:
+            candidates = columns.query(geo_util.get_aoi(aoi)['geom'])
+
+        overlap_aoi, overlap_img = geo_util.get_overlaps(
+            columns.get_footprints(), aoi, candidates)
+
+        with np.errstate(invalid='ignore'):
+            keep = (overlap_aoi >= float(overlap)) | \
+                   (overlap_img >= float(overlap))
+        filter_idx = np.flatnonzero(keep)
 
         # print("img_lst: %s" % len(self.img_lst))
-        # print("filter_lst: %s" % len(filter_lst))
+        # print("filter_lst: %s" % len(filter_idx))
 
         self.eod.print_msg(f'Number of images found after filtering for '
-                           f'overlap: {len(filter_lst)}')
+                           f'overlap: {len(filter_idx)}')
 
-        self.img_lst = filter_lst
+        self._keep(filter_idx)
 
         # answer = input("Press enter...")
 
+    def select_coverage(self, aoi, target=100.0, date_bin=None,
+                        weight=None):
+        """
+        Keeps the fewest Images which cover a percentage of the AOI (see
+            spatial.Geo.select_coverage). The Images keep their order.
+
+        :param aoi: The AOI filename.
+        :type  aoi: str
+        :param target: The percentage of the AOI to cover.
+        :type  target: float
+        :param date_bin: If set, the AOI is covered separately for the
+                Images of each 'day', 'week', 'month' or 'year'.
+        :type  date_bin: str
+        :param weight: A numeric metadata field used as the cost of each
+                Image (such as the file size); every Image has the same
+                cost if None.
+        :type  weight: str
+
+        :return: The percentage of the AOI covered by the Images of each
+                date bin (a single 'all' entry if date_bin is None).
+        :rtype: dict
+        """
+
+        geo_util = self.eod.eodms_geo
+        columns = self.get_columns()
+        footprints = columns.get_footprints()
+
+        weights = None
+        if weight is not None:
+            weights = columns.get_column(weight)
+            if weights.dtype.kind != 'f':
+                raise ValueError(f"The field '{weight}' is not numeric.")
+            # Images without a value get the average cost
+            fill = np.nanmean(weights) if (~np.isnan(weights)).any() else 1.0
+            weights = np.where(np.isnan(weights), fill, weights)
+
+        if date_bin is None:
+            bins = {'all': np.arange(len(columns))}
+        else:
+            units = {'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y'}
+            if date_bin not in units:
+                raise ValueError(f"Date bin '{date_bin}' is not supported.")
+            keys = columns.date.astype(f'datetime64[{units[date_bin]}]')
+            bins = {}
+            for key in np.unique(keys):
+                bins[str(key)] = np.flatnonzero(
+                    np.isnat(keys) if np.isnat(key) else keys == key)
+
+        coverage = {}
+        selected = []
+        for key, idx in bins.items():
+            sub_weights = None if weights is None else weights[idx]
+            sel_idx, covered = geo_util.select_coverage(footprints[idx], aoi,
+                                                        target, sub_weights)
+            selected.append(idx[sel_idx])
+            coverage[key] = covered
+
+            self.eod.logger.info(f"Coverage of the AOI for '{key}': "
+                                 f"{covered:.2f}% with {len(sel_idx)} of "
+                                 f"{len(idx)} images")
+
+        keep_idx = np.sort(np.concatenate(selected)) if selected \
+            else np.array([], dtype=int)
+
+        self.eod.print_msg(f'Number of images selected to cover {target}% '
+                           f'of the AOI: {len(keep_idx)}')
+
+        self._keep(keep_idx)
+
+        return coverage
+
     def get_fields(self):
         """
         Gets the list of metadata fields from the first Image.
@@ -336,13 +1614,7 @@ class ImageList:
         :rtype: list
         """
 
-        fields = []
-        for img in self.img_lst:
-            fields += img.get_fields()
-
-        fields = list(set(fields))
-
-        return fields
+        return get_all_fields(self.img_lst)
 
     def get_ids(self):
         """
@@ -367,9 +1639,7 @@ class ImageList:
         :rtype: Image
         """
 
-        for img in self.img_lst:
-            if img.get_record_id() == str(record_id):
-                return img
+        return self._get_index().get(str(record_id))
 
     def get_images(self):
         """
@@ -405,14 +1675,7 @@ class ImageList:
         :rtype: list
         """
 
-        if start is None and end is None:
-            return self.img_lst
-        elif start is None:
-            return self.img_lst[:end]
-        elif end is None:
-            return self.img_lst[start:]
-        else:
-            return self.img_lst[start:end]
+        return self.img_lst[start:end]
 
     def ingest_results(self, results, is_csv=False):
         """
@@ -425,7 +1688,8 @@ class ImageList:
         :type  is_csv: list
         """
 
-        img_ids = []
+        images = []
+        img_ids = set()
         for r in results:
             if 'errors' in r.keys():
                 continue
@@ -438,8 +1702,55 @@ class ImageList:
                 image.parse_row(r)
             else:
                 image.parse_record(r)
-            self.img_lst.append(image)
-            img_ids.append(rec_id)
+            images.append(image)
+            img_ids.add(rec_id)
+
+        self.img_lst += images
+
+    def ingest_columns(self, columns):
+        """
+        Adds Images from a set of columns of metadata (such as a results
+            Parquet file). The positions of the fields are looked up once
+            for each collection instead of for each Image.
+
+        :param columns: A dictionary with the values of each metadata field
+                (all the lists must have the same length).
+        :type  columns: dict
+        """
+
+        fields = list(columns.keys())
+        if len(fields) == 0:
+            return None
+
+        rec_ids = columns.get('recordId')
+        coll_ids = columns.get('collectionId')
+
+        images = []
+        img_ids = set()
+        plans = {}
+        for pos, vals in enumerate(zip(*columns.values())):
+            if rec_ids is not None and rec_ids[pos] is not None:
+                if rec_ids[pos] in img_ids:
+                    continue
+                img_ids.add(rec_ids[pos])
+
+            coll_id = None if coll_ids is None else coll_ids[pos]
+            if coll_id not in plans:
+                schema = get_schema(coll_id)
+                plans[coll_id] = (schema,
+                                  [schema.get_index(f) for f in fields])
+            schema, idxs = plans[coll_id]
+
+            row = [_MISSING] * len(schema.keys)
+            for idx, val in zip(idxs, vals):
+                row[idx] = val
+
+            image = Image()
+            image._schema = schema
+            image._row = row
+            images.append(image)
+
+        self.img_lst += images
 
     def remove_image(self, rec_id):
         """
@@ -449,13 +1760,22 @@ class ImageList:
         :type  rec_id: int
         """
 
-        found_idx = None
-        for idx, img in enumerate(self.img_lst):
-            if img.get_record_id() == rec_id:
-                found_idx = idx
+        self.remove_images([rec_id])
+
+    def remove_images(self, rec_ids):
+        """
+        Removes a set of images from the image list in a single pass.
+
+        :param rec_ids: A list of Record IDs of the images to remove.
+        :type  rec_ids: list
+        """
+
+        rem_ids = set(str(rec_id) for rec_id in rec_ids)
+        if len(rem_ids) == 0:
+            return None
 
-        if found_idx is not None:
-            del self.img_lst[found_idx]
+        self.img_lst = [img for img in self.img_lst
+                        if self._get_key(img) not in rem_ids]
 
     def trim(self, val, collections=None):
         """
@@ -473,16 +1793,15 @@ class ImageList:
         if collections is None:
             self.img_lst = self.img_lst[:val]
         else:
-            new_imgs = []
-            for c in collections:
-                imgs = [img for img in self.img_lst
-                        if img.get_metadata()['collectionId'] == c]
-                if len(imgs) < val:
-                    new_imgs += imgs
-                else:
-                    new_imgs += imgs[:val]
+            # The Collection Ids are read without parsing the records
+            coll_imgs = {c: [] for c in collections}
+            for img in self.img_lst:
+                imgs = coll_imgs.get(_get_entry(img.get_coll_id))
+                if imgs is not None and len(imgs) < val:
+                    imgs.append(img)
 
-            self.img_lst = new_imgs
+            self.img_lst = [img for imgs in coll_imgs.values()
+                            for img in imgs]
 
     def update_downloads(self, download_items):
         """
@@ -523,11 +1842,13 @@ class ImageList:
                     img.set_metadata(v, k)
 
 
-class OrderItem:
+class OrderItem(CompactMetadata):
     """
     Class used to hold information for an EODMS order item.
     """
 
+    __slots__ = ('eod', 'image')
+
     def __init__(self, eod, image=None):
         """
         Initializer for the OrderItem class.
@@ -539,7 +1860,7 @@ class OrderItem:
         """
         self.eod = eod
         self.image = image
-        self.metadata = {}
+        self._init_metadata('OrderItem')
 
     def get_fields(self):
         """
@@ -548,7 +1869,7 @@ class OrderItem:
         :return: A list of metadata fields.
         :rtype: list
         """
-        return list(self.metadata.keys())
+        return self._get_keys()
 
     def get_image(self):
         """
@@ -575,7 +1896,7 @@ class OrderItem:
         :return: The Record Id of the Image.
         :rtyp: int
         """
-        return self.metadata['recordId']
+        return self._lookup('recordId')
 
     def get_item_id(self):
         """
@@ -584,7 +1905,7 @@ class OrderItem:
         :return: The Order Item Id.
         :rtype: int
         """
-        return self.metadata['itemId']
+        return self._lookup('itemId')
 
     def get_order_id(self):
         """
@@ -593,7 +1914,7 @@ class OrderItem:
         :return: The Order Id.
         :rtype: int
         """
-        return self.metadata['orderId']
+        return self._lookup('orderId')
 
     def get_metadata(self, entry=None):
         """
@@ -609,8 +1930,9 @@ class OrderItem:
         if entry is None:
             return self.metadata
 
-        if entry in self.metadata.keys():
-            return self.metadata[entry]
+        val = self._get_value(entry)
+        if val is not _MISSING:
+            return val
 
     def get_download_path(self, relpath=False):
         """
@@ -625,10 +1947,10 @@ class OrderItem:
         :rtype: str
         """
 
-        if 'downloadPaths' not in self.metadata.keys():
+        if not self._has_key('downloadPaths'):
             return None
 
-        paths = self.metadata['downloadPaths']
+        paths = self._get_value('downloadPaths')
         path_str = json.dumps(paths)
         path_json = json.loads(path_str)
 
@@ -656,10 +1978,10 @@ class OrderItem:
         # fields = self.eod.eodms_rapi.get_collections()[
         #     self.image.get_coll_id()]['fields']
 
-        self.metadata['imageUrl'] = self.image.get_metadata('thisRecordUrl')
-        self.metadata['imageMetadata'] = self.image.get_metadata(
-            'metadataUrl')
-        self.metadata['imageStartDate'] = self.image.get_date()
+        self._set_value('imageUrl', self.image.get_metadata('thisRecordUrl'))
+        self._set_value('imageMetadata', self.image.get_metadata(
+            'metadataUrl'))
+        self._set_value('imageStartDate', self.image.get_date())
 
     def parse_record(self, in_rec):
         """
@@ -669,26 +1991,26 @@ class OrderItem:
         :type  in_rec: dict
         """
 
-        self.metadata = {}
+        self._init_metadata('OrderItem')
         for k, v in in_rec.items():
             if k == 'parameters':
                 for m, mv in v.items():
-                    self.metadata[m] = mv
+                    self._set_value(m, mv)
             else:
-                self.metadata[k] = v
+                self._set_value(k, v)
 
         if self.image is not None:
-            self.metadata['imageUrl'] = self.image.get_metadata(
-                'thisRecordUrl')
-            self.metadata['imageMetadata'] = self.image.get_metadata(
-                'metadataUrl')
-            self.metadata['imageStartDate'] = self.image.get_date()
-
-            if 'dateRapiOrdered' not in self.metadata.keys():
-                self.metadata['dateRapiOrdered'] = self.image.get_metadata(
-                    'dateRapiOrdered')
-            self.metadata['orderSubmitted'] = self.image.get_metadata(
-                'orderSubmitted')
+            self._set_value('imageUrl', self.image.get_metadata(
+                'thisRecordUrl'))
+            self._set_value('imageMetadata', self.image.get_metadata(
+                'metadataUrl'))
+            self._set_value('imageStartDate', self.image.get_date())
+
+            if not self._has_key('dateRapiOrdered'):
+                self._set_value('dateRapiOrdered', self.image.get_metadata(
+                    'dateRapiOrdered'))
+            self._set_value('orderSubmitted', self.image.get_metadata(
+                'orderSubmitted'))
 
     def print_item(self, tabs=1):
         """
@@ -698,9 +2020,9 @@ class OrderItem:
         :type  tabs: int
         """
 
-        print(f"\n\tOrder Item Id: {self.metadata['itemId']}")
-        print(f"\tOrder Id: {self.metadata['orderId']}")
-        print(f"\tRecord Id: {self.metadata['recordId']}")
+        print(f"\n\tOrder Item Id: {self.get_item_id()}")
+        print(f"\tOrder Id: {self.get_order_id()}")
+        print(f"\tRecord Id: {self.get_record_id()}")
         for m, v in self.metadata.items():
             if m == 'itemId' or m == 'orderId' or m == 'recordId':
                 continue
@@ -716,7 +2038,7 @@ class OrderItem:
         :type  val: str
         """
 
-        self.metadata[key] = val
+        self._set_value(key, val)
 
 
 class Order:
@@ -735,6 +2057,43 @@ class Order:
         self.order_items = []
         self.order_id = order_id
 
+        # The OrderItems by Order Item Id and by Record Id (as strings)
+        self.item_ids = {}
+        self.record_ids = {}
+
+    def _index_item(self, order_item):
+        """
+        Adds an OrderItem to the Order Item Id and Record Id dictionaries.
+
+        :param order_item: The OrderItem object.
+        :type  order_item: OrderItem
+        """
+
+        item_id = order_item.get_metadata('itemId')
+        if item_id is not None:
+            self.item_ids[str(item_id)] = order_item
+
+        rec_id = order_item.get_metadata('recordId')
+        if rec_id is not None:
+            self.record_ids.setdefault(str(rec_id), order_item)
+
+    def _unindex_item(self, order_item):
+        """
+        Removes an OrderItem from the Order Item Id and Record Id
+            dictionaries.
+
+        :param order_item: The OrderItem object.
+        :type  order_item: OrderItem
+        """
+
+        item_id = str(order_item.get_metadata('itemId'))
+        if self.item_ids.get(item_id) is order_item:
+            del self.item_ids[item_id]
+
+        rec_id = str(order_item.get_metadata('recordId'))
+        if self.record_ids.get(rec_id) is order_item:
+            del self.record_ids[rec_id]
+
     def count(self):
         """
         Gets the number of Order Items for the order.
@@ -751,11 +2110,7 @@ class Order:
         :return: A list of all unique OrderItem metadata fields.
         :rtype: list
         """
-        fields = []
-        for items in self.order_items:
-            fields += items.get_fields()
-
-        fields = list(set(fields))
+        fields = get_all_fields(self.order_items)
 
         field_order = ['recordId', 'orderId', 'itemId', 'collectionId']
 
@@ -784,6 +2139,7 @@ class Order:
         :type  order_item: OrderItem
         """
         self.order_items.append(order_item)
+        self._index_item(order_item)
 
     def get_items(self):
         """
@@ -804,9 +2160,7 @@ class Order:
         :return: The specific OrderItem based on the Order Item Id.
         :rtype: OrderItem
         """
-        for item in self.order_items:
-            if item.get_item_id() == item_id:
-                return item
+        return self.item_ids.get(str(item_id))
 
     def get_item_by_image_id(self, record_id):
         """
@@ -818,10 +2172,7 @@ class Order:
         :return: The Order Item containing the Record Id.
         :rtype: OrderItem
         """
-        for item in self.order_items:
-            img = item.get_image()
-            if img.get_item_id() == record_id:
-                return item
+        return self.record_ids.get(str(record_id))
 
     def get_image(self, record_id):
         """
@@ -833,12 +2184,11 @@ class Order:
         :return: The Image containing the Record Id.
         :rtype: Image
         """
-        for item in self.order_items:
-            img = item.get_image()
-            if img is None:
-                return None
-            if img.get_record_id() == record_id:
-                return img
+        item = self.record_ids.get(str(record_id))
+        if item is None:
+            return None
+
+        return item.get_image()
 
     def get_image_by_item_id(self, item_id):
         """
@@ -850,9 +2200,11 @@ class Order:
         :return: The Image from the OrderItem with the given Id.
         :rtype: Image
         """
-        for item in self.order_items:
-            if item.get_item_id() == item_id:
-                return item.get_image()
+        item = self.item_ids.get(str(item_id))
+        if item is None:
+            return None
+
+        return item.get_image()
 
     def get_record_ids(self):
         """
@@ -883,16 +2235,20 @@ class Order:
         
         :param in_item: The Order Item with which to replace.
         :type  in_item: OrderItem
+
+        :return: The Order Item that was replaced or None if there was no
+                Order Item with the same Record Id.
+        :rtype: OrderItem
         """
-        lst_idx = -1
-        for idx, item in enumerate(self.order_items):
-            rec_id = item.get_record_id()
-            if int(rec_id) == int(in_item.get_record_id()):
-                lst_idx = idx
-                break
+        item = self.record_ids.get(str(in_item.get_record_id()))
+        if item is None:
+            return None
+
+        self.order_items[self.order_items.index(item)] = in_item
+        self._unindex_item(item)
+        self._index_item(in_item)
 
-        if lst_idx > -1:
-            self.order_items[lst_idx] = in_item
+        return item
 
     def trim_items(self, val):
         """
@@ -903,6 +2259,11 @@ class Order:
         """
         self.order_items = self.order_items[:val]
 
+        self.item_ids = {}
+        self.record_ids = {}
+        for item in self.order_items:
+            self._index_item(item)
+
 
 class OrderList:
     """
@@ -915,9 +2276,64 @@ class OrderList:
         Initializer for the OrderList object.
         """
         self.eod = eod
-        self.order_lst = []
         self.img_lst = img_lst
 
+        # The Orders by Order Id and the OrderItems by Order Item Id
+        #   (as strings)
+        self.order_ids = {}
+        self.item_ids = {}
+
+    @property
+    def order_lst(self):
+        """
+        The list of Orders in the OrderList.
+        """
+
+        return list(self.order_ids.values())
+
+    def _add_item(self, order_id, order_item):
+        """
+        Adds an OrderItem to the Order with the given Order Id, creating the
+            Order if it does not exist.
+
+        :param order_id: The Order Id.
+        :type  order_id: int
+        :param order_item: The OrderItem object.
+        :type  order_item: OrderItem
+        """
+
+        order = self.order_ids.get(str(order_id))
+        if order is None:
+            order = Order(order_id)
+            self.order_ids[str(order_id)] = order
+
+        order.add_item(order_item)
+        self._index_item(order_item)
+
+    def _index_item(self, order_item):
+        """
+        Adds an OrderItem to the Order Item Id dictionary.
+
+        :param order_item: The OrderItem object.
+        :type  order_item: OrderItem
+        """
+
+        item_id = order_item.get_metadata('itemId')
+        if item_id is not None:
+            self.item_ids[str(item_id)] = order_item
+
+    def _unindex_item(self, order_item):
+        """
+        Removes an OrderItem from the Order Item Id dictionary.
+
+        :param order_item: The OrderItem object.
+        :type  order_item: OrderItem
+        """
+
+        item_id = str(order_item.get_metadata('itemId'))
+        if self.item_ids.get(item_id) is order_item:
+            del self.item_ids[item_id]
+
     def add_order(self, json_res):
 
         # print(json.dumps(json_res, indent=4, sort_keys=True))
@@ -948,7 +2364,7 @@ class OrderList:
         :return: The number of Orders in the order_lst.
         :rtype: int
         """
-        return len(self.order_lst)
+        return len(self.order_ids)
 
     def count_items(self):
         """
@@ -975,7 +2391,7 @@ class OrderList:
         for order in self.order_lst:
             fields += order.get_fields()
 
-        fields = list(set(fields))
+        fields = list(dict.fromkeys(fields))
 
         out_fields = self.eod.sort_fields(fields)
 
@@ -1032,9 +2448,7 @@ class OrderList:
         :return: The Order object with the given Order Id.
         :rtype: Order
         """
-        for o in self.order_lst:
-            if o.get_order_id() == order_id:
-                return o
+        return self.order_ids.get(str(order_id))
 
     def get_orders(self):
         """
@@ -1057,8 +2471,7 @@ class OrderList:
         :rtype: Order
         """
 
-        for o in self.order_lst:
-            return o.get_item(item_id)
+        return self.item_ids.get(str(item_id))
 
     def get_order_items(self):
         """
@@ -1110,7 +2523,13 @@ class OrderList:
         orders = ord_list.get_orders()
 
         for order in orders:
-            self.order_lst.append(order)
+            if self.get_order(order.get_order_id()) is None:
+                self.order_ids[str(order.get_order_id())] = order
+                for item in order.get_items():
+                    self._index_item(item)
+            else:
+                for item in order.get_items():
+                    self._add_item(order.get_order_id(), item)
 
     def parse_order_item(self, rec):
         """
@@ -1135,13 +2554,7 @@ class OrderList:
 
         # Update or create Order
         order_id = order_item.get_order_id()
-        order = self.get_order(order_id)
-        if order is None:
-            order = Order(order_id)
-            order.add_item(order_item)
-            self.order_lst.append(order)
-        else:
-            order.add_item(order_item)
+        self._add_item(order_id, order_item)
 
         if image is not None:
             image.set_metadata(order_id, 'orderId')
@@ -1196,13 +2609,12 @@ class OrderList:
         :type  order_id: str or int
         """
 
-        rem_idx = None
-        for idx, o in enumerate(self.order_lst):
-            if o.get_order_id() == order_id:
-                rem_idx = idx
+        order = self.order_ids.pop(str(order_id), None)
+        if order is None:
+            return None
 
-        if rem_idx is not None:
-            self.order_lst.pop(rem_idx)
+        for item in order.get_items():
+            self._unindex_item(item)
 
     def replace_item(self, order_id, item_obj):
         """
@@ -1213,9 +2625,16 @@ class OrderList:
         :param item_obj: The Order with which to replace.
         :type  item_obj: Order
         """
-        for order in self.order_lst:
-            if int(order.get_order_id()) == int(order_id):
-                order.replace_item(item_obj)
+        order = self.get_order(order_id)
+        if order is None:
+            return None
+
+        old_item = order.replace_item(item_obj)
+        if old_item is None:
+            return None
+
+        self._unindex_item(old_item)
+        self._index_item(item_obj)
 
     def trim_items(self, max_images):
         """
@@ -1237,6 +2656,10 @@ class OrderList:
                     order.trim_items(counter)
                     counter = 0
 
+            self.item_ids = {}
+            for item in self.get_order_items():
+                self._index_item(item)
+
     def update_order(self, order_id, order_item):
         """
         Updates a specific Order Item.
@@ -1247,11 +2670,4 @@ class OrderList:
         :type  order_item: OrderItem
         """
 
-        for order in self.order_lst:
-            if int(order.get_order_id()) == int(order_id):
-                order.add_item(order_item)
-                return None
-
-        new_order = Order(order_id)
-        new_order.add_item(order_item)
-        self.order_lst.append(new_order)
+        self._add_item(order_id, order_item)
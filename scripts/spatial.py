@@ -25,14 +25,18 @@
 ##############################################################################
 
 import os
+import heapq
 # import sys
 from geomet import wkt
 # from xml.etree import ElementTree
 import json
 import logging
+import shapely
 import shapely.wkt
 import numpy as np
-from shapely.geometry import MultiPolygon
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+from shapely.prepared import prep
 
 from eodms_rapi import EODMSGeo
 
@@ -52,6 +56,20 @@ except ImportError:
         # print("error with osgeo gdal import")
         GDAL_INCLUDED = False
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_INCLUDED = True
+except ImportError:
+    PYARROW_INCLUDED = False
+
+# Shapely 2 has functions which work on arrays of geometries
+SHAPELY_ARRAYS = hasattr(shapely, 'polygons')
+
+# The result of the check for the right ogr package, done once per process
+_ogr_valid = None
+
 
 class Geo:
     """
@@ -70,19 +88,29 @@ class Geo:
         self.aoi_fn = aoi_fn
         self.eod = eod
 
+        # The AOIs loaded by get_aoi, by AOI filename or WKT
+        self.aois = {}
+
         self.logger = logging.getLogger('EODMSRAPI')
 
     def _check_ogr(self):
 
+        global _ogr_valid
+
+        if _ogr_valid is not None:
+            return _ogr_valid
+
         # There is another ogr Python package that might have been imported
         #   Check if its the wrong ogr
         if ogr.__doc__ is not None and \
                 ogr.__doc__.find("Module providing one api for multiple git "
                                  "services") > -1:
             print("Another package named 'ogr' is installed.")
-            return False
+            _ogr_valid = False
+        else:
+            _ogr_valid = True
 
-        return True
+        return _ogr_valid
 
     def _close_wkt_polygon(self, in_wkt):
 
@@ -149,6 +177,114 @@ class Geo:
             else:
                 return pnt_array
 
+    def get_coord_array(self, coords_lst):
+        """
+        Converts the coordinates of a list of footprints from the RAPI to a
+            NumPy array of closed rings. Like convert_image_geom, the first
+            4 points of each footprint are used.
+
+        :param coords_lst: A list of coordinates of footprints from the RAPI
+                results.
+        :type  coords_lst: list
+
+        :return: An array with a shape of (<number of footprints>, 5, 2);
+                the rows of footprints which could not be converted are NaN.
+        :rtype: numpy.ndarray
+        """
+
+        coord_arr = np.full((len(coords_lst), 5, 2), np.nan)
+
+        if len(coords_lst) == 0:
+            return coord_arr
+
+        try:
+            pnts = np.asarray([c[0][:4] for c in coords_lst], dtype=float)
+        except (TypeError, ValueError, IndexError):
+            pnts = None
+
+        if pnts is not None and pnts.shape == (len(coords_lst), 4, 2):
+            coord_arr[:, :4] = pnts
+        else:
+            # Convert the footprints one at a time if they are not all
+            #   the same shape
+            for idx, coords in enumerate(coords_lst):
+                try:
+                    pnts = [p[:2] for p in coords[0][:4]]
+                except (TypeError, IndexError):
+                    continue
+                if len(pnts) < 4:
+                    continue
+                try:
+                    coord_arr[idx, :4] = pnts
+                except ValueError:
+                    continue
+
+        coord_arr[:, 4] = coord_arr[:, 0]
+
+        return coord_arr
+
+    def convert_image_geoms(self, coords_lst, output='shapely'):
+        """
+        Converts the coordinates of a list of footprints from the RAPI in
+            one call.
+
+        :param coords_lst: A list of coordinates of footprints from the RAPI
+                results (or an array from get_coord_array).
+        :type  coords_lst: list or numpy.ndarray
+        :param output: The type of return, can be 'shapely', 'wkt', 'wkb',
+                'array' or 'geom' (OGR geometries).
+        :type  output: str
+
+        :return: An array with the footprint of each entry (None for the
+                footprints which could not be converted); for 'array', an
+                array of points with a shape of (<number of footprints>, 4,
+                2).
+        :rtype: numpy.ndarray
+        """
+
+        if isinstance(coords_lst, np.ndarray):
+            coord_arr = coords_lst
+        else:
+            coord_arr = self.get_coord_array(coords_lst)
+
+        if output == 'array':
+            return coord_arr[:, :4]
+
+        valid = ~np.isnan(coord_arr).any(axis=(1, 2))
+
+        geoms = np.full(len(coord_arr), None, dtype=object)
+        if SHAPELY_ARRAYS:
+            geoms[valid] = shapely.polygons(coord_arr[valid])
+        else:
+            for idx in np.flatnonzero(valid):
+                geoms[idx] = Polygon(coord_arr[idx])
+
+        if output == 'shapely':
+            return geoms
+
+        if output == 'wkt':
+            if SHAPELY_ARRAYS:
+                return shapely.to_wkt(geoms, rounding_precision=-1)
+            return np.array([None if g is None else g.wkt for g in geoms],
+                            dtype=object)
+
+        wkbs = geoms
+        if SHAPELY_ARRAYS:
+            wkbs = shapely.to_wkb(geoms)
+        else:
+            wkbs = np.array([None if g is None else g.wkb for g in geoms],
+                            dtype=object)
+
+        if output == 'wkb':
+            return wkbs
+
+        if output == 'geom' and GDAL_INCLUDED and self._check_ogr():
+            return np.array([None if w is None
+                             else ogr.CreateGeometryFromWkb(w)
+                             for w in wkbs], dtype=object)
+
+        return geoms
+
     # def convert_from_wkt(self, in_feat):
     #     """
     #     Converts a WKT to a polygon geometry.
@@ -182,7 +318,9 @@ class Geo:
         if out_fn.lower() == 'geojson' or \
                 out_fn.lower() == 'kml' or \
                 out_fn.lower() == 'gml' or \
-                out_fn.lower() == 'shp':
+                out_fn.lower() == 'shp' or \
+                out_fn.lower() == 'parquet' or \
+                out_fn.lower() == 'fgb':
             fn = self.eod.fn_str
             out_fn = f'{fn}_outlines.{out_fn.lower()}'
 
@@ -193,8 +331,23 @@ class Geo:
         ext = os.path.splitext(out_fn)[1]
         lyr_name = os.path.basename(out_fn).replace(ext, '')
 
+        if ext == '.parquet':
+            if PYARROW_INCLUDED:
+                self._write_parquet(img_lst, out_fn)
+                return None
+
+            warn_msg = "The pyarrow Python package is not installed. " \
+                       "Cannot export geospatial results in 'GeoParquet' " \
+                       "format. Exporting results as a GeoJSON."
+            print(f"\n{warn_msg}")
+            self.logger.warning(warn_msg)
+
+            out_fn = out_fn.replace(ext, '.geojson')
+            ext = '.geojson'
+
         if GDAL_INCLUDED and self._check_ogr():
 
+            lyr_options = []
             if ext == '.gml':
                 ogr_driver = 'GML'
             elif ext == '.kml':
@@ -203,6 +356,11 @@ class Geo:
                 ogr_driver = 'GeoJSON'
             elif ext == '.shp':
                 ogr_driver = 'ESRI Shapefile'
+            elif ext == '.fgb':
+                ogr_driver = 'FlatGeobuf'
+                # Add the packed Hilbert R-tree so clients can read only
+                #   the features in an area
+                lyr_options = ['SPATIAL_INDEX=YES']
             else:
                 warn_msg = "The format type for the output geospatial file " \
                            "could not be determined. No geospatial output " \
@@ -210,54 +368,25 @@ class Geo:
                 print(f"\n{warn_msg}")
                 return None
 
-            # Create the output Driver
-            driver = ogr.GetDriverByName(ogr_driver)
-
-            # Create the output
-            # create the spatial reference, WGS84
-            srs = osr.SpatialReference()
-            srs.ImportFromEPSG(4326)
-            ds = driver.CreateDataSource(out_fn)
-            lyr = ds.CreateLayer(lyr_name, srs, ogr.wkbPolygon)
-
-            # Get the output Layer's Feature Definition
-            feature_defn = lyr.GetLayerDefn()
-
-            fields = img_lst.get_fields()
-            for f in fields:
-                field_name = ogr.FieldDefn(f, ogr.OFTString)
-                field_name.SetWidth(256)
-                lyr.CreateField(field_name)
-
-            for r in img_lst.get_images():
-                # record_id = r.get_record_id()
-                poly = r.get_geometry('geom')
-
-                # Create a new feature
-                feat = ogr.Feature(feature_defn)
-
-                # Add field values
-                for f in fields:
-                    feat.SetField(f, str(r.get_metadata(f)))
-
-                if ext == '.kml':
-                    self.reverse_coords(poly)
-
-                # Set new geometry
-                feat.SetGeometry(poly)
-
-                # Add new feature to output Layer
-                lyr.CreateFeature(feat)
+            if ogr.GetDriverByName(ogr_driver) is not None:
+                self._write_ogr(img_lst, out_fn, lyr_name, ogr_driver,
+                                lyr_options)
+                return None
 
-            # Dereference the feature
-            feat = None
+            # FlatGeobuf requires GDAL 3.1 or higher
+            warn_msg = f"The installed GDAL does not support the " \
+                       f"'{ogr_driver}' format. Exporting results as a " \
+                       f"GeoJSON."
+            print(f"\n{warn_msg}")
+            self.logger.warning(warn_msg)
 
-            # Save and close DataSources
-            ds = None
+            out_fn = out_fn.replace(ext, '.geojson')
+            self._write_geojson(img_lst, out_fn, lyr_name)
 
         else:
 
-            if ext == '.gml' or ext == '.kml' or ext == '.shp':
+            if ext == '.gml' or ext == '.kml' or ext == '.shp' or \
+                    ext == '.fgb':
                 ext_str = ext.replace('.', '').upper()
                 warn_msg = f"GDAL Python package is not installed. " \
                            f"Cannot export geospatial results in " \
@@ -269,43 +398,600 @@ class Geo:
 
                 out_fn = out_fn.replace(ext, '.geojson')
 
-            feats = []
-            imgs = img_lst.get_images()
-            for i in imgs:
-                mdata = i.get_metadata()
+            self._write_geojson(img_lst, out_fn, lyr_name)
+
+    def _get_ogr_fields(self, columns, fields, max_width=254):
+        """
+        Determines the OGR type of each field from its values.
+
+        :param columns: The ImageColumns of the Images.
+        :type  columns: image.ImageColumns
+        :param fields: The metadata fields.
+        :type  fields: list
+        :param max_width: The maximum width of the string fields.
+        :type  max_width: int
+
+        :return: A list of tuples with the field name, the OGR field type,
+                the field width and the values of the field.
+        :rtype: list
+        """
+
+        ogr_fields = []
+        for f in fields:
+            col = columns.get_column(f)
+
+            if col.dtype.kind == 'f':
+                vals = col[~np.isnan(col)]
+                if len(vals) > 0 and (vals == np.round(vals)).all() \
+                        and (np.abs(vals) < 2 ** 53).all():
+                    ogr_fields.append((f, ogr.OFTInteger64, 0, col))
+                else:
+                    ogr_fields.append((f, ogr.OFTReal, 0, col))
+                continue
+
+            col = np.array([None if v is None else str(v) for v in col],
+                           dtype=object)
+            width = max([len(v) for v in col if v is not None],
+                        default=1)
+            ogr_fields.append((f, ogr.OFTString,
+                               max(1, min(width, max_width)), col))
+
+        return ogr_fields
+
+    def _write_ogr(self, img_lst, out_fn, lyr_name, ogr_driver,
+                   lyr_options=None, chunk_size=10000):
+        """
+        Writes the Images to a geospatial file with OGR. The field types are
+            determined from the values, the footprints are created in one
+            call and, if the layer supports them, the features are written
+            in transactions of chunk_size features.
+
+        :param img_lst: An ImageList of images.
+        :type  img_lst: ImageList
+        :param out_fn: The output geospatial filename.
+        :type  out_fn: str
+        :param lyr_name: The name of the output layer.
+        :type  lyr_name: str
+        :param ogr_driver: The name of the OGR driver.
+        :type  ogr_driver: str
+        :param lyr_options: The layer creation options of the driver.
+        :type  lyr_options: list
+        :param chunk_size: The number of features per transaction.
+        :type  chunk_size: int
+        """
+
+        columns = img_lst.get_columns()
+
+        # The KML driver expects the coordinates in lat, long
+        coords = columns.coords
+        if ogr_driver == 'KML':
+            coords = coords[:, :, ::-1]
+        wkbs = self.convert_image_geoms(coords, 'wkb')
+
+        # Create the output Driver
+        driver = ogr.GetDriverByName(ogr_driver)
+
+        # Create the output
+        # create the spatial reference, WGS84
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(4326)
+        ds = driver.CreateDataSource(out_fn)
+        lyr = ds.CreateLayer(lyr_name, srs, ogr.wkbPolygon,
+                             options=lyr_options or [])
+
+        # Some drivers rename the fields (the Shapefile driver truncates
+        #   them to 10 characters) so the name given to each field is kept
+        out_fields = []
+        ogr_fields = self._get_ogr_fields(columns, img_lst.get_fields())
+        for f, f_type, width, col in ogr_fields:
+            field_defn = ogr.FieldDefn(f, f_type)
+            if width > 0:
+                field_defn.SetWidth(width)
+            if lyr.CreateField(field_defn) != 0:
+                warn_msg = f"Could not create the field '{f}' in " \
+                           f"{out_fn}. The field will not be exported."
+                print(f"\n{warn_msg}")
+                self.logger.warning(warn_msg)
+                continue
+
+            lyr_defn = lyr.GetLayerDefn()
+            out_name = lyr_defn.GetFieldDefn(
+                lyr_defn.GetFieldCount() - 1).GetName()
+            out_fields.append((out_name, f_type, col))
+
+        # Get the output Layer's Feature Definition
+        feature_defn = lyr.GetLayerDefn()
+
+        # Get the index of each field in the output layer
+        out_fields = [(feature_defn.GetFieldIndex(name), f_type, col)
+                      for name, f_type, col in out_fields]
+
+        use_trans = lyr.TestCapability(ogr.OLCTransactions)
+
+        # The same feature is filled and written for each Image
+        feat = ogr.Feature(feature_defn)
+        for idx in range(len(columns)):
+            if use_trans and idx % chunk_size == 0:
+                if idx > 0:
+                    lyr.CommitTransaction()
+                lyr.StartTransaction()
+
+            for f_idx, f_type, col in out_fields:
+                val = col[idx]
+                if val is None or (f_type != ogr.OFTString and np.isnan(val)):
+                    feat.SetFieldNull(f_idx)
+                elif f_type == ogr.OFTInteger64:
+                    feat.SetField(f_idx, int(val))
+                elif f_type == ogr.OFTReal:
+                    feat.SetField(f_idx, float(val))
+                else:
+                    feat.SetField(f_idx, val)
+
+            if wkbs[idx] is None:
+                feat.SetGeometry(None)
+            else:
+                feat.SetGeometryDirectly(
+                    ogr.CreateGeometryFromWkb(wkbs[idx]))
+
+            # Add new feature to output Layer
+            feat.SetFID(-1)
+            lyr.CreateFeature(feat)
+
+        if use_trans and len(columns) > 0:
+            lyr.CommitTransaction()
+
+        # Dereference the feature
+        feat = None
+
+        # Save and close DataSources
+        ds = None
+
+    def get_arrow_fields(self, columns, fields, lossless=False):
+        """
+        Determines the Arrow type of each field from its values.
+
+        :param columns: The ImageColumns of the Images.
+        :type  columns: image.ImageColumns
+        :param fields: The metadata fields.
+        :type  fields: list
+        :param lossless: If True, a field is only stored as a number or a
+                timestamp if its values can be converted back to the same
+                strings.
+        :type  lossless: boolean
+
+        :return: A list of tuples with the field name, the Arrow type and
+                the values of the field.
+        :rtype: list
+        """
+
+        arrow_fields = []
+        for f in fields:
+            col = columns.get_column(f)
+
+            if col.dtype.kind == 'f':
+                vals = col[~np.isnan(col)]
+                is_int = len(vals) > 0 \
+                    and (vals == np.round(vals)).all() \
+                    and (np.abs(vals) < 2 ** 53).all()
+                f_type = pa.int64() if is_int else pa.float64()
+
+                # Values like '007' or '1.50' are kept as strings
+                orig_vals = columns.get_values(f) if lossless else None
+                if not lossless or all(
+                        v is None or v == '' or str(v) == (
+                            str(int(float(v))) if is_int
+                            else repr(float(v)))
+                        for v in orig_vals):
+                    arrow_fields.append((f, f_type, col))
+                    continue
+
+                col = np.empty(len(col), dtype=object)
+                col[:] = orig_vals
+
+            col = np.array([None if v is None or v == '' else str(v)
+                            for v in col], dtype=object)
+
+            # Store the fields with only dates (such as
+            #   '2021-02-01 12:00:00') as timestamps
+            vals = [v for v in col if v is not None]
+            if lossless:
+                is_date = all(len(v) == 19 and v[10] == ' ' for v in vals)
+            else:
+                is_date = all(len(v) >= 10 for v in vals)
+            if len(vals) > 0 and is_date and all(v[4] == '-' and v[7] == '-'
+                                                 for v in vals):
+                try:
+                    dates = np.array(['NaT' if v is None
+                                      else v[:19].replace(' ', 'T')
+                                      for v in col], dtype='datetime64[s]')
+                    arrow_fields.append((f, pa.timestamp('s'), dates))
+                    continue
+                except ValueError:
+                    pass
+
+            arrow_fields.append((f, pa.string(), col))
+
+        return arrow_fields
+
+    def get_arrow_arrays(self, arrow_fields, start, end):
+        """
+        Creates the Arrow arrays of a range of values of the fields from
+            get_arrow_fields.
+
+        :param arrow_fields: The fields from get_arrow_fields.
+        :type  arrow_fields: list
+        :param start: The position of the first value.
+        :type  start: int
+        :param end: The position after the last value.
+        :type  end: int
+
+        :return: A list of Arrow arrays, one for each field.
+        :rtype: list
+        """
+
+        arrays = []
+        for f, f_type, col in arrow_fields:
+            vals = col[start:end]
+            if f_type == pa.int64():
+                missing = np.isnan(vals)
+                arrays.append(pa.array(
+                    np.where(missing, 0, vals).astype(np.int64),
+                    type=f_type, mask=missing))
+            elif f_type == pa.string():
+                arrays.append(pa.array(vals, type=f_type))
+            else:
+                # from_pandas converts NaN and NaT to nulls
+                arrays.append(pa.array(vals, type=f_type,
+                                       from_pandas=True))
+
+        return arrays
+
+    def _write_parquet(self, img_lst, out_fn, row_group_size=50000):
+        """
+        Writes the Images to a GeoParquet file, with the footprints as WKB,
+            a bounding box column for spatial filtering and typed metadata
+            columns. The file is written in row groups of row_group_size
+            Images.
+
+        :param img_lst: An ImageList of images.
+        :type  img_lst: ImageList
+        :param out_fn: The output GeoParquet filename.
+        :type  out_fn: str
+        :param row_group_size: The number of Images per row group.
+        :type  row_group_size: int
+        """
+
+        columns = img_lst.get_columns()
+
+        # The RAPI geometry is replaced by the WKB footprint
+        fields = [f for f in img_lst.get_fields() if not f == 'geometry']
+        arrow_fields = self.get_arrow_fields(columns, fields)
+
+        bbox_type = pa.struct([('xmin', pa.float64()),
+                               ('ymin', pa.float64()),
+                               ('xmax', pa.float64()),
+                               ('ymax', pa.float64())])
+
+        bounds = columns.bounds
+        valid = ~np.isnan(bounds).any(axis=1)
+
+        geo_meta = {
+            "version": "1.1.0",
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": ["Polygon"],
+                    "covering": {
+                        "bbox": {
+                            "xmin": ["bbox", "xmin"],
+                            "ymin": ["bbox", "ymin"],
+                            "xmax": ["bbox", "xmax"],
+                            "ymax": ["bbox", "ymax"]
+                        }
+                    }
+                }
+            }
+        }
+        if valid.any():
+            geo_meta['columns']['geometry']['bbox'] = \
+                [float(v) for v in np.concatenate(
+                    [bounds[valid, :2].min(axis=0),
+                     bounds[valid, 2:].max(axis=0)])]
+
+        schema = pa.schema([(f, f_type) for f, f_type, col in arrow_fields] +
+                           [('bbox', bbox_type),
+                            ('geometry', pa.binary())],
+                           metadata={'geo': json.dumps(geo_meta)})
+
+        with pq.ParquetWriter(out_fn, schema) as writer:
+            for start in range(0, len(columns), row_group_size):
+                end = min(start + row_group_size, len(columns))
+
+                arrays = self.get_arrow_arrays(arrow_fields, start, end)
+
+                chunk_bounds = bounds[start:end]
+                missing = ~valid[start:end]
+                arrays.append(pa.StructArray.from_arrays(
+                    [pa.array(chunk_bounds[:, i], mask=missing)
+                     for i in range(4)],
+                    fields=list(bbox_type), mask=pa.array(missing)))
+
+                wkbs = self.convert_image_geoms(columns.coords[start:end],
+                                                'wkb')
+                arrays.append(pa.array(wkbs, type=pa.binary()))
+
+                writer.write_table(pa.Table.from_arrays(arrays,
+                                                        schema=schema),
+                                   row_group_size=row_group_size)
+
+    def _write_geojson(self, img_lst, out_fn, lyr_name):
+        """
+        Writes the Images to a GeoJSON one feature at a time so the
+            whole FeatureCollection is never held in memory.
+
+        :param img_lst: An ImageList of images.
+        :type  img_lst: ImageList
+        :param out_fn: The output GeoJSON filename.
+        :type  out_fn: str
+        :param lyr_name: The name of the FeatureCollection.
+        :type  lyr_name: str
+        """
+
+        with open(out_fn, 'w', buffering=1024 * 1024) as f:
+            f.write('{"type": "FeatureCollection", "name": %s, '
+                    '"features": [' % json.dumps(lyr_name))
+
+            sep = ''
+            for img in img_lst.get_images():
+                # The footprint is the geometry of the feature; images loaded
+                #   from a results file have it as a string in the metadata
+                props = {k: v for k, v in img.get_metadata().items()
+                         if k != 'geometry'}
+
+                coords = img.get_coords()
+                geom = None
+                if coords is not None:
+                    geom = {"type": "Polygon", "coordinates": coords}
+
                 f_dict = {"type": "Feature",
-                          "properties": mdata,
-                          "geometry": mdata['geometry']}
-                feats.append(f_dict)
+                          "properties": props,
+                          "geometry": geom}
+                f.write(sep)
+                f.write(json.dumps(f_dict))
+                sep = ',\n'
 
-            json_out = {"type": "FeatureCollection",
-                        "name": lyr_name,
-                        "features": feats}
+            f.write(']}')
 
-            with open(out_fn, 'w') as f:
-                json.dump(json_out, f)
+    def get_aoi(self, aoi):
+        """
+        Gets the geometry of an AOI. The AOI is only read once; its features
+            are merged into one geometry which is prepared for the spatial
+            predicates and kept with its area for the next calls.
 
-    def get_overlap(self, img, aoi):
+        :param aoi: The AOI filename.
+        :type  aoi: str
+
+        :return: A dictionary with the AOI geometry ('geom'), the prepared
+                geometry ('prepared') and the area of the AOI ('area').
+        :rtype: dict
+        """
+
+        if aoi in self.aois:
+            return self.aois[aoi]
 
         rapi_geo = EODMSGeo(self.eod.eodms_rapi)
+        aoi_wkts = rapi_geo.convert_to_wkt(aoi, 'file')
+
+        aoi_polys = [shapely.wkt.loads(w) for w in aoi_wkts]
+
+        if SHAPELY_ARRAYS:
+            aoi_geom = shapely.union_all(aoi_polys)
+            shapely.prepare(aoi_geom)
+            prepared = aoi_geom
+        else:
+            aoi_geom = unary_union(aoi_polys)
+            prepared = prep(aoi_geom)
+
+        self.aois[aoi] = {'geom': aoi_geom,
+                          'prepared': prepared,
+                          'area': aoi_geom.area}
+
+        return self.aois[aoi]
+
+    def get_geometry(self, in_geom):
+        """
+        Gets a shapely geometry from a geometry, a WKT or an AOI file.
+
+        :param in_geom: A shapely geometry, a WKT or the filename of an AOI.
+        :type  in_geom: shapely.Geometry or str
+
+        :return: The shapely geometry.
+        :rtype: shapely.Geometry
+        """
+
+        if not isinstance(in_geom, str):
+            return in_geom
+
+        if os.path.exists(in_geom):
+            return self.get_aoi(in_geom)['geom']
+
+        return shapely.wkt.loads(in_geom)
+
+    def create_index(self, geoms):
+        """
+        Creates a spatial index (shapely STRtree) of a set of geometries.
+
+        :param geoms: An array of shapely geometries; None entries are not
+                indexed.
+        :type  geoms: numpy.ndarray
+
+        :return: The STRtree or None if the installed shapely does not
+                support querying the STRtree by index (shapely<2).
+        :rtype: shapely.STRtree
+        """
+
+        if not SHAPELY_ARRAYS:
+            return None
+
+        return shapely.STRtree(geoms)
+
+    def get_overlap(self, img, aoi):
+
+        aoi_info = self.get_aoi(aoi)
 
         img_wkt = self._close_wkt_polygon(img.get_geometry('wkt'))
-        aoi_wkts = rapi_geo.convert_to_wkt(aoi, 'file')
 
         # print("\nimg_wkt: %s" % img_wkt)
-        # print("aoi_wkts: %s" % aoi_wkts)
 
         img_geom = shapely.wkt.loads(img_wkt)
-        aoi_polys = MultiPolygon(map(shapely.wkt.loads, aoi_wkts))
 
         img_area = img_geom.area
-        aoi_area = aoi_polys.area
-        overlap_area = img_geom.intersection(aoi_polys).area
+        aoi_area = aoi_info['area']
+        if aoi_info['prepared'].intersects(img_geom):
+            overlap_area = img_geom.intersection(aoi_info['geom']).area
+        else:
+            overlap_area = 0.0
         overlap_aoi = (overlap_area / aoi_area) * 100
         overlap_img = (overlap_area / img_area) * 100
 
         return overlap_aoi, overlap_img
 
+    def get_overlaps(self, geoms, aoi, candidates=None):
+        """
+        Calculates the overlap between the AOI and a set of footprints in
+            one call.
+
+        :param geoms: An array of shapely geometries (see
+                convert_image_geoms); None entries get NaN overlaps.
+        :type  geoms: numpy.ndarray
+        :param aoi: The AOI filename.
+        :type  aoi: str
+        :param candidates: The positions of the footprints which intersect
+                the AOI (from a spatial index query). If None, every
+                footprint is checked against the AOI.
+        :type  candidates: numpy.ndarray
+
+        :return: Two arrays with the percentage of the AOI covered by each
+                footprint and the percentage of each footprint covered by
+                the AOI.
+        :rtype: tuple
+        """
+
+        aoi_info = self.get_aoi(aoi)
+
+        geoms = np.asarray(geoms, dtype=object)
+        overlap_area = np.zeros(len(geoms))
+
+        if SHAPELY_ARRAYS:
+            img_area = shapely.area(geoms)
+
+            # Only intersect the footprints which touch the AOI
+            if candidates is None:
+                touch = shapely.intersects(aoi_info['geom'], geoms)
+            else:
+                touch = np.zeros(len(geoms), dtype=bool)
+                touch[candidates] = True
+            overlap_area[touch] = shapely.area(
+                shapely.intersection(geoms[touch], aoi_info['geom']))
+        else:
+            img_area = np.full(len(geoms), np.nan)
+            for idx, geom in enumerate(geoms):
+                if geom is None:
+                    continue
+                img_area[idx] = geom.area
+                if aoi_info['prepared'].intersects(geom):
+                    overlap_area[idx] = geom.intersection(
+                        aoi_info['geom']).area
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overlap_aoi = (overlap_area / aoi_info['area']) * 100
+            overlap_img = (overlap_area / img_area) * 100
+
+        overlap_aoi[np.isnan(img_area)] = np.nan
+
+        return overlap_aoi, overlap_img
+
+    def select_coverage(self, geoms, aoi, target=100.0, weights=None):
+        """
+        Selects the footprints which cover the AOI with the least total
+            weight (a greedy weighted set cover). At each step, the
+            footprint which adds the most uncovered AOI area per unit of
+            weight is selected until the target coverage is reached or no
+            footprint adds any area.
+
+        :param geoms: An array of shapely geometries (see
+                convert_image_geoms); None entries are never selected.
+        :type  geoms: numpy.ndarray
+        :param aoi: The AOI filename.
+        :type  aoi: str
+        :param target: The percentage of the AOI to cover.
+        :type  target: float
+        :param weights: The cost of selecting each footprint (1 for every
+                footprint if None).
+        :type  weights: numpy.ndarray
+
+        :return: The positions of the selected footprints (in the order they
+                were selected) and the percentage of the AOI they cover.
+        :rtype: tuple
+        """
+
+        aoi_info = self.get_aoi(aoi)
+        aoi_geom = aoi_info['geom']
+        aoi_area = aoi_info['area']
+
+        geoms = np.asarray(geoms, dtype=object)
+        if weights is None:
+            weights = np.ones(len(geoms))
+
+        # Only the part of each footprint inside the AOI counts
+        if SHAPELY_ARRAYS:
+            touch = np.flatnonzero(shapely.intersects(aoi_geom, geoms))
+            clips = shapely.intersection(geoms[touch], aoi_geom)
+            gains = shapely.area(clips)
+        else:
+            touch = np.array([idx for idx, g in enumerate(geoms)
+                              if g is not None
+                              and aoi_info['prepared'].intersects(g)],
+                             dtype=int)
+            clips = [geoms[idx].intersection(aoi_geom) for idx in touch]
+            gains = np.array([c.area for c in clips])
+
+        # Ignore slivers from rounding when computing the differences
+        min_gain = aoi_area * 1e-9
+
+        # The gain of a footprint can only decrease as more of the AOI is
+        #   covered, so the gains in the heap are only recalculated when a
+        #   footprint reaches the top
+        heap = [(-gain / max(weights[idx], 1e-12), pos)
+                for pos, (idx, gain) in enumerate(zip(touch, gains))
+                if gain > min_gain]
+        heapq.heapify(heap)
+
+        selected = []
+        covered = None
+        covered_area = 0.0
+        while heap and covered_area / aoi_area * 100 < float(target):
+            neg_ratio, pos = heapq.heappop(heap)
+            idx = touch[pos]
+
+            gain = gains[pos] if covered is None \
+                else clips[pos].difference(covered).area
+            if gain <= min_gain:
+                continue
+
+            ratio = gain / max(weights[idx], 1e-12)
+            if heap and ratio < -heap[0][0]:
+                heapq.heappush(heap, (-ratio, pos))
+                continue
+
+            selected.append(idx)
+            covered = clips[pos] if covered is None \
+                else covered.union(clips[pos])
+            covered_area = covered.area
+
+        return np.array(selected, dtype=int), covered_area / aoi_area * 100
+
     def is_wkt(self, in_feat):
         """
         Checks if a string is a valid WKT
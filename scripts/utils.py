@@ -35,6 +35,10 @@ import dateutil.parser as util_parser
 import json
 import glob
 import logging
+import threading
+import itertools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 # from copy import copy
 
 import eodms_rapi as rapi
@@ -54,6 +58,8 @@ from . import csv_util
 from . import image
 from . import spatial
 from . import field
+from . import cache_util
+from . import collection
 
 
 class EodmsUtils:
@@ -76,6 +82,21 @@ class EodmsUtils:
                 max_res (int): The maximum number of results to order.<br>
                 silent (boolean): False to prompt the user and print info,
                     True to suppress it.<br>
+                search_workers (int): The number of searches sent to the
+                    RAPI at the same time.<br>
+                date_shards (int): The number of sub-windows the date
+                    range of a search is split into.<br>
+                query_ttl (float): The number of hours search results
+                    are kept in the cache.<br>
+                query_max_size (float): The maximum size of the search
+                    results cache in MB.<br>
+                catalog_ttl (float): The number of hours the collection
+                    and field information is kept in the cache.<br>
+                results_compression (str): The compression of the
+                    results CSV files, 'gzip', 'zstd' or empty for
+                    none.<br>
+                results_parquet (boolean): True to also save the
+                    results in a Parquet file.<br>
         :type  kwargs: dict
         """
 
@@ -124,6 +145,36 @@ class EodmsUtils:
         if kwargs.get('keep_downloads') is not None:
             self.keep_downloads = str(kwargs.get('keep_downloads'))
 
+        self.results_compression = ""
+        res_comp = kwargs.get('results_compression')
+        if res_comp is not None and not res_comp == '':
+            res_comp = str(res_comp).lower()
+            if res_comp not in ['gzip', 'zstd']:
+                msg = "'results_compression' parameter in the " \
+                      "configuration file must be 'gzip' or 'zstd'. The " \
+                      "results files will not be compressed."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+            elif res_comp == 'zstd' and not csv_util.ZSTD_INCLUDED:
+                msg = "The zstandard Python package is not installed. The " \
+                      "results files will be compressed with gzip."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+                self.results_compression = 'gzip'
+            else:
+                self.results_compression = res_comp
+
+        self.results_parquet = False
+        if kwargs.get('results_parquet') is not None:
+            self.results_parquet = str(kwargs.get('results_parquet')).lower() \
+                in ['true', 'yes', '1']
+            if self.results_parquet and not csv_util.PYARROW_INCLUDED:
+                msg = "The pyarrow Python package is not installed. The " \
+                      "results will only be saved in a CSV file."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+                self.results_parquet = False
+
         self.silent = False
         if kwargs.get('silent') is not None:
             self.silent = bool(kwargs.get('silent'))
@@ -139,6 +190,73 @@ class EodmsUtils:
         if kwargs.get('download_attempts') is not None:
             self.download_attempts = kwargs.get('download_attempts')
 
+        self.search_workers = 4
+        if kwargs.get('search_workers') is not None \
+                and not kwargs.get('search_workers') == '':
+            try:
+                self.search_workers = max(1, int(kwargs.get('search_workers')))
+            except ValueError:
+                msg = "'search_workers' parameter in the configuration " \
+                      "file is not a valid number. 'search_workers' will " \
+                      "be set to 4."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+
+        self.date_shards = 1
+        if kwargs.get('date_shards') is not None \
+                and not kwargs.get('date_shards') == '':
+            try:
+                self.date_shards = max(1, int(kwargs.get('date_shards')))
+            except ValueError:
+                msg = "'date_shards' parameter in the configuration " \
+                      "file is not a valid number. 'date_shards' will " \
+                      "be set to 1."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+
+        query_ttl = 24.0
+        if kwargs.get('query_ttl') is not None \
+                and not kwargs.get('query_ttl') == '':
+            try:
+                query_ttl = float(kwargs.get('query_ttl'))
+            except ValueError:
+                msg = "'query_ttl' parameter in the configuration file is " \
+                      "not a valid number. 'query_ttl' will be set to 24."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+
+        query_max_size = 100.0
+        if kwargs.get('query_max_size') is not None \
+                and not kwargs.get('query_max_size') == '':
+            try:
+                query_max_size = float(kwargs.get('query_max_size'))
+            except ValueError:
+                msg = "'query_max_size' parameter in the configuration " \
+                      "file is not a valid number. 'query_max_size' will " \
+                      "be set to 100."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+
+        self.query_cache = cache_util.QueryCache(ttl=query_ttl,
+                                                 max_size=query_max_size)
+
+        catalog_ttl = 24.0
+        if kwargs.get('catalog_ttl') is not None \
+                and not kwargs.get('catalog_ttl') == '':
+            try:
+                catalog_ttl = float(kwargs.get('catalog_ttl'))
+            except ValueError:
+                msg = "'catalog_ttl' parameter in the configuration file " \
+                      "is not a valid number. 'catalog_ttl' will be set " \
+                      "to 24."
+                self.print_msg(f"WARNING: {msg}")
+                self.logger.warning(msg)
+
+        self.catalog_cache = cache_util.CatalogCache(ttl=catalog_ttl)
+
+        # Stores the EODMSRAPI sessions used by worker threads
+        self._thread_data = threading.local()
+
         if kwargs.get('rapi_url') is not None:
             self.rapi_domain = str(kwargs.get('rapi_url'))
             # self.eodms_rapi.set_root_url(self.rapi_domain)
@@ -168,6 +286,8 @@ class EodmsUtils:
         # self.field_mapper = field.EodFieldMapper(self.eodms_rapi)
         self.field_mapper = None
 
+        self.coll_resolver = None
+
         self.csv_unique = ['recordid', 'record id', 'sequence id']
 
         self.sat_coll_mapping = {'COSMOS-Skymed': ['COSMO-SkyMed1'],
@@ -198,53 +318,38 @@ class EodmsUtils:
         self.attempts = None
         self.output = None
         self.fn_str = None
+        self.query_errors = {}
+
+    def _get_record(self, task):
+        """
+        Gets a single record from the RAPI. Used by _get_eodms_res, either
+            in the main thread or in a worker thread.
+
+        :param task: A tuple containing the Collection ID and the Record ID.
+        :type  task: tuple
+
+        :return: The record(s) returned by the RAPI or an empty list if the
+                record could not be found.
+        :rtype: list
+        """
+
+        coll, rec_id = task
+        rapi = self.get_thread_rapi()
+        res = rapi.get_record(coll, rec_id)
+
+        if res is None:
+            return []
+
+        if isinstance(res, dict) and 'errors' in res.keys():
+            self.logger.warning(f"Record {rec_id} could not be retrieved "
+                                f"from {coll}: {res.get('errors')}")
+            return []
+
+        return res
 
     def _get_collection(self, sat):
 
-        if sat.lower() == 'cosmos-skymed':
-            return ['COSMO-SkyMed1']
-        elif sat.lower() == 'napl':
-            return ['NAPL']
-        elif sat.lower() == 'sgap':
-            return ['SGBAirPhotos']
-        elif sat.lower() == 'rcm':
-            return ['RCMImageProducts', 'RCMScienceData']
-        elif sat.lower() == 'radarsat-1':
-            return ['Radarsat1', 'Radarsat1RawProducts']
-        elif sat.lower() == 'radarsat-2':
-            return ['Radarsat2', 'Radarsat2RawProducts']
-        elif sat.lower().find('terrasar') > -1:
-            return ['TerraSarX']
-        elif sat.lower() == 'dmc':
-            return ['DMC']
-        elif sat.lower() == 'gaofen-1':
-            return ['Gaofen-1']
-        elif sat.lower() == 'geoeye-1':
-            return ['GeoEye-1']
-        elif sat.lower() == 'ikonos':
-            return ['IKONOS']
-        elif sat.lower() == 'irsp6-awifs':
-            return ['IRS']
-        elif sat.lower() == 'planetscope':
-            return ['PlanetScope']
-        elif sat.lower() == 'pleiades':
-            return ['Pleiades']
-        elif sat.lower() == 'quickbird-2':
-            return ['QuickBird-2']
-        elif sat.lower() == 'rapideye':
-            return ['RapidEye']
-        elif sat.lower().find('spot') > -1:
-            return ['SPOT']
-        elif sat.lower() == 'worldview-1':
-            return ['WorldView-1']
-        elif sat.lower() == 'worldview-2':
-            return ['WorldView-2']
-        elif sat.lower() == 'worldview-3':
-            return ['WorldView-3']
-        elif sat.lower() == 'worldview-4':
-            return ['WorldView-4']
-        elif sat.lower().find('alos-2') > -1:
-            return ['ALOS-2']
+        return self.get_coll_resolver().get_sat_collections(sat)
 
     def _parse_dates(self, in_dates):
         """
@@ -381,19 +486,20 @@ class EodmsUtils:
 
         exist_orders = image.OrderList(self)
 
-        img_ids = imgs.get_ids()
+        img_ids = set(str(i) for i in imgs.get_ids())
 
+        rem_ids = []
         for ord_item in orders:
             # Get the record ID of the order item
-            ord_rec_id = ord_item.get('recordId')
+            ord_rec_id = str(ord_item.get('recordId'))
+
+            # If the record ID of an image matches the one of the order item
+            if ord_rec_id in img_ids:
+                if ord_item['status'].upper() in sub_statuses:
+                    exist_orders.add_order(ord_item)
+                    rem_ids.append(ord_rec_id)
 
-            for i in img_ids:
-                # If the record ID of the image matches the one of the
-                #   order item
-                if i == ord_rec_id:
-                    if ord_item['status'].upper() in sub_statuses:
-                        exist_orders.add_order(ord_item)
-                        new_orders.remove_image(i)
+        new_orders.remove_images(rem_ids)
 
         return new_orders, exist_orders
 
@@ -410,7 +516,7 @@ class EodmsUtils:
         """
 
         eodms_csv = csv_util.EODMS_CSV(self, csv_fn)
-        csv_res = eodms_csv.import_eodms_csv()
+        csv_res = eodms_csv.iter_eodms_csv()
 
         ##################################################
         self.print_heading("Retrieving Record IDs for the list of "
@@ -421,60 +527,43 @@ class EodmsUtils:
         sat_recs = {}
 
         if max_images is not None and not max_images == '':
-            csv_res = csv_res[:max_images]
-
-        # Group by satellite
-        for rec in csv_res:
+            csv_res = itertools.islice(csv_res, int(max_images))
 
-            # Get the collection ID for the image
-            satellite = rec.get('satellite')
+        # Only the columns used to find the images are kept from each row
+        keep_cols = ['sequence id', 'photo number', 'photo name']
 
-            rec_lst = []
-            if satellite in sat_recs.keys():
-                rec_lst = sat_recs[satellite]
-
-            rec_lst.append(rec)
+        # Group by satellite
+        total = 0
+        try:
+            for rec in csv_res:
 
-            sat_recs[satellite] = rec_lst
+                # Get the collection ID for the image
+                satellite = rec.get('satellite')
 
-        all_res = []
+                rec = {k: rec[k] for k in keep_cols if k in rec}
+                sat_recs.setdefault(satellite, []).append(rec)
+                total += 1
+        except ValueError as err:
+            err_msg = str(err)
+            self.print_support(True, err_msg)
+            self.logger.error(err_msg)
+            sys.exit(1)
 
-        counter = 0
-        total = len(csv_res)
+        # Determine the candidate collections of each record
+        lookups = []
         for sat, recs in sat_recs.items():
-
-            self.print_msg(f"Getting images for {sat}:", indent=False)
-
-            for idx, rec in enumerate(recs):
-                self.print_msg(f"Getting image {counter + 1} of {total}", False)
-
-                counter += 1
+            sat_colls = {}
+            for rec in recs:
 
                 # If no satellite given, the record is an aerial image
-                if sat is None or sat == '':
+                rec_sat = sat
+                if rec_sat is None or rec_sat == '':
                     if 'photo number' in rec.keys():
-                        sat = 'NAPL'
+                        rec_sat = 'NAPL'
                     elif 'photo name' in rec.keys():
-                        sat = 'sgap'
-
-                res = []
-                if 'sequence id' in rec.keys():
-                    # If Sequence Id is in the CSV file
-                    rec_id = rec.get('sequence id')
-                    if rec_id is None:
-                        rec_id = rec.get('sequence id')
-                    colls = self._get_collection(sat)
-
-                    if rec_id == '':
-                        continue
+                        rec_sat = 'sgap'
 
-                    # Get the results
-                    for coll in colls:
-                        res = self.eodms_rapi.get_record(coll, rec_id)
-                        if len(res) > 0:
-                            break
-
-                else:
+                if 'sequence id' not in rec.keys():
                     msg = "Could not determine a unique field from the " \
                               "CSV results."
                     self.print_msg(msg)
@@ -482,10 +571,68 @@ class EodmsUtils:
                     self.results = image.ImageList(self)
                     return self.results
 
-                if isinstance(res, list):
-                    all_res += res
-                else:
-                    all_res.append(res)
+                rec_id = rec.get('sequence id')
+                if rec_id is None or rec_id == '':
+                    continue
+
+                if rec_sat not in sat_colls:
+                    sat_colls[rec_sat] = self._get_collection(rec_sat) or []
+
+                lookups.append((rec_id, sat_colls[rec_sat]))
+
+        # Send the lookups in rounds, grouped by collection; the records
+        #   not found are tried in their next candidate collection
+        #   (the worker threads and their sessions are used for all the
+        #   rounds)
+        found = [None] * len(lookups)
+        pending = list(range(len(lookups)))
+        attempt = 0
+        with self._get_executor() as executor:
+            while pending:
+                batches = {}
+                for idx in pending:
+                    rec_id, colls = lookups[idx]
+                    if attempt < len(colls):
+                        batches.setdefault(colls[attempt], {})\
+                            .setdefault(rec_id, []).append(idx)
+
+                if not batches:
+                    break
+
+                tasks = [(coll, rec_id) for coll, ids in batches.items()
+                         for rec_id in ids.keys()]
+
+                for coll, ids in batches.items():
+                    self.print_msg(f"Getting {len(ids)} image(s) from the "
+                                   f"{coll} collection")
+
+                outcomes = self.run_concurrent(self._get_record, tasks,
+                                               executor=executor)
+
+                pending = []
+                for (coll, rec_id), res in zip(tasks, outcomes):
+                    for idx in batches[coll][rec_id]:
+                        if len(res) > 0:
+                            found[idx] = res
+                        else:
+                            pending.append(idx)
+
+                pending.sort()
+                attempt += 1
+
+        # Merge the results in the order of the CSV file
+        all_res = []
+        for res in found:
+            if res is None:
+                continue
+
+            if isinstance(res, list):
+                all_res += res
+            else:
+                all_res.append(res)
+
+        self.print_msg(f"{len(all_res)} of {total} images found in the "
+                       f"RAPI.")
 
         # Convert results to ImageList
         self.results = image.ImageList(self)
@@ -505,10 +652,22 @@ class EodmsUtils:
         """
 
         eodms_csv = csv_util.EODMS_CSV(self, csv_fn)
+
+        query_imgs = image.ImageList(self)
+
+        # Use the Parquet results file saved with the CSV, if there is one
+        #   and the CSV has not been changed since it was written
+        parquet_fn = eodms_csv.get_parquet_fn()
+        if csv_util.PYARROW_INCLUDED and os.path.exists(parquet_fn) \
+                and os.path.getmtime(parquet_fn) >= \
+                os.path.getmtime(csv_fn):
+            self.logger.info(f"Importing the results from '{parquet_fn}'.")
+            query_imgs.ingest_columns(eodms_csv.import_parquet())
+            return query_imgs
+
         csv_res = eodms_csv.import_csv()
 
         # Convert results to ImageList
-        query_imgs = image.ImageList(self)
         query_imgs.ingest_results(csv_res, True)
 
         return query_imgs
@@ -629,12 +788,13 @@ class EodmsUtils:
         # Get the raw metadata of the images
         raw_data = filt_imgs.get_raw()
 
+        rem_ids = []
         for img in raw_data:
             rec_id = img.get('recordId')
             coll_id = img.get('collectionId')
             if coll_id in order_disabled:
                 # If the collection for this image is Raw, remove it
-                filt_imgs.remove_image(rec_id)
+                rem_ids.append(rec_id)
                 if coll_id not in already_mentioned:
                     # If not already, inform the user
                     self.print_msg(f"\nCollection {coll_id} cannot be ordered. "
@@ -643,7 +803,7 @@ class EodmsUtils:
                     already_mentioned.append(coll_id)
             if coll_id in cli_order_disabled:
                 # If the collection for this image is NAPL, remove it
-                filt_imgs.remove_image(rec_id)
+                rem_ids.append(rec_id)
                 if coll_id not in already_mentioned:
                     # If not already, inform the user
                     self.print_msg(f"\nCollection {coll_id} cannot be order "
@@ -652,6 +812,8 @@ class EodmsUtils:
                                    f"removed for ordering.")
                     already_mentioned.append(coll_id)
 
+        filt_imgs.remove_images(rem_ids)
+
         return filt_imgs
 
     def _submit_orders(self, imgs, priority=None, max_items=None):
@@ -732,6 +894,330 @@ class EodmsUtils:
 
         return final_orders
 
+    def _get_date_windows(self, dates):
+        """
+        Converts the dates from _parse_dates into start and end datetimes.
+
+        :param dates: A list of date ranges ([{'start': <date>,
+                'end': <date>}]) or time intervals (ex: '24 hours').
+        :type  dates: list
+
+        :return: A list of tuples with the start and end datetime of each
+                range or None if the dates cannot be converted.
+        :rtype: list
+        """
+
+        if dates is None or dates == '' or len(dates) == 0:
+            return None
+
+        date_form = "%Y%m%d_%H%M%S"
+
+        windows = []
+        for rng in dates:
+            if isinstance(rng, str):
+                start = dateparser.parse(rng)
+                end = datetime.datetime.now()
+            else:
+                start = rng.get('start')
+                end = rng.get('end')
+                try:
+                    if not isinstance(start, datetime.datetime):
+                        start = datetime.datetime.strptime(start, date_form)
+                    if not isinstance(end, datetime.datetime):
+                        end = datetime.datetime.strptime(end, date_form)
+                except (TypeError, ValueError):
+                    return None
+
+            if start is None or end is None or end <= start:
+                return None
+
+            windows.append((start, end))
+
+        return windows
+
+    def _split_window(self, start, end, parts):
+        """
+        Splits a date window into a number of equal sub-windows.
+
+        :param start: The start of the window.
+        :type  start: datetime.datetime
+        :param end: The end of the window.
+        :type  end: datetime.datetime
+        :param parts: The number of sub-windows.
+        :type  parts: int
+
+        :return: A list of tuples with the start and end of each sub-window.
+        :rtype: list
+        """
+
+        step = (end - start) / parts
+
+        windows = []
+        for idx in range(parts):
+            sub_start = start + step * idx
+            sub_end = end if idx == parts - 1 else start + step * (idx + 1)
+            windows.append((sub_start.replace(microsecond=0),
+                            sub_end.replace(microsecond=0)))
+
+        return windows
+
+    def _search_sharded(self, queries, shards):
+        """
+        Sends the collection queries to the EODMSRAPI split into date
+            sub-windows. Any sub-window which returns max_results images is
+            split in 2 and searched again until the window is too small.
+
+        :param queries: A list of query dictionaries (see _search_collection).
+        :type  queries: list
+        :param shards: The number of sub-windows for each date range.
+        :type  shards: int
+
+        :return: A list of tuples with the records (unique by recordId)
+                and the error message of each query.
+        :rtype: list
+        """
+
+        date_form = "%Y%m%d_%H%M%S"
+        min_span = datetime.timedelta(minutes=1)
+        cap = self.max_results
+
+        shard_res = [[] for _ in queries]
+        shard_errs = [[] for _ in queries]
+
+        # Create the sub-window queries for each collection query
+        pending = []
+        for idx, query in enumerate(queries):
+            windows = self._get_date_windows(query.get('dates'))
+
+            if windows is None:
+                # The dates cannot be split so send the query as is
+                pending.append((idx, None, query))
+                continue
+
+            for start, end in windows:
+                for window in self._split_window(start, end, shards):
+                    pending.append((idx, window, query))
+
+        # The same worker threads are used for every round of sub-windows
+        #   so each thread only logs in to the RAPI once
+        with self._get_executor() as executor:
+            while len(pending) > 0:
+
+                shard_queries = []
+                for idx, window, query in pending:
+                    if window is None:
+                        shard_queries.append(query)
+                        continue
+
+                    shard_query = dict(query)
+                    shard_query['dates'] = [
+                        {'start': window[0].strftime(date_form),
+                         'end': window[1].strftime(date_form)}]
+                    shard_query['max_results'] = cap
+                    shard_query['shard'] = True
+                    shard_queries.append(shard_query)
+
+                outcomes = self.run_concurrent(self._search_collection,
+                                               shard_queries,
+                                               executor=executor)
+
+                next_pending = []
+                for (idx, window, query), (res, err) in zip(pending,
+                                                            outcomes):
+                    if err is not None:
+                        shard_errs[idx].append(err)
+
+                    if window is not None and len(res) >= cap:
+                        start, end = window
+                        if end - start > min_span:
+                            # The window reached the limit, search each half
+                            for sub_window in self._split_window(start,
+                                                                 end, 2):
+                                next_pending.append((idx, sub_window,
+                                                     query))
+                            continue
+
+                        msg = f"The search for collection " \
+                              f"'{query['collection']}' between " \
+                              f"{start} and {end} returned the maximum of " \
+                              f"{cap} images; some images may be missing."
+                        self.print_msg(f"WARNING: {msg}")
+                        self.logger.warning(msg)
+
+                    shard_res[idx].append((window, res))
+
+                pending = next_pending
+
+        outcomes = []
+        for results, errs in zip(shard_res, shard_errs):
+            # Sort the sub-windows by date so the order is the same for
+            #   every run
+            results.sort(key=lambda r: r[0][0] if r[0] is not None
+                         else datetime.datetime.min)
+
+            rec_ids = set()
+            coll_res = []
+            for window, res in results:
+                for r in res:
+                    rec_id = r.get('recordId')
+                    if rec_id in rec_ids:
+                        continue
+                    rec_ids.add(rec_id)
+                    coll_res.append(r)
+
+            err = '; '.join(errs) if len(errs) > 0 else None
+            outcomes.append((coll_res, err))
+
+        return outcomes
+
+    def _get_result_fields(self, rapi, coll_id):
+        """
+        Gets the titles of the result fields of a collection. The fields
+            stored with the collection information are used if available,
+            otherwise they are requested from the RAPI.
+
+        :param rapi: The EODMSRAPI instance.
+        :type  rapi: eodms_rapi.EODMSRAPI
+        :param coll_id: The Collection ID.
+        :type  coll_id: str
+
+        :return: A list of result field titles or None if the fields could
+                not be retrieved.
+        :rtype: list
+        """
+
+        coll_info = rapi.rapi_collections.get(coll_id)
+        if isinstance(coll_info, dict):
+            fields = coll_info.get('fields')
+            if isinstance(fields, dict) and \
+                    isinstance(fields.get('results'), dict):
+                return list(fields['results'].keys())
+
+        av_fields = rapi.get_available_fields(coll_id, 'title')
+
+        if av_fields is None:
+            return None
+
+        return av_fields['results']
+
+    def _search_collection(self, query):
+        """
+        Sends a single collection query to the EODMSRAPI. Used by
+            query_entries, either in the main thread or in a worker thread.
+
+        :param query: A dictionary with the search parameters ('collection',
+                'filters', 'features', 'aoi', 'dates', 'max_results' and
+                'cache', which is either 'use', 'refresh' or 'bypass').
+        :type  query: dict
+
+        :return: A tuple containing the list of records returned by the RAPI
+                and an error message (None if the search succeeded).
+        :rtype: tuple
+        """
+
+        coll_id = query.get('collection')
+        filt_parse = query.get('filters')
+        rapi = self.get_thread_rapi()
+
+        try:
+            result_fields = []
+            if filt_parse is not None:
+                av_fields = self._get_result_fields(rapi, coll_id)
+
+                if av_fields is None:
+                    return [], "Could not get the available fields of " \
+                               "the collection."
+
+                for k in filt_parse.keys():
+                    if k in av_fields:
+                        result_fields.append(k)
+
+            # Check the cache for the same search
+            cache_mode = query.get('cache', 'use')
+            cache_key = None
+            if not cache_mode == 'bypass' and self.query_cache.enabled() \
+                    and not any(isinstance(d, str)
+                                for d in (query.get('dates') or [])):
+                # Searches with a time interval (ex: '24 hours') depend on
+                #   the current time so they are not cached
+                cache_key = self.query_cache.make_key(
+                    collection=coll_id, filters=filt_parse,
+                    aoi=query.get('aoi'), dates=query.get('dates'),
+                    result_fields=result_fields,
+                    max_results=query.get('max_results'))
+
+                if cache_mode == 'use':
+                    res = self.query_cache.get(cache_key)
+                    if res is not None:
+                        print(f"\nUsing {len(res)} cached {coll_id} "
+                              f"images for the search with dates "
+                              f"{query.get('dates')}.")
+                        return res, None
+
+            # Print the whole message at once so the parameters of
+            #   concurrent searches are not mixed together
+            if query.get('shard'):
+                print(f"\nSending query to EODMSRAPI for collection "
+                      f"{coll_id} from {query['dates'][0]['start']} to "
+                      f"{query['dates'][0]['end']}")
+            else:
+                print(f"\nSending query to EODMSRAPI with the following "
+                      f"parameters:\n"
+                      f"  collection: {coll_id}\n"
+                      f"  filters: {filt_parse}\n"
+                      f"  features: {query.get('features')}\n"
+                      f"  dates: {query.get('dates')}\n"
+                      f"  resultFields: {result_fields}\n"
+                      f"  maxResults: {query.get('max_results')}")
+
+            # The EODMSRAPI keeps a cumulative list of results, clear it so
+            #   only the results of this collection are returned
+            if rapi is self.eodms_rapi:
+                rapi.clear_results()
+            else:
+                rapi.reset()
+
+            # The EODMSRAPI keeps the dates of its previous search when
+            #   none are given, so an empty list is sent instead of None
+            dates = query.get('dates')
+            if not dates:
+                dates = []
+
+            search_res = rapi.search(coll_id, filt_parse,
+                                     query.get('features'), dates,
+                                     result_fields,
+                                     query.get('max_results'))
+
+            if search_res is None:
+                err_msg = getattr(rapi, 'err_msg', None)
+                if err_msg is None or err_msg == '':
+                    err_msg = "The RAPI did not return any results."
+                return [], err_msg
+
+            # The RAPI returns the messages of a failed query in a dict
+            if isinstance(search_res, dict) and 'errors' in search_res.keys():
+                err_msg = search_res.get('errors')
+                if isinstance(err_msg, list):
+                    err_msg = '; '.join([str(e) for e in err_msg])
+                return [], str(err_msg)
+
+            res = rapi.get_results()
+
+        except Exception as err:
+            return [], str(err)
+
+        errors = [r.get('errors') for r in res
+                  if isinstance(r, dict) and 'errors' in r.keys()]
+        if len(errors) > 0:
+            err_msg = '; '.join([str(e) for e in errors])
+            res = [r for r in res if 'errors' not in r.keys()]
+            return res, err_msg
+
+        if cache_key is not None:
+            self.query_cache.put(cache_key, res)
+
+        return res, None
+
     def check_error(self, item):
 
         if item is None:
@@ -854,6 +1340,27 @@ class EodmsUtils:
             self.eodms_rapi.set_root_url(self.rapi_domain)
 
         self.field_mapper = field.EodFieldMapper(self, self.eodms_rapi)
+        self.coll_resolver = None
+
+    def create_rapi_session(self):
+        """
+        Creates a new EODMSRAPI instance with the same credentials and
+            collection information as the main session. An EODMSRAPI keeps
+            its last results as state so each worker thread needs its own.
+
+        :return: The new EODMSRAPI instance.
+        :rtype: eodms_rapi.EODMSRAPI
+        """
+
+        rapi = EODMSRAPI(self.username, self.password)
+
+        if self.rapi_domain is not None:
+            rapi.set_root_url(self.rapi_domain)
+
+        # Share the collection information so it is not requested again
+        rapi.rapi_collections = dict(self.eodms_rapi.rapi_collections)
+
+        return rapi
 
     def download_aws(self, aws_imgs):
         """
@@ -930,6 +1437,10 @@ class EodmsUtils:
 
         # Create EODMS_CSV object to export results
         res_fn = os.path.join(self.results_path, f"{self.fn_str}_Results.csv")
+        if self.results_compression == 'gzip':
+            res_fn += '.gz'
+        elif self.results_compression == 'zstd':
+            res_fn += '.zst'
         res_csv = csv_util.EODMS_CSV(self, res_fn)
 
         res_csv.export_results(self.cur_res)
@@ -937,6 +1448,9 @@ class EodmsUtils:
         msg = f"Results exported to '{res_fn}'."
         self.print_msg(msg, indent=False)
 
+        if self.results_parquet:
+            res_csv.export_parquet(self.cur_res)
+
     def export_records(self, csv_f, header, records):
         """
         Exports a set of records to a CSV.
@@ -979,11 +1493,7 @@ class EodmsUtils:
         if isinstance(in_title, list):
             in_title = in_title[0]
 
-        for k, v in self.eodms_rapi.get_collections().items():
-            if v['title'].find(in_title) > -1:
-                return k
-
-        return self.get_full_collid(in_title)
+        return self.get_coll_resolver().get_collid_by_title(in_title)
 
     def get_full_collid(self, coll_id):
         """
@@ -993,14 +1503,52 @@ class EodmsUtils:
         :param coll_id: The collection ID to check.
         :type  coll_id: str
             
-        :return: The full Collection ID.
+        :return: The full Collection ID or the input collection ID if no
+                collection matches it.
         :rtype: str
         """
 
-        collections = self.eodms_rapi.get_collections()
-        for k, v in collections.items():
-            if k.find(coll_id) > -1 or v['title'].find(coll_id) > -1:
-                return k
+        full_id = self.get_coll_resolver().get_collid(coll_id)
+
+        if full_id is None:
+            return coll_id
+
+        return full_id
+
+    def get_coll_resolver(self):
+        """
+        Gets the CollectionResolver of the current session, creating it
+            from the collections of the RAPI if it does not exist.
+
+        :return: The CollectionResolver.
+        :rtype: collection.CollectionResolver
+        """
+
+        if self.coll_resolver is None:
+            self.coll_resolver = collection.CollectionResolver(
+                self.eodms_rapi.get_collections(), self.sat_coll_mapping)
+
+        return self.coll_resolver
+
+    def get_thread_rapi(self):
+        """
+        Gets the EODMSRAPI instance for the current thread. The main thread
+            uses the main session while each worker thread gets its own
+            session which is reused for the life of the thread.
+
+        :return: The EODMSRAPI instance of the current thread.
+        :rtype: eodms_rapi.EODMSRAPI
+        """
+
+        if threading.current_thread() is threading.main_thread():
+            return self.eodms_rapi
+
+        rapi = getattr(self._thread_data, 'rapi', None)
+        if rapi is None:
+            rapi = self.create_rapi_session()
+            self._thread_data.rapi = rapi
+
+        return rapi
 
     def get_input_fields(self, in_csv):
         """
@@ -1238,6 +1786,13 @@ class EodmsUtils:
                 - dates (list): A list of date ranges 
                     ([{'start': <date>, 'end': <date>}]).
                 - max_images (int): The maximum number of images to query.
+                - shards (int): The number of sub-windows the dates are
+                    split into (overrides date_shards); only used when
+                    max_images is not set.
+                - use_cache (bool): False to bypass the search results
+                    cache (default True).
+                - refresh_cache (bool): True to send the searches to the
+                    RAPI and replace their cached results.
         :type  kwargs: dict
         
         :return: The ImageList object containing the results of the query.
@@ -1248,12 +1803,28 @@ class EodmsUtils:
         aoi = kwargs.get('aoi')
         dates = kwargs.get('dates')
         max_images = kwargs.get('max_images')
+        shards = kwargs.get('shards')
+        if shards is None:
+            shards = self.date_shards
+
+        # Determine how the search results cache is used
+        cache_mode = 'use'
+        if kwargs.get('use_cache') is False:
+            cache_mode = 'bypass'
+        elif kwargs.get('refresh_cache'):
+            cache_mode = 'refresh'
 
         feats = None
         if aoi is not None:
             feats = [('INTERSECTS', aoi)]
 
-        all_res = []
+        # Map the fields of the filtered collections at the same time
+        if filters:
+            self.field_mapper.prefetch(filters.keys())
+
+        # Build the query for each collection
+        queries = []
+        self.query_errors = {}
         for coll in collections:
 
             # Get the full Collection ID
@@ -1267,7 +1838,7 @@ class EodmsUtils:
 
                 if self.coll_id in filters.keys():
                     coll_filts = filters[self.coll_id]
-                    filt_parse = self._parse_filters(coll_filts)
+                    filt_parse = self._parse_filters(coll_filts, self.coll_id)
                     if isinstance(filt_parse, str):
                         filt_parse = None
                 else:
@@ -1278,41 +1849,91 @@ class EodmsUtils:
             if self.coll_id == 'NAPL':
                 filt_parse = {'Price': ('=', True)}
 
-            result_fields = []
-            if filt_parse is not None:
-                av_fields = self.eodms_rapi.get_available_fields(self.coll_id,
-                                                                 'title')
-
-                if av_fields is None:
-                    return None
-
-                for k in filt_parse.keys():
-                    if k in av_fields['results']:
-                        result_fields.append(k)
-
-            # Send a query to the EODMSRAPI object
-            print(f"\nSending query to EODMSRAPI with the following "
-                  f"parameters:")
-            print(f"  collection: {self.coll_id}")
-            print(f"  filters: {filt_parse}")
-            print(f"  features: {feats}")
-            print(f"  dates: {dates}")
-            print(f"  resultFields: {result_fields}")
-            print(f"  maxResults: {max_images}")
-            self.eodms_rapi.search(self.coll_id, filt_parse, feats, dates,
-                                   result_fields, max_images)
+            queries.append({'collection': self.coll_id,
+                            'filters': filt_parse,
+                            'features': feats,
+                            'aoi': aoi,
+                            'dates': dates,
+                            'max_results': max_images,
+                            'cache': cache_mode})
+
+        # Send the queries to the EODMSRAPI, the results are returned in
+        #   the same order as the queries
+        if shards > 1 and (max_images is None or max_images == ''):
+            outcomes = self._search_sharded(queries, shards)
+        else:
+            outcomes = self.run_concurrent(self._search_collection, queries)
 
-            res = self.eodms_rapi.get_results()
+        all_res = []
+        for query, (res, err) in zip(queries, outcomes):
+            if err is not None:
+                self.query_errors[query['collection']] = err
 
             # Add this collection's results to all results
             all_res += res
 
+        for coll_id, err in self.query_errors.items():
+            msg = f"The search for collection '{coll_id}' failed: {err}"
+            self.print_msg(f"WARNING: {msg}")
+            self.logger.warning(msg)
+
         # Convert results to ImageList
         query_imgs = image.ImageList(self)
         query_imgs.ingest_results(all_res)
 
         return query_imgs
 
+    def _get_executor(self):
+        """
+        Gets a pool of worker threads to share over several calls of
+            run_concurrent. No pool is created if only one search worker is
+            used, in which case the items are run in the main thread.
+
+        :return: A context manager giving the ThreadPoolExecutor (or None).
+        :rtype: concurrent.futures.ThreadPoolExecutor or
+                contextlib.nullcontext
+        """
+
+        if self.search_workers <= 1:
+            return contextlib.nullcontext()
+
+        return ThreadPoolExecutor(max_workers=self.search_workers)
+
+    def run_concurrent(self, func, items, workers=None, executor=None):
+        """
+        Runs a function on a list of items using a pool of worker threads.
+
+        :param func: The function to run for each item.
+        :type  func: function
+        :param items: The list of items.
+        :type  items: list
+        :param workers: The maximum number of worker threads; if None, the
+                search_workers value from the configuration is used.
+        :type  workers: int
+        :param executor: A ThreadPoolExecutor to use instead of creating a
+                new one, so its threads (and their EODMSRAPI sessions) are
+                reused over several calls.
+        :type  executor: concurrent.futures.ThreadPoolExecutor
+
+        :return: The results of the function in the same order as the items.
+        :rtype: list
+        """
+
+        if workers is None:
+            workers = self.search_workers
+
+        items = list(items)
+
+        if workers <= 1 or len(items) <= 1:
+            return [func(i) for i in items]
+
+        if executor is not None:
+            return list(executor.map(func, items))
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) \
+                as executor:
+            return list(executor.map(func, items))
+
     def set_attempts(self, attempts):
         """
         Sets the number of attempts for query the EODMSRAPI.
@@ -1529,6 +2150,57 @@ class EodmsProcess(EodmsUtils):
 
         super().__init__(**kwargs)
 
+    def _select_coverage(self, img_lst, aoi, coverage, date_bin=None,
+                         weight=None):
+        """
+        Keeps the fewest images which cover the AOI to a target percentage.
+
+        :param img_lst: The ImageList of the search results.
+        :type  img_lst: image.ImageList
+        :param aoi: The AOI filename.
+        :type  aoi: str
+        :param coverage: The percentage of the AOI to cover.
+        :type  coverage: str or float
+        :param date_bin: If set, the AOI is covered for each 'day', 'week',
+                'month' or 'year'.
+        :type  date_bin: str
+        :param weight: A numeric metadata field used as the cost of each
+                image.
+        :type  weight: str
+        """
+
+        try:
+            coverage = float(coverage)
+        except ValueError:
+            msg = f"The coverage '{coverage}' is not a valid percentage. " \
+                  f"All images will be kept."
+            self.print_msg(f"WARNING: {msg}")
+            self.logger.warning(msg)
+            return
+
+        if date_bin == '':
+            date_bin = None
+        if weight == '':
+            weight = None
+
+        try:
+            coverage_res = img_lst.select_coverage(aoi, coverage, date_bin,
+                                                   weight)
+        except ValueError as err:
+            msg = f"{err} All images will be kept."
+            self.print_msg(f"WARNING: {msg}")
+            self.logger.warning(msg)
+            return
+
+        for key, covered in coverage_res.items():
+            # Allow for rounding in the areas
+            if covered < coverage - 1e-6:
+                msg = f"The images only cover {covered:.2f}% of the AOI"
+                if not key == 'all':
+                    msg += f" for {key}"
+                self.print_msg(f"WARNING: {msg}.")
+                self.logger.warning(msg)
+
     def search_order_download(self, params):
         """
         Runs all steps: querying, ordering and downloading
@@ -1552,6 +2224,11 @@ class EodmsProcess(EodmsUtils):
         priority = params.get('priority')
         aws_download = params.get('aws')
         no_order = params.get('no_order')
+        no_cache = params.get('no_cache')
+        refresh_cache = params.get('refresh_cache')
+        coverage = params.get('coverage')
+        coverage_bin = params.get('coverage_bin')
+        coverage_weight = params.get('coverage_weight')
 
         # Validate AOI
         if aoi is not None:
@@ -1592,7 +2269,9 @@ class EodmsProcess(EodmsUtils):
         # Send query to EODMSRAPI
         query_imgs = self.query_entries(collections, filters=filters,
                                         aoi=aoi, dates=dates,
-                                        max_images=max_images)
+                                        max_images=max_images,
+                                        use_cache=not no_cache,
+                                        refresh_cache=refresh_cache)
 
         # print("#1")
 
@@ -1602,6 +2281,13 @@ class EodmsProcess(EodmsUtils):
                 and not aoi == '':
             query_imgs.filter_overlap(overlap, aoi)
 
+        if coverage is not None \
+                and not coverage == '' \
+                and aoi is not None \
+                and not aoi == '':
+            self._select_coverage(query_imgs, aoi, coverage, coverage_bin,
+                                  coverage_weight)
+
         # print("#2")
 
         # If no results were found, inform user and end process
@@ -1983,6 +2669,8 @@ class EodmsProcess(EodmsUtils):
         maximum = params.get('maximum')
         self.output = params.get('output')
         # priority = params.get('priority')
+        no_cache = params.get('no_cache')
+        refresh_cache = params.get('refresh_cache')
 
         # Validate AOI
         if aoi is not None:
@@ -2026,7 +2714,9 @@ class EodmsProcess(EodmsUtils):
 
         # Send query to EODMSRAPI
         query_imgs = self.query_entries(collections, filters=filters,
-                                        aoi=aoi, dates=dates)
+                                        aoi=aoi, dates=dates,
+                                        use_cache=not no_cache,
+                                        refresh_cache=refresh_cache)
 
         if overlap is not None \
                 and not overlap == '' \
@@ -0,0 +1,75 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Test Records'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Creates image records like the ones returned by the RAPI ' \
+                  'for the tests of the EODMS-CLI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+
+def make_records(count, start_id=1000, start_x=-75.0,
+                 collections=('RCMImageProducts',)):
+    """
+    Creates records like the ones returned by the RAPI. Each footprint is
+        1.5 degrees wide and 1 degree high (so it is not symmetric in x and
+        y) and starts 1 degree east of the previous one.
+
+    :param count: The number of records.
+    :type  count: int
+    :param start_id: The Record Id of the first record.
+    :type  start_id: int
+    :param start_x: The longitude of the west side of the first footprint.
+    :type  start_x: float
+    :param collections: The Collection Ids, used in turn by the records.
+    :type  collections: tuple
+
+    :return: A list of records.
+    :rtype: list
+    """
+
+    records = []
+    for idx in range(count):
+        x = start_x + idx
+        records.append({
+            'recordId': str(start_id + idx),
+            'collectionId': collections[idx % len(collections)],
+            'geometry': {'type': 'Polygon',
+                         'coordinates': [[[x, 45.0], [x + 1.5, 45.0],
+                                          [x + 1.5, 46.0], [x, 46.0],
+                                          [x, 45.0]]]},
+            'metadata': [['Title', f"Image {idx}"],
+                         ['Beam Mnemonic', '16M11'],
+                         ['Version', str(idx % 2 + 3)],
+                         ['Order Key', '007'],
+                         ['Incidence Angle', '35.25'],
+                         ['Acquisition Start Date',
+                          f"2023-01-{idx + 1:02d} 12:30:00 GMT"]]})
+
+    return records
@@ -0,0 +1,259 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Cache Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the search cache of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import eodms_rapi
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from scripts import cache_util
+from scripts import field
+from scripts import utils as eod_util
+
+
+class StubRapi:
+    """
+    Stands in for the EODMSRAPI, returning the given search response.
+    """
+
+    response = 1
+    records = []
+
+    def __init__(self, *args, **kwargs):
+        self.results = []
+        self.err_msg = None
+        self.dates = None
+
+    def clear_results(self):
+        self.results = []
+
+    def reset(self):
+        self.results = []
+
+    def search(self, collection, filters=None, features=None, dates=None,
+               result_fields=None, max_results=None):
+        self.dates = dates
+        self.results = list(self.records)
+        return self.response
+
+    def get_results(self, form='raw'):
+        return self.results
+
+
+class TestQueryCache(unittest.TestCase):
+
+    query = {'collection': 'RCMImageProducts',
+             'filters': None,
+             'features': None,
+             'aoi': None,
+             'dates': [{'start': '20230101_000000',
+                        'end': '20230201_000000'}],
+             'max_results': None,
+             'cache': 'use'}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        with patch.object(eod_util, 'EODMSRAPI', StubRapi):
+            self.eod = eod_util.EodmsProcess(username='user',
+                                             password='pass')
+
+        self.eod.query_cache = cache_util.QueryCache(
+            cache_path=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _get_key(self):
+        return self.eod.query_cache.make_key(
+            collection=self.query['collection'], filters=None, aoi=None,
+            dates=self.query['dates'], result_fields=[], max_results=None)
+
+    def test_search_cached(self):
+        self.eod.eodms_rapi.records = [{'recordId': '1'}]
+
+        res, err = self.eod._search_collection(self.query)
+
+        self.assertIsNone(err)
+        self.assertEqual(res, [{'recordId': '1'}])
+        self.assertEqual(self.eod.query_cache.get(self._get_key()), res)
+
+    def test_failed_search_not_cached(self):
+        self.eod.eodms_rapi.response = {'errors': ['400 Client Error',
+                                                   'Bad Request']}
+
+        res, err = self.eod._search_collection(self.query)
+
+        self.assertEqual(res, [])
+        self.assertEqual(err, '400 Client Error; Bad Request')
+        self.assertIsNone(self.eod.query_cache.get(self._get_key()))
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_search_without_dates(self):
+        self.eod._search_collection(self.query)
+        self.assertEqual(self.eod.eodms_rapi.dates, self.query['dates'])
+
+        # The dates of the previous search are not sent again
+        query = dict(self.query)
+        query['dates'] = None
+        self.eod._search_collection(query)
+        self.assertEqual(self.eod.eodms_rapi.dates, [])
+
+    def test_concurrent_put(self):
+        records = [{'recordId': str(i)} for i in range(500)]
+
+        def put(idx):
+            self.eod.query_cache.put('same_key', records)
+
+        self.eod.run_concurrent(put, range(16), workers=8)
+
+        self.assertEqual(self.eod.query_cache.get('same_key'), records)
+        self.assertEqual(os.listdir(self.tmp_dir.name),
+                         ['same_key.json.gz'])
+
+
+class CatalogRapi(StubRapi):
+    """
+    Stands in for the EODMSRAPI, returning the current collections with
+        their fields and counting the requests for the fields.
+    """
+
+    rapi_root = 'https://www.eodms-sgdot.nrcan-rncan.gc.ca/wes/rapi'
+    ui_field_map = {'RCMImageProducts': ['RCM.BEAM']}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rapi_collections = {}
+        self.err_occurred = False
+        self.field_requests = []
+
+    def set_root_url(self, url):
+        pass
+
+    def _make_fields(self, coll_id):
+        return {'results': {},
+                'search': {'Beam Mnemonic': {'id': f"{coll_id}.BEAM",
+                                             'datatype': 'String'},
+                           'Image Id': {'id': f"{coll_id}.IMAGE_ID",
+                                        'datatype': 'String'}}}
+
+    def get_collections(self, as_list=False, opt='id', redo=False):
+        # The RAPI returns the fields of every collection with the
+        #   collections
+        self.rapi_collections = {
+            'RCMImageProducts': {'title': 'RCM Image Products',
+                                 'aliases': ['rcm'],
+                                 'fields': self._make_fields('RCM')},
+            'Radarsat2': {'title': 'RADARSAT-2', 'aliases': ['r2'],
+                          'fields': self._make_fields('Radarsat2')}}
+        if as_list:
+            return list(self.rapi_collections.keys())
+        return self.rapi_collections
+
+    def get_available_fields(self, coll_id, name_type='all',
+                             ui_fields=False):
+        self.field_requests.append(coll_id)
+        return self._make_fields(coll_id)
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        with patch.object(eod_util, 'EODMSRAPI', CatalogRapi):
+            self.eod = eod_util.EodmsProcess(username='user',
+                                             password='pass')
+
+        self.cache = cache_util.CatalogCache(
+            cache_fn=os.path.join(self.tmp_dir.name, 'catalog.json.gz'),
+            ttl=1)
+        self.eod.catalog_cache = self.cache
+        self.owner = self.cache.make_owner(
+            'user', CatalogRapi.rapi_root,
+            getattr(eodms_rapi, '__version__', ''))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cold_fields(self):
+        # No catalog in the cache
+        mapper = field.EodFieldMapper(self.eod, self.eod.eodms_rapi)
+
+        rcm_fields = mapper.get_fields('RCM')
+        self.assertEqual(rcm_fields.get_eod_fieldnames(), ['BEAM_MNEMONIC'])
+        r2_fields = mapper.get_fields('Radarsat2')
+        self.assertEqual(r2_fields.get_eod_fieldnames(),
+                         ['BEAM_MNEMONIC', 'IMAGE_IDENTIFICATION'])
+
+        mapper.prefetch(['RCMImageProducts', 'Radarsat2'])
+
+        self.assertEqual(self.eod.eodms_rapi.field_requests, [])
+
+    def test_refresh_not_overwritten(self):
+        # A catalog older than the TTL with old fields
+        stale = time.time() - 7200
+        self.cache.save(self.owner,
+                        {'RCMImageProducts': {'title': 'RCM Image Products',
+                                              'aliases': ['rcm']},
+                         'Radarsat2': {'title': 'RADARSAT-2',
+                                       'aliases': ['r2']}},
+                        {'RCMImageProducts': {'Old Field': {
+                            'id': 'RCMImageProducts.OLD',
+                            'datatype': 'String'}}}, stale)
+
+        with patch.object(eod_util, 'EODMSRAPI', CatalogRapi):
+            mapper = field.EodFieldMapper(self.eod, self.eod.eodms_rapi)
+            mapper._refresh_thread.join()
+
+        # Requesting the fields of another collection saves the catalog
+        #   in this thread
+        mapper.get_fields('Radarsat2')
+
+        catalog = self.cache.load(self.owner)
+        self.assertGreater(catalog['created'], stale)
+        self.assertIn('Beam Mnemonic', catalog['fields']['RCMImageProducts'])
+        self.assertIn('Radarsat2', catalog['fields'])
+
+
+if __name__ == '__main__':
+    unittest.main()
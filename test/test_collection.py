@@ -0,0 +1,104 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Collection Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the collection names of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from scripts import collection
+from scripts import utils as eod_util
+
+
+class TestCollectionResolver(unittest.TestCase):
+
+    collections = {'RCMImageProducts': {'title': 'RCM Image Products',
+                                        'aliases': ['rcm']},
+                   'RCMScienceData': {'title': 'RCM Science Data',
+                                      'aliases': []},
+                   'Radarsat2': {'title': 'RADARSAT-2',
+                                 'aliases': ['r2', 'rs2', 'radarsat-2']},
+                   'TerraSarX': {'title': 'TerraSAR-X', 'aliases': []}}
+
+    def setUp(self):
+        with patch.object(eod_util, 'EODMSRAPI'):
+            self.eod = eod_util.EodmsProcess(username='user',
+                                             password='pass')
+
+        self.resolver = collection.CollectionResolver(
+            self.collections, self.eod.sat_coll_mapping)
+        self.eod.coll_resolver = self.resolver
+
+    def test_collid(self):
+        self.assertEqual(self.resolver.get_collid('Radarsat2'), 'Radarsat2')
+        self.assertEqual(self.resolver.get_collid('RS2'), 'Radarsat2')
+        self.assertEqual(self.resolver.get_collid('RCM Science Data'),
+                         'RCMScienceData')
+        self.assertEqual(self.resolver.get_collid('Science'),
+                         'RCMScienceData')
+
+    def test_title(self):
+        self.assertEqual(self.resolver.get_collid_by_title('RADARSAT-2'),
+                         'Radarsat2')
+        # The first collection whose title contains the name
+        self.assertEqual(self.resolver.get_collid_by_title('RCM'),
+                         'RCMImageProducts')
+        self.assertEqual(self.eod.get_collid_by_name(['TerraSAR']),
+                         'TerraSarX')
+
+    def test_unknown(self):
+        self.assertIsNone(self.resolver.get_collid('Landsat8'))
+        self.assertIsNone(self.eod.get_collid_by_name('Landsat8'))
+
+        # The input ID is kept when no collection matches it
+        self.assertEqual(self.eod.get_full_collid('Landsat8'), 'Landsat8')
+        self.assertEqual(self.eod.get_full_collid('RCM'),
+                         'RCMImageProducts')
+
+    def test_sat_collections(self):
+        self.assertEqual(self.resolver.get_sat_collections('RCM'),
+                         ['RCMImageProducts', 'RCMScienceData'])
+        self.assertEqual(self.eod._get_collection('radarsat-2'),
+                         ['Radarsat2', 'Radarsat2RawProducts'])
+        self.assertEqual(self.resolver.get_sat_collections('TerraSAR-X 1'),
+                         ['TerraSarX'])
+        self.assertIsNone(self.resolver.get_sat_collections('Landsat-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Image Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the image lists of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from scripts import image
+from scripts import spatial
+
+import record_util
+
+
+def make_records(count):
+    """
+    Creates records with Record Ids starting at 0, alternating between 2
+        collections.
+    """
+
+    return record_util.make_records(
+        count, start_id=0, start_x=0.0,
+        collections=('RCMImageProducts', 'Radarsat2'))
+
+
+class TestImageList(unittest.TestCase):
+
+    def setUp(self):
+        self.img_lst = image.ImageList(Mock())
+        self.img_lst.ingest_results(make_records(5))
+
+    def _count_unparsed(self):
+        return len([img for img in self.img_lst.get_images()
+                    if img._raw is not None])
+
+    def test_trim(self):
+        self.img_lst.trim(2, ['Radarsat2'])
+
+        self.assertEqual(self.img_lst.get_ids(), ['1', '3'])
+        self.assertEqual(self._count_unparsed(), 2)
+
+    def test_trim_collections(self):
+        self.img_lst.trim(1, ['Radarsat2', 'RCMImageProducts'])
+
+        self.assertEqual(self.img_lst.get_ids(), ['1', '0'])
+
+    def test_img_lst(self):
+        new_img = image.Image()
+        new_img.parse_record(make_records(6)[5])
+
+        # Changes to the img_lst change the ImageList
+        self.assertIsNone(self.img_lst.get_image('5'))
+        self.img_lst.img_lst.append(new_img)
+        self.assertIs(self.img_lst.get_image('5'), new_img)
+        self.assertEqual(len(self.img_lst.get_columns()), 6)
+
+        del self.img_lst.get_images()[0]
+        self.assertIsNone(self.img_lst.get_image('0'))
+        self.assertEqual(self.img_lst.count(), 5)
+
+    def test_duplicates(self):
+        first = self.img_lst.get_image('1')
+        dup = image.Image()
+        dup.parse_record(make_records(2)[1])
+
+        # Images are added as they are, the first one is found by Record Id
+        self.img_lst.add_image(dup)
+        self.assertEqual(self.img_lst.get_ids(), ['0', '1', '2', '3', '4',
+                                                  '1'])
+        self.assertIs(self.img_lst.get_image('1'), first)
+
+        self.img_lst.remove_images(['1', '3'])
+        self.assertEqual(self.img_lst.get_ids(), ['0', '2', '4'])
+
+    def test_columns(self):
+        columns = self.img_lst.get_columns()
+
+        self.assertEqual(list(columns.record_id), ['0', '1', '2', '3', '4'])
+        self.assertEqual(self._count_unparsed(), 5)
+
+        self.assertEqual(str(columns.date[1]), '2023-01-02T12:30:00')
+        self.assertEqual(columns.bounds[2].tolist(), [2.0, 45.0, 3.5, 46.0])
+
+
+
+class TestCoverage(unittest.TestCase):
+
+    # The footprints (min x, min y, max x, max y) and dates of the images,
+    #   with an AOI from (0, 0) to (4, 2)
+    footprints = [(0, 0, 2, 2, '2023-01-01'),
+                  (2, 0, 4, 2, '2023-01-01'),
+                  (1, 0, 3, 2, '2023-01-02'),
+                  (0, 0, 4, 1, '2023-01-02'),
+                  (3.5, 0, 6, 2, '2023-01-03'),
+                  (10, 0, 11, 1, '2023-01-03')]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.aoi = os.path.join(self.tmp_dir.name, 'aoi.geojson')
+        with open(self.aoi, 'w') as out_f:
+            json.dump({'type': 'FeatureCollection',
+                       'features': [{'type': 'Feature', 'properties': {},
+                                     'geometry': self._make_polygon(
+                                         0, 0, 4, 2)}]}, out_f)
+
+        records = make_records(len(self.footprints))
+        for rec, (x1, y1, x2, y2, date) in zip(records, self.footprints):
+            rec['geometry'] = self._make_polygon(x1, y1, x2, y2)
+            rec['metadata'].append(['Acquisition Start Date',
+                                    f"{date} 00:00:00 GMT"])
+
+        eod = Mock()
+        eod.eodms_geo = spatial.Geo(eod)
+        self.img_lst = image.ImageList(eod)
+        self.img_lst.ingest_results(records)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _make_polygon(self, x1, y1, x2, y2):
+        return {'type': 'Polygon',
+                'coordinates': [[[x1, y1], [x2, y1], [x2, y2], [x1, y2],
+                                 [x1, y1]]]}
+
+    def test_filter_overlap(self):
+        self.img_lst.filter_overlap(40, self.aoi)
+
+        # The 5th image only covers 12.5% of the AOI and is 20% in the AOI
+        self.assertEqual(self.img_lst.get_ids(), ['0', '1', '2', '3'])
+
+        # A small list does not need a spatial index
+        self.assertIsNone(self.img_lst.get_columns().index)
+
+    def test_filter_overlap_index(self):
+        self.img_lst.filter_overlap('15', self.aoi, use_index=True)
+
+        self.assertEqual(self.img_lst.get_ids(), ['0', '1', '2', '3', '4'])
+
+    def test_select_coverage(self):
+        coverage = self.img_lst.select_coverage(self.aoi)
+
+        # The first 2 images cover the AOI
+        self.assertEqual(self.img_lst.get_ids(), ['0', '1'])
+        self.assertEqual(coverage, {'all': 100.0})
+
+    def test_select_coverage_target(self):
+        coverage = self.img_lst.select_coverage(self.aoi, target=40)
+
+        self.assertEqual(self.img_lst.get_ids(), ['0'])
+        self.assertEqual(coverage, {'all': 50.0})
+
+    def test_select_coverage_dates(self):
+        coverage = self.img_lst.select_coverage(self.aoi, date_bin='day')
+
+        # The AOI is covered separately by the images of each day; the 4th
+        #   image adds the parts of the AOI outside the 3rd one
+        self.assertEqual(self.img_lst.get_ids(), ['0', '1', '2', '3', '4'])
+        self.assertEqual(coverage, {'2023-01-01': 100.0,
+                                    '2023-01-02': 75.0,
+                                    '2023-01-03': 12.5})
+
+
+class TestMetadata(unittest.TestCase):
+
+    def setUp(self):
+        self.img_lst = image.ImageList(Mock())
+        self.img_lst.ingest_results(make_records(4))
+        self.images = self.img_lst.get_images()
+
+    def test_lazy_parse(self):
+        img = self.images[0]
+
+        # The record is only parsed when its metadata is needed
+        self.assertEqual(img.get_record_id(), '0')
+        self.assertIsNotNone(img._raw)
+
+        self.assertEqual(img.get_date(), '2023-01-01 12:30:00 GMT')
+        self.assertIsNone(img._raw)
+
+        # The WKT is only created when it is requested
+        wkt_idx = img._schema.index['wkt']
+        self.assertIs(img._row[wkt_idx], image._PENDING)
+        self.assertTrue(img.get_metadata('wkt').startswith('POLYGON'))
+        self.assertIsInstance(img._row[wkt_idx], str)
+
+    def test_schema(self):
+        rcm_imgs = [self.images[0], self.images[2]]
+        r2_img = self.images[1]
+        for img in self.images:
+            img.get_date()
+
+        # The images of a collection share their keys
+        self.assertIs(rcm_imgs[0]._schema, rcm_imgs[1]._schema)
+        self.assertIsNot(rcm_imgs[0]._schema, r2_img._schema)
+        self.assertEqual(rcm_imgs[0].get_fields(), r2_img.get_fields())
+
+        rcm_imgs[0].set_metadata('True', 'downloaded')
+        self.assertEqual(rcm_imgs[0].get_metadata('downloaded'), 'True')
+        self.assertIsNone(rcm_imgs[1].get_metadata('downloaded'))
+        self.assertNotIn('downloaded', rcm_imgs[1].get_fields())
+
+    def test_metadata_dict(self):
+        img = self.images[0]
+
+        mdata = img.get_metadata()
+        self.assertEqual(mdata['recordId'], '0')
+        self.assertTrue(mdata['wkt'].startswith('POLYGON'))
+
+        # Changes to the dictionary are kept with the image
+        mdata['downloaded'] = 'True'
+        mdata.update({'status': 'SUCCESS'})
+        del mdata['acquisitionStartDate']
+
+        self.assertEqual(img.get_metadata('downloaded'), 'True')
+        self.assertEqual(img.get_metadata('status'), 'SUCCESS')
+        self.assertIsNone(img.get_date())
+        self.assertEqual(img.get_metadata(), mdata)
+
+
+
+class TestOrderList(unittest.TestCase):
+
+    def setUp(self):
+        self.img_lst = image.ImageList(Mock())
+        self.img_lst.ingest_results(make_records(4))
+
+        self.ord_lst = image.OrderList(Mock(), self.img_lst)
+        self.ord_lst.ingest_results({'items': [
+            {'recordId': '0', 'itemId': '10', 'orderId': '100',
+             'status': 'SUBMITTED'},
+            {'recordId': '1', 'itemId': '11', 'orderId': '100',
+             'status': 'SUBMITTED'},
+            {'recordId': '2', 'itemId': '12', 'orderId': '101',
+             'status': 'SUBMITTED'}]})
+
+    def _make_item(self, rec_id, item_id, order_id):
+        order_item = image.OrderItem(Mock())
+        order_item.parse_record({'recordId': rec_id, 'itemId': item_id,
+                                 'orderId': order_id})
+        return order_item
+
+    def _check_index(self):
+        # The dictionaries contain every OrderItem and only those
+        items = self.ord_lst.get_order_items()
+        self.assertEqual(sorted(self.ord_lst.item_ids.keys()),
+                         sorted(i.get_item_id() for i in items))
+
+        for order in self.ord_lst.get_orders():
+            order_items = order.get_items()
+            self.assertEqual(sorted(order.item_ids.keys()),
+                             sorted(i.get_item_id() for i in order_items))
+            self.assertEqual(sorted(order.record_ids.keys()),
+                             sorted(i.get_record_id() for i in order_items))
+            for item in order_items:
+                self.assertIs(order.get_item(item.get_item_id()), item)
+                self.assertIs(order.get_item_by_image_id(
+                    item.get_record_id()), item)
+                self.assertIs(self.ord_lst.get_order_item(
+                    item.get_item_id()), item)
+
+    def test_add(self):
+        self.assertEqual(self.ord_lst.count(), 2)
+        self.assertEqual(self.ord_lst.count_items(), 3)
+        self._check_index()
+
+        order = self.ord_lst.get_order('100')
+        self.assertIs(order.get_image('1'), self.img_lst.get_image('1'))
+        self.assertEqual(self.img_lst.get_image('1').get_metadata('orderId'),
+                         '100')
+
+        self.ord_lst.update_order('101', self._make_item('3', '13', '101'))
+        self.assertEqual(self.ord_lst.get_order('101').get_record_ids(),
+                         ['2', '3'])
+        self._check_index()
+
+    def test_remove(self):
+        self.ord_lst.remove_order('100')
+
+        self.assertIsNone(self.ord_lst.get_order('100'))
+        self.assertIsNone(self.ord_lst.get_order_item('10'))
+        self.assertEqual(self.ord_lst.count_items(), 1)
+        self._check_index()
+
+        # Replace the OrderItem of an image
+        new_item = self._make_item('2', '22', '101')
+        self.ord_lst.replace_item('101', new_item)
+
+        order = self.ord_lst.get_order('101')
+        self.assertIsNone(order.get_item('12'))
+        self.assertIsNone(self.ord_lst.get_order_item('12'))
+        self.assertIs(order.get_item_by_image_id('2'), new_item)
+        self._check_index()
+
+    def test_merge(self):
+        other = image.OrderList(Mock())
+        other.ingest_results([
+            {'recordId': '3', 'itemId': '13', 'orderId': '101'},
+            {'recordId': '4', 'itemId': '14', 'orderId': '102'}])
+
+        self.ord_lst.merge_ordlist(other)
+
+        self.assertEqual(self.ord_lst.count(), 3)
+        self.assertEqual(self.ord_lst.count_items(), 5)
+        self.assertEqual(self.ord_lst.get_order('101').get_record_ids(),
+                         ['2', '3'])
+        self._check_index()
+
+        self.ord_lst.trim_items(4)
+        self.assertEqual(self.ord_lst.count_items(), 4)
+        self.assertIsNone(self.ord_lst.get_order_item('14'))
+        self._check_index()
+
+
+if __name__ == '__main__':
+    unittest.main()
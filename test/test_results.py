@@ -0,0 +1,178 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Results Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the results files of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from scripts import csv_util
+from scripts import image
+from scripts import utils as eod_util
+
+from record_util import make_records
+
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        with patch.object(eod_util, 'EODMSRAPI'):
+            self.eod = eod_util.EodmsProcess(username='user',
+                                             password='pass')
+
+        self.eod.results_path = self.tmp_dir.name
+        self.csv_fn = os.path.join(self.tmp_dir.name, 'Results.csv')
+
+        # The last image has no footprint
+        records = make_records(4)
+        records[-1]['geometry'] = None
+
+        img_lst = image.ImageList(self.eod)
+        img_lst.ingest_results(records)
+        self.coords = [img.get_coords() for img in img_lst.get_images()]
+
+        csv_util.EODMS_CSV(self.eod, self.csv_fn).export_results(img_lst)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_csv_fields(self):
+        # Records of the same collection with different metadata
+        records = make_records(2)
+        records[0]['metadata'].append(['Spatial Resolution', '30'])
+        records[1]['metadata'].append(['Sensor Mode', 'Medium'])
+
+        img_lst = image.ImageList(self.eod)
+        img_lst.ingest_results(records)
+
+        csv_fn = os.path.join(self.tmp_dir.name, 'Fields.csv')
+        res_csv = csv_util.EODMS_CSV(self.eod, csv_fn)
+        res_csv.export_results(img_lst)
+        header = res_csv.import_csv(header_only=True)
+
+        self.assertIn('spatialResolution', header)
+        self.assertIn('sensorMode', header)
+
+    def _write_eodms_csv(self, lines):
+        csv_fn = os.path.join(self.tmp_dir.name, 'EODMS.csv')
+        with open(csv_fn, 'wb') as out_f:
+            out_f.write(b'\r\n'.join(lines))
+
+        return csv_util.EODMS_CSV(self.eod, csv_fn)
+
+    def test_eodms_csv(self):
+        eodms_csv = self._write_eodms_csv(
+            [b'Sequence ID,Satellite,Footprint',
+             b'1001,RCM-1,"-75.0 45.0,-73.5 45.0,-73.5 46.0"',
+             b'1002,RCM-2,"-74.0 45.0,-72.5 45.0,-72.5 46.0"'])
+
+        records = eodms_csv.iter_eodms_csv()
+
+        # The file is closed when a partly read generator is closed
+        self.assertEqual(next(records)['footprint'],
+                         '-75.0 45.0,-73.5 45.0,-73.5 46.0')
+        in_f = records.gi_frame.f_locals['in_f']
+        records.close()
+        self.assertTrue(in_f.closed)
+
+        self.assertEqual([rec['sequence id']
+                          for rec in eodms_csv.import_eodms_csv()],
+                         ['1001', '1002'])
+
+    def test_eodms_csv_error(self):
+        eodms_csv = self._write_eodms_csv([b'Sequence ID,Satellite',
+                                           b'1001,RCM-\xff\xfe'])
+
+        with self.assertRaises(ValueError):
+            list(eodms_csv.iter_eodms_csv())
+
+        with patch.object(self.eod, 'print_support'):
+            with self.assertRaises(SystemExit):
+                eodms_csv.import_eodms_csv()
+
+    @unittest.skipUnless(csv_util.PYARROW_INCLUDED,
+                         "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        res_csv = csv_util.EODMS_CSV(self.eod, self.csv_fn)
+
+        csv_vals = None
+
+        # The first time the results come from the CSV file, then from
+        #   the Parquet file written the previous time
+        for attempt in range(3):
+            img_lst = self.eod._get_prev_res(self.csv_fn)
+            self.assertEqual([img.get_coords()
+                              for img in img_lst.get_images()],
+                             self.coords)
+            self.assertEqual(len(img_lst.get_columns()), 4)
+
+            # Both files give the same values
+            vals = [{f: img.get_metadata(f) for f in img.get_fields()
+                     if not f == 'geometry'}
+                    for img in img_lst.get_images()]
+            if csv_vals is None:
+                csv_vals = vals
+            self.assertEqual(vals, csv_vals)
+
+            res_csv.export_parquet(img_lst)
+
+    @unittest.skipUnless(csv_util.PYARROW_INCLUDED,
+                         "pyarrow is not installed")
+    def test_parquet_outdated(self):
+        res_csv = csv_util.EODMS_CSV(self.eod, self.csv_fn)
+        res_csv.export_parquet(self.eod._get_prev_res(self.csv_fn))
+
+        # Edit the CSV file after the Parquet file was written
+        with open(self.csv_fn) as in_f:
+            csv_str = in_f.read()
+        with open(self.csv_fn, 'w') as out_f:
+            out_f.write(csv_str.replace('Image 1', 'Edited'))
+        parquet_time = os.path.getmtime(res_csv.get_parquet_fn())
+        os.utime(self.csv_fn, (parquet_time + 10, parquet_time + 10))
+
+        img_lst = self.eod._get_prev_res(self.csv_fn)
+        self.assertEqual([img.get_metadata('title')
+                          for img in img_lst.get_images()],
+                         ['Image 0', 'Edited', 'Image 2', 'Image 3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Search Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the searches of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from scripts import cache_util
+from scripts import utils as eod_util
+
+
+class DayRapi:
+    """
+    Stands in for the EODMSRAPI with one image per day in 2023 for each
+        collection. The searches of the 'Radarsat2' collection fail.
+    """
+
+    rapi_collections = {'RCMImageProducts': {'title': 'RCM Image Products',
+                                             'aliases': ['rcm']},
+                        'Radarsat2': {'title': 'RADARSAT-2',
+                                      'aliases': ['r2']}}
+    sessions = []
+    lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        self.results = []
+        self.err_msg = None
+        self.dates = None
+
+        with self.lock:
+            self.sessions.append(self)
+
+    def set_root_url(self, url):
+        pass
+
+    def get_collections(self, as_list=False, opt='id', redo=False):
+        if as_list:
+            return list(self.rapi_collections.keys())
+        return self.rapi_collections
+
+    def clear_results(self):
+        self.results = []
+
+    def reset(self):
+        self.results = []
+
+    def search(self, coll_id, filters, features, dates, result_fields,
+               max_results):
+        # Give the other worker threads time to start
+        time.sleep(0.01)
+
+        if coll_id == 'Radarsat2':
+            return {'errors': '500 Server Error'}
+
+        date_form = "%Y%m%d_%H%M%S"
+        start = datetime.datetime.strptime(dates[0]['start'], date_form)
+        end = datetime.datetime.strptime(dates[0]['end'], date_form)
+
+        self.results = []
+        day = datetime.datetime(2023, 1, 1)
+        while day.year == 2023:
+            if start <= day <= end:
+                self.results.append({'recordId': day.strftime('%Y%m%d'),
+                                     'collectionId': coll_id})
+            day += datetime.timedelta(days=1)
+
+        if max_results:
+            self.results = self.results[:max_results]
+
+        return len(self.results)
+
+    def get_results(self, form='raw'):
+        return self.results
+
+    def get_record(self, coll_id, record_id):
+        time.sleep(0.01)
+
+        # The images are only in the RCMImageProducts collection
+        if coll_id == 'Radarsat2':
+            return {'errors': '404 Client Error: Not Found'}
+
+        return [{'recordId': record_id, 'collectionId': coll_id}]
+
+
+class TestShardedSearch(unittest.TestCase):
+
+    workers = 4
+
+    def setUp(self):
+        DayRapi.sessions.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.patcher = patch.object(eod_util, 'EODMSRAPI', DayRapi)
+        self.patcher.start()
+
+        self.eod = eod_util.EodmsProcess(username='user', password='pass',
+                                         search_workers=self.workers,
+                                         date_shards=4, max_res=20)
+        self.eod.query_cache = cache_util.QueryCache(
+            cache_path=self.tmp_dir.name)
+
+        self.dates = self.eod._parse_dates('20230101-20231231')
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def test_sub_windows(self):
+        img_lst = self.eod.query_entries(['RCMImageProducts'],
+                                         dates=self.dates)
+
+        rec_ids = img_lst.get_ids()
+        self.assertEqual(len(rec_ids), 365)
+        self.assertEqual(rec_ids, sorted(rec_ids))
+
+        # The main session and one session for each worker thread
+        self.assertLessEqual(len(DayRapi.sessions), self.workers + 1)
+
+    def test_failed_collection(self):
+        img_lst = self.eod.query_entries(['RCMImageProducts', 'Radarsat2'],
+                                         dates=self.dates)
+
+        self.assertEqual(len(img_lst.get_ids()), 365)
+        self.assertIn('Radarsat2', self.eod.query_errors)
+        self.assertNotIn('RCMImageProducts', self.eod.query_errors)
+
+
+class TestRecordLookup(unittest.TestCase):
+
+    workers = 4
+
+    def setUp(self):
+        DayRapi.sessions.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.patcher = patch.object(eod_util, 'EODMSRAPI', DayRapi)
+        self.patcher.start()
+
+        self.eod = eod_util.EodmsProcess(username='user', password='pass',
+                                         search_workers=self.workers)
+        self.eod._get_collection = lambda sat: ['Radarsat2',
+                                                'RCMImageProducts']
+
+        self.csv_fn = os.path.join(self.tmp_dir.name, 'EODMS_UI.csv')
+        with open(self.csv_fn, 'w') as out_f:
+            out_f.write('Satellite,Sequence ID,Title\n')
+            for idx in range(40):
+                out_f.write(f"RCM,{100 + idx},Image {idx}\n")
+            out_f.write('RCM,,Empty\n')
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def test_lookup(self):
+        img_lst = self.eod._get_eodms_res(self.csv_fn)
+
+        # Found in their second collection, in the order of the CSV file
+        self.assertEqual(img_lst.get_ids(),
+                         [str(100 + idx) for idx in range(40)])
+        self.assertEqual(set(img.get_coll_id()
+                             for img in img_lst.get_images()),
+                         {'RCMImageProducts'})
+
+        self.assertLessEqual(len(DayRapi.sessions), self.workers + 1)
+
+
+class TestSerialSearch(TestShardedSearch):
+
+    workers = 1
+
+    def setUp(self):
+        super().setUp()
+
+        # With a single worker, the searches are sent from the main thread
+        #   without a pool of threads
+        self.pool_patcher = patch.object(eod_util, 'ThreadPoolExecutor',
+                                         side_effect=AssertionError)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool_patcher.stop()
+        super().tearDown()
+
+
+class TestSerialLookup(TestRecordLookup):
+
+    workers = 1
+
+    def setUp(self):
+        super().setUp()
+
+        self.pool_patcher = patch.object(eod_util, 'ThreadPoolExecutor',
+                                         side_effect=AssertionError)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool_patcher.stop()
+        super().tearDown()
+
+    def test_lookup(self):
+        super().test_lookup()
+
+        # Only the main session is used
+        self.assertEqual(len(DayRapi.sessions), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,321 @@
+##############################################################################
+# MIT License
+#
+# Copyright (c) His Majesty the King in Right of Canada, as
+# represented by the Minister of Natural Resources, 2023.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+#
+##############################################################################
+
+__title__ = 'EODMS-CLI Spatial Tester'
+__author__ = 'Kevin Ballantyne'
+__copyright__ = 'Copyright (c) His Majesty the King in Right of Canada, ' \
+                'as represented by the Minister of Natural Resources, 2023.'
+__license__ = 'MIT License'
+__description__ = 'Tests the geospatial exports of the EODMS-CLI without ' \
+                  'querying the RAPI.'
+__email__ = 'eodms-sgdot@nrcan-rncan.gc.ca'
+
+import json
+import os
+import re
+import sys
+import tempfile
+import types
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import numpy as np
+import shapely
+
+from scripts import image
+from scripts import spatial
+
+from record_util import make_records
+
+if spatial.GDAL_INCLUDED:
+    from scripts.spatial import ogr
+    from scripts.spatial import osr
+
+if spatial.PYARROW_INCLUDED:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+class TestExport(unittest.TestCase):
+
+    count = 10
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.geo = spatial.Geo(Mock())
+        self.img_lst = image.ImageList(Mock())
+        self.img_lst.ingest_results(make_records(self.count))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _get_fn(self, fn):
+        return os.path.join(self.tmp_dir.name, fn)
+
+    def test_geojson_without_gdal(self):
+        with patch.object(spatial, 'GDAL_INCLUDED', False):
+            self.geo.export_results(self.img_lst, self._get_fn('out.shp'))
+
+        with open(self._get_fn('out.geojson')) as in_f:
+            feats = json.load(in_f)['features']
+
+        self.assertEqual(len(feats), self.count)
+        self.assertEqual(feats[0]['geometry']['coordinates'][0][0],
+                         [-75.0, 45.0])
+
+    def test_geojson_geometry(self):
+        records = make_records(3)
+        # An image without a footprint and one with the footprint as the
+        #   string found in a results file
+        records[1]['geometry'] = None
+        records[2]['geometry'] = str(records[2]['geometry'])
+
+        img_lst = image.ImageList(Mock())
+        img_lst.ingest_results(records)
+
+        with patch.object(spatial, 'GDAL_INCLUDED', False):
+            self.geo.export_results(img_lst, self._get_fn('out.geojson'))
+
+        with open(self._get_fn('out.geojson')) as in_f:
+            feats = json.load(in_f)['features']
+
+        self.assertEqual(len(feats), 3)
+        self.assertIsNone(feats[1]['geometry'])
+        self.assertEqual(feats[2]['geometry'],
+                         {'type': 'Polygon',
+                          'coordinates': [[[-73.0, 45.0], [-71.5, 45.0],
+                                           [-71.5, 46.0], [-73.0, 46.0],
+                                           [-73.0, 45.0]]]})
+        for feat in feats:
+            self.assertNotIn('geometry', feat['properties'])
+        self.assertEqual(feats[1]['properties']['title'], 'Image 1')
+
+    def test_ogr_field_types(self):
+        # The types are determined without GDAL, using stand-ins for the
+        #   OGR field types
+        ogr_types = types.SimpleNamespace(OFTInteger64='Integer64',
+                                          OFTReal='Real', OFTString='String')
+
+        records = make_records(3)
+        records[1]['metadata'] = [m for m in records[1]['metadata']
+                                  if m[0] != 'Incidence Angle']
+        img_lst = image.ImageList(Mock())
+        img_lst.ingest_results(records)
+
+        fields = ['version', 'incidenceAngle', 'title', 'beamMnemonic']
+        with patch.object(spatial, 'ogr', ogr_types, create=True):
+            ogr_fields = self.geo._get_ogr_fields(img_lst.get_columns(),
+                                                  fields, max_width=4)
+
+        ogr_fields = {f: (f_type, width, list(col))
+                      for f, f_type, width, col in ogr_fields}
+
+        self.assertEqual(ogr_fields['version'][:2], ('Integer64', 0))
+        self.assertEqual(ogr_fields['version'][2], [3.0, 4.0, 3.0])
+
+        # A missing value does not change the type of a field
+        f_type, width, col = ogr_fields['incidenceAngle']
+        self.assertEqual((f_type, width), ('Real', 0))
+        self.assertEqual(col[0], 35.25)
+        self.assertTrue(np.isnan(col[1]))
+
+        # The width of the string fields is limited to max_width
+        self.assertEqual(ogr_fields['title'][:2], ('String', 4))
+        self.assertEqual(ogr_fields['title'][2][0], 'Image 0')
+        self.assertEqual(ogr_fields['beamMnemonic'][:2], ('String', 4))
+
+    @unittest.skipUnless(spatial.GDAL_INCLUDED, "GDAL is not installed")
+    def test_ogr_fields(self):
+        out_fn = self._get_fn('out.gpkg')
+
+        # A small chunk size to write the features in several transactions
+        self.geo._write_ogr(self.img_lst, out_fn, 'out', 'GPKG',
+                            chunk_size=3)
+
+        ds = ogr.Open(out_fn)
+        lyr = ds.GetLayer(0)
+        self.assertEqual(lyr.GetFeatureCount(), self.count)
+
+        lyr_defn = lyr.GetLayerDefn()
+        field_types = {}
+        for idx in range(lyr_defn.GetFieldCount()):
+            field_defn = lyr_defn.GetFieldDefn(idx)
+            field_types[field_defn.GetName()] = field_defn.GetType()
+
+        self.assertEqual(field_types['version'], ogr.OFTInteger64)
+        self.assertEqual(field_types['incidenceAngle'], ogr.OFTReal)
+        self.assertEqual(field_types['title'], ogr.OFTString)
+
+        feat = lyr.GetNextFeature()
+        self.assertEqual(feat.GetField('version'), 3)
+        self.assertEqual(feat.GetField('incidenceAngle'), 35.25)
+        self.assertEqual(feat.GetField('title'), 'Image 0')
+        self.assertEqual(feat.GetGeometryRef().GetEnvelope(),
+                         (-75.0, -73.5, 45.0, 46.0))
+
+        ds = None
+
+    def _get_kml_points(self, kml_fn):
+        """
+        Gets the x and y of the points of the first footprint in a KML.
+        """
+
+        with open(kml_fn) as in_f:
+            kml = in_f.read()
+
+        coords = re.search(r'<coordinates>(.*?)</coordinates>', kml,
+                           re.DOTALL).group(1)
+
+        return [tuple(float(v) for v in pnt.split(',')[:2])
+                for pnt in coords.split()]
+
+    @unittest.skipUnless(spatial.GDAL_INCLUDED, "GDAL is not installed")
+    def test_kml_coordinates(self):
+        out_fn = self._get_fn('out.kml')
+        self.geo.export_results(self.img_lst, out_fn)
+
+        # Write the first footprint with its coordinates reversed one
+        #   point at a time, as the KML export did before
+        ref_fn = self._get_fn('ref.kml')
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(4326)
+        ds = ogr.GetDriverByName('KML').CreateDataSource(ref_fn)
+        lyr = ds.CreateLayer('ref', srs, ogr.wkbPolygon)
+        feat = ogr.Feature(lyr.GetLayerDefn())
+        poly = self.img_lst.get_images()[0].get_geometry('geom')
+        self.geo.reverse_coords(poly)
+        feat.SetGeometry(poly)
+        lyr.CreateFeature(feat)
+        feat = None
+        ds = None
+
+        self.assertEqual(self._get_kml_points(out_fn),
+                         self._get_kml_points(ref_fn))
+
+    @unittest.skipUnless(spatial.GDAL_INCLUDED, "GDAL is not installed")
+    def test_shapefile_fields(self):
+        out_fn = self._get_fn('out.shp')
+        self.geo.export_results(self.img_lst, out_fn)
+
+        ds = ogr.Open(out_fn)
+        lyr = ds.GetLayer(0)
+
+        # The Shapefile driver truncates the field names to 10 characters
+        feat = lyr.GetNextFeature()
+        self.assertEqual(feat.GetField('incidenceA'), 35.25)
+        self.assertEqual(feat.GetField('beamMnemon'), '16M11')
+        self.assertEqual(feat.GetField('title'), 'Image 0')
+
+        ds = None
+
+    def test_flatgeobuf_without_gdal(self):
+        with patch.object(spatial, 'GDAL_INCLUDED', False):
+            self.geo.export_results(self.img_lst, self._get_fn('out.fgb'))
+
+        self.assertFalse(os.path.exists(self._get_fn('out.fgb')))
+        self.assertTrue(os.path.exists(self._get_fn('out.geojson')))
+
+    @unittest.skipUnless(spatial.GDAL_INCLUDED
+                         and ogr.GetDriverByName('FlatGeobuf') is not None,
+                         "GDAL with the FlatGeobuf driver is not installed")
+    def test_flatgeobuf(self):
+        out_fn = self._get_fn('out.fgb')
+        self.geo.export_results(self.img_lst, out_fn)
+
+        ds = ogr.Open(out_fn)
+        lyr = ds.GetLayer(0)
+        self.assertEqual(lyr.GetFeatureCount(), self.count)
+
+        # The spatial index is written with the features
+        self.assertTrue(lyr.TestCapability(ogr.OLCFastSpatialFilter))
+
+        # Only the 3rd and 4th footprints cross longitude -71.85
+        lyr.SetSpatialFilterRect(-71.9, 45.2, -71.8, 45.8)
+        titles = sorted(feat.GetField('title') for feat in lyr)
+        self.assertEqual(titles, ['Image 2', 'Image 3'])
+
+        ds = None
+
+    def test_parquet_without_pyarrow(self):
+        with patch.object(spatial, 'PYARROW_INCLUDED', False):
+            self.geo.export_results(self.img_lst,
+                                    self._get_fn('out.parquet'))
+
+        self.assertTrue(os.path.exists(self._get_fn('out.geojson')))
+
+    @unittest.skipUnless(spatial.PYARROW_INCLUDED,
+                         "pyarrow is not installed")
+    def test_geoparquet(self):
+        # An image without a footprint
+        records = make_records(1)
+        records[0]['recordId'] = '2000'
+        records[0]['geometry'] = None
+        self.img_lst.ingest_results(records)
+
+        out_fn = self._get_fn('out.parquet')
+        self.geo._write_parquet(self.img_lst, out_fn, row_group_size=4)
+
+        pq_file = pq.ParquetFile(out_fn)
+        self.assertEqual(pq_file.metadata.num_row_groups, 3)
+
+        table = pq_file.read()
+        self.assertEqual(table.num_rows, self.count + 1)
+
+        geo_meta = json.loads(table.schema.metadata[b'geo'])
+        self.assertEqual(geo_meta['version'], '1.1.0')
+        geom_meta = geo_meta['columns'][geo_meta['primary_column']]
+        self.assertEqual(geom_meta['encoding'], 'WKB')
+        self.assertEqual(geom_meta['covering']['bbox']['xmin'],
+                         ['bbox', 'xmin'])
+        self.assertEqual(geom_meta['bbox'],
+                         [-75.0, 45.0, -75.0 + self.count + 0.5, 46.0])
+
+        self.assertEqual(table.schema.field('version').type, pa.int64())
+        self.assertEqual(table.schema.field('incidenceAngle').type,
+                         pa.float64())
+        self.assertEqual(table.schema.field('title').type, pa.string())
+
+        # The bounding box column matches the footprints
+        geoms = table.column('geometry').to_pylist()
+        bboxes = table.column('bbox').to_pylist()
+        for wkb, bbox in zip(geoms[:self.count], bboxes[:self.count]):
+            geom = shapely.from_wkb(wkb)
+            self.assertEqual([bbox['xmin'], bbox['ymin'],
+                              bbox['xmax'], bbox['ymax']],
+                             list(geom.bounds))
+
+        self.assertEqual(shapely.from_wkb(geoms[0]).exterior.coords[0],
+                         (-75.0, 45.0))
+        self.assertIsNone(geoms[-1])
+        self.assertIsNone(bboxes[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()